@@ -32,11 +32,15 @@ INSTALLED_APPS = [
     'corsheaders',
     'api',
     'django_q',
+    'silk',
 ]
 
 # Register middleware here
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.APICompressionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -45,7 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'silk.middleware.SilkyMiddleware',
+    'api.middleware.SilkSamplingMiddleware',
 ]
 
 ROOT_URLCONF = 'Rakmedia.urls'
@@ -98,17 +102,127 @@ MEDIA_ROOT = BASE_DIR / 'media'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Task file downloads (/api/tasks/<id>/files/<id>/download/) can hand the byte transfer to the front proxy:
+# 'nginx'    -> X-Accel-Redirect to FILE_DOWNLOAD_ACCEL_PREFIX + file name, with an internal location like:
+#               location /protected-media/ { internal; alias /app/media/; }
+# 'sendfile' -> X-Sendfile with the absolute file path (Apache mod_xsendfile, lighttpd...)
+# Leave it empty to let Django stream the files itself (with Range / ETag support).
+FILE_DOWNLOAD_ACCEL = env('FILE_DOWNLOAD_ACCEL', default=None)
+FILE_DOWNLOAD_ACCEL_PREFIX = env('FILE_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+
+# Chunked task file uploads (/api/tasks/<id>/uploads/) are assembled here before being moved into MEDIA_ROOT.
+# Uploads that receive no chunk for CHUNKED_UPLOAD_EXPIRY seconds are removed by the sweep_stale_uploads task.
+CHUNKED_UPLOAD_TEMP_DIR = env('CHUNKED_UPLOAD_TEMP_DIR', default=str(BASE_DIR / 'partial_uploads'))
+CHUNKED_UPLOAD_MAX_SIZE = env.int('CHUNKED_UPLOAD_MAX_SIZE', default=5 * 1024 ** 3)  # 5 GB
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = env.int('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', default=64 * 1024 ** 2)  # 64 MB per PUT, larger ones get a 413
+CHUNKED_UPLOAD_EXPIRY = env.int('CHUNKED_UPLOAD_EXPIRY', default=24 * 60 * 60)
+
+# Serve the hot read endpoints (profile, tasks, manager tasks, department employees, dashboard redirect)
+# with the native async views in api/async_views.py. Enable when running under ASGI (Rakmedia/asgi.py),
+# under WSGI the sync DRF views are faster.
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
+
+# Serve the long list endpoints (employees, department employees, tasks, task files) from .values() rows
+# with api/fast_serializers.py instead of the DRF serializers. Same JSON, less CPU per row.
+FAST_LIST_SERIALIZERS = env.bool('FAST_LIST_SERIALIZERS', default=False)
+
+# Seconds a process trusts its reference data and role rules (api/utils/process_cache.py) before checking the
+# shared version again: a change made by another worker shows up there within this delay.
+PROCESS_CACHE_CHECK_INTERVAL = env.float('PROCESS_CACHE_CHECK_INTERVAL', default=1.0)
+
+# Most sub-requests accepted by a single POST to /api/batch/.
+API_BATCH_MAX_REQUESTS = env.int('API_BATCH_MAX_REQUESTS', default=10)
+
+# First employee code handed out by api/services/employee_codes.py, when no employee has one above it yet.
+EMPLOYEE_CODE_START = env.int('EMPLOYEE_CODE_START', default=100)
+
+# Most employees listed in one `updates` bulk update (PATCH /api/employees/bulk/).
+EMPLOYEE_BULK_UPDATE_MAX = env.int('EMPLOYEE_BULK_UPDATE_MAX', default=5000)
+
+# Square renditions generated in the background for every profile picture (see api/services/thumbnails.py).
+PROFILE_PICTURE_RENDITION_SIZES = (64, 128, 512)
+PROFILE_PICTURE_RENDITION_FORMATS = ('webp', 'jpeg')
+PROFILE_PICTURE_RENDITION_QUALITY = env.int('PROFILE_PICTURE_RENDITION_QUALITY', default=82)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # When explicitly creating a user model other than the django default user, you need to tell django which model to use,
 # Otherwise you'll get a conflict of interest error.
 AUTH_USER_MODEL = 'api.User'
 
+# JSON encoding of API requests and responses: 'orjson' (api/renderers.py and api/parsers.py, faster)
+# or 'json' (DRF's stdlib based classes). Both give the same output.
+# dev.py and prod.py define their own REST_FRAMEWORK, and use these too.
+API_JSON_BACKEND = env('API_JSON_BACKEND', default='orjson')
+API_JSON_CLASSES = {
+    'orjson': ('api.renderers.ORJSONRenderer', 'api.parsers.ORJSONParser'),
+    'json': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}
+API_RENDERER_CLASSES = (
+    API_JSON_CLASSES[API_JSON_BACKEND][0],
+    'rest_framework.renderers.BrowsableAPIRenderer',
+)
+API_PARSER_CLASSES = (
+    API_JSON_CLASSES[API_JSON_BACKEND][1],
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+)
+
+# Also serve and accept MessagePack ("Accept: application/msgpack"), needs `pip install msgpack`.
+API_MSGPACK = env.bool('API_MSGPACK', default=False)
+if API_MSGPACK:
+    API_RENDERER_CLASSES += ('api.renderers.MessagePackRenderer',)
+    API_PARSER_CLASSES += ('api.parsers.MessagePackParser',)
+
+# gzip / brotli (with `pip install brotli`) compression of API responses, see api/middleware.py.
+API_COMPRESSION_PATHS = ('/api/',)
+API_COMPRESSION_TYPES = ('application/json', 'application/msgpack', 'text/csv', 'application/x-ndjson')
+API_COMPRESSION_MIN_SIZE = env.int('API_COMPRESSION_MIN_SIZE', default=1024)  # bytes
+API_BROTLI_QUALITY = env.int('API_BROTLI_QUALITY', default=5)
+
+# Silk profiling of a sample of the requests, see api/middleware.py. Off (and free) unless SILK_ENABLED.
+# SILK_SAMPLE_RATE (0 to 1) of the requests under SILK_INCLUDE_PATHS are recorded, never those under SILK_EXCLUDE_PATHS.
+# Send the SILK_PROFILE_HEADER header (with SILK_PROFILE_TOKEN, or as a staff user: session or JWT) to record a given request.
+SILK_ENABLED = env.bool('SILK_ENABLED', default=False)
+SILK_SAMPLE_RATE = env.float('SILK_SAMPLE_RATE', default=0.01)
+SILK_INCLUDE_PATHS = env.list('SILK_INCLUDE_PATHS', default=['/api/'])
+SILK_EXCLUDE_PATHS = env.list('SILK_EXCLUDE_PATHS', default=['/silk/', '/static/', '/media/', '/api/schema/', '/api/metrics/'])
+SILK_PROFILE_HEADER = 'X-Silk-Profile'
+SILK_PROFILE_TOKEN = env('SILK_PROFILE_TOKEN', default='')
+
+# Silk storage: the oldest recordings past SILKY_MAX_RECORDED_REQUESTS are deleted (checked on 10% of the saves),
+# and request / response bodies over 16 KB are not stored. The /silk/ pages are for staff users only.
+SILKY_MAX_RECORDED_REQUESTS = env.int('SILKY_MAX_RECORDED_REQUESTS', default=5000)
+SILKY_MAX_RECORDED_REQUESTS_CHECK_PERCENT = 10
+SILKY_MAX_REQUEST_BODY_SIZE = 16 * 1024  # bytes
+SILKY_MAX_RESPONSE_BODY_SIZE = 16 * 1024  # bytes
+SILKY_AUTHENTICATION = True
+SILKY_AUTHORISATION = True
+SILKY_MIDDLEWARE_CLASS = 'api.middleware.SilkSamplingMiddleware'  # where silk_profile() looks for Silk in MIDDLEWARE
+
+# Prometheus metrics (latency, SQL, cache_response hits and django-q tasks), see api/utils/metrics.py.
+# Scraped from /api/metrics/ with "Authorization: Bearer <METRICS_TOKEN>", or from INTERNAL_IPS when no token is set.
+# Each process copies its values to the shared cache every METRICS_PUSH_INTERVAL seconds,
+# and METRICS_MAX_SERIES bounds the label sets kept per metric.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_PUSH_INTERVAL = env.int('METRICS_PUSH_INTERVAL', default=5)  # seconds
+METRICS_PROCESS_TIMEOUT = 60 * 60  # a process' values are dropped after an hour without pushing
+METRICS_MAX_SERIES = env.int('METRICS_MAX_SERIES', default=500)
+METRICS_CACHE = 'metrics'  # the CACHES alias holding each process' values
+
+# Server-Timing header with the db, cache, serialize, render and total time of a request, shown by the browser's DevTools.
+# Off unless SERVER_TIMING_ENABLED, then sent to staff users and on SERVER_TIMING_SAMPLE_RATE (0 to 1) of the other requests.
+SERVER_TIMING_ENABLED = env.bool('SERVER_TIMING_ENABLED', default=False)
+SERVER_TIMING_SAMPLE_RATE = env.float('SERVER_TIMING_SAMPLE_RATE', default=0.0)
+
 # REST framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
+    'DEFAULT_PARSER_CLASSES': API_PARSER_CLASSES,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
@@ -141,11 +255,34 @@ CACHES = {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
             'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
         }
-    }
+    },
+    # Each process' metrics (see METRICS_CACHE), kept apart from the cached responses.
+    'metrics': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/2',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    },
 }
 
 CACHE_TTL = 60 * 5  # 5 minutes (adjust per view)
 
+# How new employee accounts are onboarded:
+# 'reset_link' -> the account gets an unusable password and the welcome email carries a set-password link.
+# 'password'   -> the account gets a random (hashed) password, like the legacy flow.
+EMPLOYEE_ONBOARDING_MODE = env('EMPLOYEE_ONBOARDING_MODE', default='reset_link')
+
+# Batched welcome emails: pending messages are sent together over one SMTP connection
+# once WELCOME_EMAIL_BATCH_SIZE messages are waiting, or WELCOME_EMAIL_BATCH_WINDOW seconds after the first one.
+# Failed recipients are retried every WELCOME_EMAIL_RETRY_DELAY seconds, up to WELCOME_EMAIL_MAX_ATTEMPTS times.
+# Rows claimed by a flush that died before finishing are sent again after WELCOME_EMAIL_CLAIM_TIMEOUT seconds.
+WELCOME_EMAIL_BATCH_SIZE = env.int('WELCOME_EMAIL_BATCH_SIZE', default=100)
+WELCOME_EMAIL_BATCH_WINDOW = env.int('WELCOME_EMAIL_BATCH_WINDOW', default=30)
+WELCOME_EMAIL_RETRY_DELAY = env.int('WELCOME_EMAIL_RETRY_DELAY', default=300)
+WELCOME_EMAIL_MAX_ATTEMPTS = env.int('WELCOME_EMAIL_MAX_ATTEMPTS', default=5)
+WELCOME_EMAIL_CLAIM_TIMEOUT = env.int('WELCOME_EMAIL_CLAIM_TIMEOUT', default=600)
+
 # Django Q2 settings for handling background tasks
 Q_CLUSTER = {
     "name": "DjangoQ",
@@ -15,7 +15,6 @@ ALLOWED_HOSTS = ["*"]
 
 INSTALLED_APPS += [
     "debug_toolbar",
-    "silk",
 ]
 
 AUTH_USER_MODEL = 'api.User'
@@ -24,14 +23,20 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
+    'DEFAULT_PARSER_CLASSES': API_PARSER_CLASSES,
 }
 
 MIDDLEWARE += [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
-    "silk.middleware.SilkyMiddleware",
 ]
 
-#SILKY_INTERCEPT_FUNC = lambda request: not request.path.startswith("/admin/")
+# Silk records every request in development (see base.py for the sampling settings)
+SILK_ENABLED = env.bool("SILK_ENABLED", default=True)
+SILK_SAMPLE_RATE = env.float("SILK_SAMPLE_RATE", default=1.0)
+SILK_INCLUDE_PATHS = env.list("SILK_INCLUDE_PATHS", default=[])
+SILKY_AUTHENTICATION = False
+SILKY_AUTHORISATION = False
 
 INTERNAL_IPS = [
     "127.0.0.1",
@@ -32,6 +32,8 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": API_RENDERER_CLASSES,
+    "DEFAULT_PARSER_CLASSES": API_PARSER_CLASSES,
 }
 
 # ==========================================================
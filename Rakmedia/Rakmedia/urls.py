@@ -59,10 +59,8 @@ if settings.DEBUG:
     except ImportError:
         pass
 
-    # Include Silk profiling URLs (only in DEBUG mode)
-    try:
-        urlpatterns += [
-            path("silk/", include("silk.urls", namespace="silk")),
-        ]
-    except ImportError:
-        pass
\ No newline at end of file
+# Silk's recorded requests (staff users only outside development)
+if settings.SILK_ENABLED:
+    urlpatterns += [
+        path("silk/", include("silk.urls", namespace="silk")),
+    ]
@@ -4,7 +4,8 @@ from django.forms import ModelChoiceField
 from django.utils.html import format_html
 
 from .models import (Company, Department, Employee, EmployeePosition,
-                     EmployeeType, JobRole, Task, User)
+                     EmployeeType, JobRole, PendingWelcomeEmail, RoleTypeRule,
+                     Task, User)
 
 # Register your models here.
 
@@ -259,3 +260,21 @@ class JobRoleAdmin(admin.ModelAdmin):
 admin.site.register(EmployeeType)
 
 
+# The employee types each job role can be combined with (roles without rules accept any type).
+@admin.register(RoleTypeRule)
+class RoleTypeRuleAdmin(admin.ModelAdmin):
+    list_display = ('id', 'job_role', 'employee_type')
+    list_select_related = ('job_role', 'employee_type')
+    list_filter = ('employee_type',)
+    search_fields = ('job_role__name', 'employee_type__name')
+    ordering = ['job_role__name']
+
+
+# Welcome emails that are still waiting to be sent, or that failed and are waiting for a retry.
+@admin.register(PendingWelcomeEmail)
+class PendingWelcomeEmailAdmin(admin.ModelAdmin):
+    list_display = ('email', 'username', 'attempts', 'last_error', 'created_at')
+    search_fields = ('email', 'username')
+    readonly_fields = ('created_at',)
+
+
@@ -7,4 +7,5 @@ class ApiConfig(AppConfig):
 
     # Include here whatever separate signals file you add to the application and want to utilize.
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
+        from .utils import cache_signals  # noqa: F401
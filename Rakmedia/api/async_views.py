@@ -0,0 +1,269 @@
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from api import views
+from api.models import Employee, Task, TaskFile
+from api.serializers import (EmployeeDetailSerializer, EmployeeGetSerializer,
+                             TaskSerializer)
+from api.services import reference_data
+from api.services.employee import (get_department_employees,
+                                   is_manager_or_officer)
+from api.utils import async_cache, metrics, server_timing
+from api.utils.cache_decorator import VERSION_KEY, response_cache_key
+
+# Native async versions of the hot read endpoints, for deployments served through
+# Rakmedia/asgi.py (enable with ASYNC_READ_VIEWS, see api/urls.py).
+#
+# DRF views are sync only, so under ASGI every request to them is handed to a worker
+# thread. These views run on the event loop instead: authentication, the ORM (async API)
+# and the cache (api.utils.async_cache) are awaited, and the existing serializers turn
+# the already loaded rows into the same JSON as the sync views.
+#
+# Only GET is async. Other methods (PATCH on the profile, POST to create tasks...) are
+# passed on to the sync DRF view, so each URL keeps all of its behaviour.
+# Responses are cached under the same keys as the sync views' cache_response,
+# so both share entries and invalidation.
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Signature and expiry checks are CPU only, the user lookup is awaited.
+        return await self.aget_user(self.get_validated_token(raw_token))
+
+    async def aget_user(self, validated_token):
+        """Same checks as JWTAuthentication.get_user(), with the async ORM."""
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            ) from exc
+
+        try:
+            user = await self.user_model.objects.aget(
+                **{jwt_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as exc:
+            raise AuthenticationFailed(
+                'User not found', code='user_not_found'
+            ) from exc
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code='password_changed'
+            )
+
+        return user
+
+
+authenticator = AsyncJWTAuthentication()
+
+
+async def aprefix_version(prefix):
+    # Same as cache_decorator.prefix_version(), through the async cache client.
+    key = VERSION_KEY.format(prefix)
+    version = await async_cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        await async_cache.aset(key, version, None)
+    return version
+
+
+@server_timing.timed('render')
+def render_json(data, status=200):
+    # The first configured renderer is the JSON one (see API_JSON_BACKEND).
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(
+        renderer.render(data), status=status, content_type='application/json'
+    )
+
+
+def error_response(request, exc):
+    # Same status codes and bodies as APIView.handle_exception().
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.auth_header = authenticator.authenticate_header(request)
+
+    response = exception_handler(exc, {'request': request})
+    rendered = render_json(response.data, response.status_code)
+    for header, value in response.items():
+        if header != 'Content-Type':
+            rendered[header] = value
+    return rendered
+
+
+def async_read_view(sync_view, cache_prefix=None, timeout=900):
+    """
+    Turns `get(request, *args, **kwargs) -> (data, status)` into an async view.
+    `request` is a DRF Request (query_params, user...) like in the sync views.
+    If the sync view paginates (DEFAULT_PAGINATION_CLASS), it keeps serving GET too:
+    the async views return unpaginated lists.
+    """
+    view_class = getattr(sync_view, 'view_class', None)
+
+    def decorator(get):
+        @csrf_exempt
+        @wraps(get)
+        async def view(request, *args, **kwargs):
+            # The async views only render JSON, other formats go through DRF's negotiation.
+            if (
+                request.method != 'GET'
+                or getattr(view_class, 'pagination_class', None)
+                or 'application/msgpack' in request.headers.get('Accept', '')
+            ):
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+            try:
+                user = await authenticator.aauthenticate(request)
+                if user is None:
+                    raise exceptions.NotAuthenticated()
+
+                drf_request = Request(request)
+                drf_request.user = user
+
+                cache_key = None
+                if cache_prefix:
+                    cache_key = response_cache_key(
+                        cache_prefix, await aprefix_version(cache_prefix), user.id,
+                        request.get_full_path(),
+                    )
+                    cached_data = await async_cache.aget(cache_key)
+                    metrics.record_cache_lookup(cache_prefix, hit=bool(cached_data))
+                    if cached_data:
+                        return render_json(
+                            json.loads(cached_data['data']), cached_data['status']
+                        )
+
+                # Roles and position names are read from the reference data registry,
+                # loaded (when stale) off the event loop.
+                async with reference_data.pin():
+                    data, status = await get(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(request, exc)
+
+            if cache_key and status == 200:
+                await async_cache.aset(
+                    cache_key, {'data': json.dumps(data), 'status': status}, timeout
+                )
+            return render_json(data, status)
+
+        # Used by /api/batch/, which runs its sub-requests through the sync views.
+        view.sync_view = sync_view
+        return view
+
+    return decorator
+
+
+def filter_with(view_class, request, queryset):
+    """
+    Applies a sync view's filter backends (filterset, search and ordering fields)
+    to `queryset`. This only builds the query, nothing is executed.
+    """
+    view = view_class(request=request, args=(), kwargs={}, format_kwarg=None)
+    return view.filter_queryset(queryset)
+
+
+def tasks_for_serializer():
+    # Everything TaskSerializer reads, so serializing never falls back to lazy (sync) queries.
+    return Task.objects.select_related(
+        'assigned_to__user',
+        'assigned_by__user',
+    ).prefetch_related(
+        Prefetch('files', queryset=TaskFile.objects.select_related('uploaded_by'))
+    )
+
+
+async def get_employee(user, *related):
+    return await Employee.objects.filter(user=user).select_related(*related).afirst()
+
+
+# --- Views ---
+
+@async_read_view(views.EmployeeProfileAPIView.as_view(), cache_prefix='employee_profile')
+async def employee_profile(request):
+    employee = await Employee.objects.filter(user=request.user).select_related(
+        'user',
+    ).prefetch_related('department').afirst()
+
+    if not employee:
+        return {'detail': 'Employee profile is not found.'}, 404
+    return EmployeeDetailSerializer(employee, context={'request': request}).data, 200
+
+
+@async_read_view(views.TaskListCreateAPIView.as_view(), cache_prefix='task_list')
+async def employee_tasks(request):
+    user = request.user
+    queryset = tasks_for_serializer()
+
+    if not (user.is_superuser or user.is_staff):
+        employee = await get_employee(user)
+        if not employee:
+            return [], 200
+        queryset = queryset.filter(assigned_to=employee)
+
+    tasks = [task async for task in queryset]
+    return TaskSerializer(tasks, many=True, context={'request': request}).data, 200
+
+
+@async_read_view(views.ManagerTaskListCreateView.as_view(), cache_prefix='manager_tasks')
+async def manager_tasks(request):
+    employee = await get_employee(request.user)
+    if not employee:
+        return [], 200
+
+    queryset = filter_with(
+        views.ManagerTaskListCreateView,
+        request,
+        tasks_for_serializer().filter(assigned_by=employee),
+    )
+    tasks = [task async for task in queryset]
+    return TaskSerializer(tasks, many=True, context={'request': request}).data, 200
+
+
+@async_read_view(views.DepartmentEmployeeListView.as_view(), cache_prefix='department_employees')
+async def department_employees(request):
+    employee = await get_employee(request.user)
+
+    queryset = filter_with(
+        views.DepartmentEmployeeListView,
+        request,
+        get_department_employees(employee).select_related('user'),
+    )
+    employees = [member async for member in queryset]
+    return EmployeeGetSerializer(employees, many=True, context={'request': request}).data, 200
+
+
+@async_read_view(views.my_dashboard_redirect)
+async def my_dashboard_redirect(request):
+    employee = await get_employee(request.user)
+    if is_manager_or_officer(employee):
+        return {'redirect_to': '/manager-dashboard/'}, 200
+    return {'redirect_to': '/dashboard/'}, 200
@@ -0,0 +1,209 @@
+import csv
+import json
+
+from django.db.models import Count, Prefetch, Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from api.filters import EmployeeFilter
+from api.models import Department, Employee, Task
+from api.services.employee import get_department_employees
+
+# Streaming exports of the employee directory and the task history.
+#
+# Rows are read with .iterator(chunk_size=...), which uses server-side cursors on
+# PostgreSQL, and are encoded one at a time. Memory stays constant no matter how many
+# rows are exported, and the first bytes reach the client right away.
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EMPLOYEE_EXPORT_COLUMNS = (
+    'id',
+    'employee_code',
+    'first_name',
+    'last_name',
+    'email',
+    'username',
+    'job_role',
+    'employee_type',
+    'departments',
+    'hire_date',
+    'salary',
+)
+
+TASK_EXPORT_COLUMNS = (
+    'id',
+    'title',
+    'description',
+    'assigned_to',
+    'assigned_to_name',
+    'assigned_by',
+    'assigned_by_name',
+    'due_date',
+    'completed',
+    'created_at',
+    'file_count',
+)
+
+
+# --- Querysets ---
+
+def employee_export_queryset(queryset=None, filters=None):
+    """
+    Employees with everything the export needs joined or prefetched.
+    `filters` is a QueryDict/dict of EmployeeFilter lookups (e.g. salary__gt=1000),
+    an invalid one raises ValidationError instead of exporting everyone.
+    """
+    if queryset is None:
+        queryset = Employee.objects.all()
+
+    queryset = queryset.select_related(
+        'user',
+        'position__job_role',
+        'position__employee_type',
+    ).prefetch_related(
+        Prefetch('department', queryset=Department.objects.only('id', 'name'))
+    ).order_by('employee_code')
+
+    if filters:
+        filterset = EmployeeFilter(filters, queryset=queryset)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        queryset = filterset.qs
+    return queryset
+
+
+def task_export_queryset(queryset=None):
+    if queryset is None:
+        queryset = Task.objects.all()
+
+    return queryset.select_related(
+        'assigned_to__user',
+        'assigned_by__user',
+    ).annotate(
+        file_count=Count('files')
+    ).order_by('id')
+
+
+# Same visibility as the list views:
+# staff see everyone, managers/officers see their departments (like
+# department-employees/), regular employees see nobody.
+def employees_visible_to(user, employee):
+    if user.is_superuser or user.is_staff:
+        return Employee.objects.all()
+    return get_department_employees(employee)
+
+
+# Staff see every task, everybody else sees the tasks assigned to them or by them.
+def tasks_visible_to(user, employee):
+    if user.is_superuser or user.is_staff:
+        return Task.objects.all()
+    if not employee:
+        return Task.objects.none()
+    return Task.objects.filter(Q(assigned_to=employee) | Q(assigned_by=employee))
+
+
+# --- Rows ---
+
+def employee_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    for employee in queryset.iterator(chunk_size=chunk_size):
+        position = employee.position
+        yield {
+            'id': employee.id,
+            'employee_code': employee.formatted_employee_code,
+            'first_name': employee.first_name,
+            'last_name': employee.last_name,
+            'email': employee.email,
+            'username': employee.user.username if employee.user else None,
+            'job_role': position.job_role.name if position else None,
+            'employee_type': position.employee_type.name if position else None,
+            'departments': sorted(dept.name for dept in employee.department.all()),
+            'hire_date': employee.hire_date,
+            'salary': employee.salary,
+        }
+
+
+def task_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    for task in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description,
+            'assigned_to': task.assigned_to_id,
+            'assigned_to_name': _username(task.assigned_to),
+            'assigned_by': task.assigned_by_id,
+            'assigned_by_name': _username(task.assigned_by),
+            'due_date': task.due_date,
+            'completed': task.completed,
+            'created_at': task.created_at,
+            'file_count': task.file_count,
+        }
+
+
+def _username(employee):
+    if employee is None or employee.user is None:
+        return None
+    return employee.user.username
+
+
+# --- Encoding ---
+
+def _to_text(value):
+    # Dates as ISO 8601, decimals as strings (like the API's DecimalField output).
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (bool, int, float, str, list)):
+        return value
+    return str(value)
+
+
+# csv.writer needs a file-like object, this one just hands back each encoded line.
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def encode_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        values = []
+        for column in columns:
+            value = _to_text(row[column])
+            if isinstance(value, list):
+                value = ';'.join(value)
+            values.append('' if value is None else value)
+        yield writer.writerow(values)
+
+
+def encode_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps({column: _to_text(row[column]) for column in columns}) + '\n'
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+}
+
+
+def stream_export(export_format, columns, rows):
+    return ENCODERS[export_format](columns, rows)
+
+
+def streaming_export_response(export_format, columns, rows, filename):
+    response = StreamingHttpResponse(
+        stream_export(export_format, columns, rows),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
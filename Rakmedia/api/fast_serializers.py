@@ -0,0 +1,173 @@
+from operator import itemgetter
+
+from rest_framework import serializers
+
+from .models import TaskFile
+from .serializers import (EmployeeGetSerializer, TaskFileSerializer,
+                          TaskSerializer)
+from .utils import server_timing
+from .utils.sparse_fields import requested_fields
+
+# Read-only list serialization from .values() rows, for the long list endpoints.
+#
+# ModelSerializer builds a model instance per row and runs every field through the
+# serializer machinery, which is most of the CPU time of a long list. These produce
+# the same JSON (same keys, order and formats, checked against the serializers in
+# api/tests/test_fast_serializers.py) straight from the selected columns.
+# List views opt in with `values_serializer_class`, while FAST_LIST_SERIALIZERS is on.
+
+# Single values are formatted by (shared) DRF fields, so the output is identical.
+date_field = serializers.DateField()
+datetime_field = serializers.DateTimeField()
+
+# DRF leaves a field out when its source goes through a null relation.
+SKIP = object()
+
+
+def column(path, formatter=None):
+    """A field read from one column, optionally formatted."""
+    if formatter is None:
+        return (path,), itemgetter(path)
+    return (path,), lambda row: formatter(row[path])
+
+
+def method(*paths):
+    """A field computed by the serializer's get_<field>(row) from `paths`."""
+    return paths, None
+
+
+def related(value):
+    # A column of a nullable relation (whose own value is never null).
+    return SKIP if value is None else value
+
+
+def date(value):
+    return None if value is None else date_field.to_representation(value)
+
+
+def datetime(value):
+    return None if value is None else datetime_field.to_representation(value)
+
+
+def formatted_employee_code(code):
+    # Same as Employee.formatted_employee_code.
+    return f'EMP-{code:03d}' if code is not None else 'N/A'
+
+
+class ValuesSerializer:
+    """
+    Serializes a queryset like `serializer_class(queryset, many=True)` would,
+    honouring ?fields= / ?omit=. `fields` holds a column() or method() per field.
+    """
+    serializer_class = None
+    fields = {}
+
+    def __init__(self, request=None, names=None):
+        self.request = request
+        self.names = names or requested_fields(
+            request, self.serializer_class.Meta.fields
+        )
+
+    def project(self, queryset, *extra):
+        """The queryset as dicts of the columns the kept fields read (and `extra`)."""
+        paths = {path for name in self.names for path in self.fields[name][0]}
+        return queryset.prefetch_related(None).values('pk', *paths, *extra)
+
+    def prepare(self, rows):
+        """Loads what the rows need from other tables, before to_representation()."""
+
+    @server_timing.timed('serialize')
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        getters = [
+            (name, self.fields[name][1] or getattr(self, f'get_{name}'))
+            for name in self.names
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, getter in getters:
+                value = getter(row)
+                if value is not SKIP:
+                    item[name] = value
+            data.append(item)
+        return data
+
+    def serialize(self, queryset):
+        return self.to_representation(self.project(queryset))
+
+
+class EmployeeListValuesSerializer(ValuesSerializer):
+    serializer_class = EmployeeGetSerializer
+    fields = {
+        'id': column('id'),
+        'employee_code': column('employee_code', formatted_employee_code),
+        'username': column('user__username', related),
+        'first_name': column('first_name'),
+        'last_name': column('last_name'),
+    }
+
+
+class TaskFileValuesSerializer(ValuesSerializer):
+    serializer_class = TaskFileSerializer
+    fields = {
+        'id': column('id'),
+        'file': method('file'),
+        'original_name': column('original_name'),
+        'description': column('description'),
+        'uploaded_at': column('uploaded_at', datetime),
+        'uploaded_by_name': method(
+            'uploaded_by', 'uploaded_by__first_name', 'uploaded_by__last_name'
+        ),
+    }
+
+    storage = TaskFile._meta.get_field('file').storage
+
+    def get_file(self, row):
+        # DRF's FileField: None without a file, else the (absolute) URL.
+        if not row['file']:
+            return None
+        url = self.storage.url(row['file'])
+        return self.request.build_absolute_uri(url) if self.request else url
+
+    def get_uploaded_by_name(self, row):
+        if row['uploaded_by'] is None:
+            return 'Unknown'
+        return f"{row['uploaded_by__first_name']} {row['uploaded_by__last_name']}"
+
+
+class TaskValuesSerializer(ValuesSerializer):
+    serializer_class = TaskSerializer
+    fields = {
+        'id': column('id'),
+        'title': column('title'),
+        'description': column('description'),
+        'files': method(),
+        'assigned_to': column('assigned_to'),
+        'assigned_to_name': column('assigned_to__user__username', related),
+        'assigned_by': column('assigned_by'),
+        'assigned_by_name': column('assigned_by__user__username', related),
+        'due_date': column('due_date', date),
+        'completed': column('completed'),
+        'created_at': column('created_at', datetime),
+    }
+
+    def prepare(self, rows):
+        self.files_by_task = {}
+        if 'files' not in self.names:
+            return
+        # Every file of the page in one query. Nested files keep all their fields.
+        files = TaskFileValuesSerializer(
+            self.request, names=TaskFileSerializer.Meta.fields
+        )
+        file_rows = list(files.project(
+            TaskFile.objects.filter(task__in=[row['pk'] for row in rows]), 'task'
+        ).order_by('pk'))
+        for row, item in zip(
+            file_rows, files.to_representation(file_rows), strict=True
+        ):
+            self.files_by_task.setdefault(row['task'], []).append(item)
+
+    def get_files(self, row):
+        return self.files_by_task.get(row['pk'], [])
@@ -19,6 +19,24 @@ class EmployeeFilter(django_filters.FilterSet):
 
 
 
+# Selects the employees of a bulk update (PATCH /api/employees/bulk/).
+# Ex: {"department": "Tech"} or {"job_role": "driver", "salary__lt": 3000}
+class EmployeeBulkFilter(EmployeeFilter):
+    id = django_filters.BaseInFilter(field_name='id')
+    department = django_filters.CharFilter(
+        field_name='department__name', lookup_expr='iexact'
+    )
+    department_id = django_filters.NumberFilter(field_name='department')
+    position = django_filters.NumberFilter(field_name='position')
+    job_role = django_filters.CharFilter(
+        field_name='position__job_role__name', lookup_expr='iexact'
+    )
+    employee_type = django_filters.CharFilter(
+        field_name='position__employee_type__name', lookup_expr='iexact'
+    )
+
+
+
 # filter for tasks.
 #class TaskFilter(django_filters.FilterSet):
     #class Meta:
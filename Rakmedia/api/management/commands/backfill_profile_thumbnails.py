@@ -0,0 +1,64 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.models import Employee
+from api.services.thumbnails import (render_renditions, renditions_are_current,
+                                     save_renditions)
+
+
+# Worker processes only decode and resize images (CPU-bound), the main process does every database write.
+def _init_worker():
+    django.setup()
+
+
+# Generates the profile picture renditions for employees that don't have up to date ones yet.
+# Ex: python manage.py backfill_profile_thumbnails --workers 8
+class Command(BaseCommand):
+    help = "Generate missing profile picture renditions using a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes, 0 renders in this process.')
+        parser.add_argument('--force', action='store_true', help='Regenerate renditions that are already up to date.')
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True).only(
+            'id', 'profile_picture', 'profile_picture_renditions'
+        )
+        pending = [
+            (employee.id, employee.profile_picture.name)
+            for employee in employees.iterator()
+            if options['force'] or not renditions_are_current(employee)
+        ]
+
+        started = time.perf_counter()
+        done = failed = 0
+
+        if options['workers'] == 0:
+            for employee_id, source in pending:
+                try:
+                    done += save_renditions(employee_id, render_renditions(source))
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'Employee {employee_id}: {exc}')
+        else:
+            # Forked workers must not share the parent's database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = {pool.submit(render_renditions, source): employee_id for employee_id, source in pending}
+                for future in as_completed(futures):
+                    employee_id = futures[future]
+                    try:
+                        done += save_renditions(employee_id, future.result())
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f'Employee {employee_id}: {exc}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated renditions for {done} of {len(pending)} employee(s) in {elapsed:.1f}s ({failed} failed).'
+        ))
@@ -0,0 +1,65 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.test.utils import override_settings
+
+from api.models import Company, Employee
+
+ONBOARDING_MODES = ('password', 'reset_link')
+
+
+# Measures how long it takes to create employees (and their user accounts) for each onboarding mode.
+# Everything runs inside a transaction that is rolled back, so the database is left untouched.
+class Command(BaseCommand):
+    help = "Benchmark employee creation for each onboarding mode (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=50, help='Number of employees to create per mode.')
+        parser.add_argument(
+            '--mode',
+            choices=ONBOARDING_MODES,
+            action='append',
+            help='Onboarding mode to measure (can be repeated). Defaults to all modes.',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        modes = options['mode'] or ONBOARDING_MODES
+
+        company = Company.objects.first()
+        if company is None:
+            raise CommandError("Company does not exist")
+
+        first_code = (Employee.objects.aggregate(Max('employee_code'))['employee_code__max'] or 0) + 1
+
+        results = {}
+        for mode in modes:
+            with override_settings(EMPLOYEE_ONBOARDING_MODE=mode), transaction.atomic():
+                savepoint = transaction.savepoint()
+                start = perf_counter()
+
+                for i in range(count):
+                    Employee.objects.create(
+                        first_name='Bench',
+                        last_name=f'Employee{i}',
+                        email=f'bench.employee{i}@example.com',
+                        company=company,
+                        employee_code=first_code + i,
+                    )
+
+                results[mode] = perf_counter() - start
+                transaction.savepoint_rollback(savepoint)
+
+        for mode, elapsed in results.items():
+            self.stdout.write(
+                f'{mode:<12} {count} employees in {elapsed:.3f}s '
+                f'({elapsed / count * 1000:.1f} ms/employee)'
+            )
+
+        if len(results) == len(ONBOARDING_MODES):
+            saved = results['password'] - results['reset_link']
+            self.stdout.write(self.style.SUCCESS(
+                f'reset_link onboarding saved {saved:.3f}s ({saved / count * 1000:.1f} ms/employee).'
+            ))
@@ -0,0 +1,118 @@
+import datetime
+import decimal
+import io
+from functools import partial
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+
+BACKENDS = {
+    'json': (JSONRenderer, JSONParser),
+    'orjson': (ORJSONRenderer, ORJSONParser),
+}
+
+
+# Compares rendering and parsing times of the JSON backends (API_JSON_BACKEND) on large
+# task and employee list payloads, shaped like the API responses. No database access. Ex:
+#   python manage.py benchmark_json --rows 1000 --repeat 50
+class Command(BaseCommand):
+    help = "Benchmark the stdlib and orjson JSON renderers and parsers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per payload.')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs per measurement (best one is kept).')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        payloads = {'tasks': self.tasks(rows), 'employees': self.employees(rows)}
+
+        for name, data in payloads.items():
+            results = {}
+            for backend, (renderer_class, parser_class) in BACKENDS.items():
+                renderer, parser = renderer_class(), parser_class()
+                body = renderer.render(data)
+                results[backend] = (
+                    self.measure(partial(renderer.render, data), repeat),
+                    self.measure(partial(self.parse, parser, body), repeat),
+                    len(body),
+                )
+
+            for backend, (render, parse, size) in results.items():
+                self.stdout.write(
+                    f'{name:<10} {backend:<7} {rows} rows ({size / 1024:.0f} KiB): '
+                    f'render {render * 1000:.2f} ms, parse {parse * 1000:.2f} ms'
+                )
+            json_render, json_parse, _ = results['json']
+            orjson_render, orjson_parse, _ = results['orjson']
+            self.stdout.write(self.style.SUCCESS(
+                f'{name:<10} orjson renders {json_render / orjson_render:.1f}x and parses '
+                f'{json_parse / orjson_parse:.1f}x faster.'
+            ))
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body))
+
+    def measure(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            run()
+            timings.append(perf_counter() - start)
+        return min(timings)
+
+    def tasks(self, rows):
+        # Like the task list: serializer output (strings for dates) with nested files.
+        created = datetime.datetime(2025, 1, 1, 9, 30, tzinfo=datetime.UTC)
+        return {
+            'count': rows,
+            'next': None,
+            'previous': None,
+            'results': [
+                {
+                    'id': i,
+                    'title': f'Task {i}',
+                    'description': 'Prepare the quarterly report and send it to the team.',
+                    'files': [{
+                        'id': i,
+                        'file': f'http://testserver/media/task_files/{i}.pdf',
+                        'original_name': 'report.pdf',
+                        'description': None,
+                        'uploaded_at': '2025-01-01T09:30:00Z',
+                        'uploaded_by_name': 'Manager User',
+                    }],
+                    'assigned_to': i,
+                    'assigned_to_name': f'employee{i}',
+                    'assigned_by': 1,
+                    'assigned_by_name': 'manager',
+                    'due_date': '2025-02-01',
+                    'completed': i % 2 == 0,
+                    'created_at': created + datetime.timedelta(minutes=i),
+                }
+                for i in range(rows)
+            ],
+        }
+
+    def employees(self, rows):
+        # Like the employee details, with raw Decimal salaries and dates (left to the encoder).
+        return [
+            {
+                'id': i,
+                'employee_code': f'EMP-{i:03d}',
+                'username': f'employee{i}',
+                'first_name': 'Employee',
+                'last_name': f'Number {i}',
+                'user_email': f'employee{i}@example.com',
+                'job_role': 'Developer',
+                'employee_type': 'white collar',
+                'hire_date': datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+                'salary': decimal.Decimal('1234.50') + i,
+                'department': ['Engineering', 'Design'],
+                'role': 'employee',
+            }
+            for i in range(rows)
+        ]
@@ -0,0 +1,99 @@
+from functools import partial
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api.fast_serializers import (EmployeeListValuesSerializer,
+                                  TaskValuesSerializer)
+from api.models import Company, Employee, Task, TaskFile
+from api.serializers import EmployeeGetSerializer, TaskSerializer
+from api.utils.sparse_fields import sparse_queryset
+
+User = get_user_model()
+
+
+# Compares the DRF serializers with the .values() ones (api/fast_serializers.py) on list responses
+# of --rows employees and tasks (each task with one file), queries included.
+# The rows are created inside a transaction that is rolled back, so the database is left untouched. Ex:
+#   python manage.py benchmark_list_serializers --rows 1000 --repeat 20
+class Command(BaseCommand):
+    help = "Benchmark the DRF and values() list serializers (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per response.')
+        parser.add_argument('--repeat', type=int, default=20, help='Responses serialized per serializer.')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        request = Request(RequestFactory().get('/api/tasks/'))
+
+        with transaction.atomic():
+            savepoint = transaction.savepoint()
+            employees, tasks = self.create_rows(rows)
+
+            cases = [
+                ('employees', employees, EmployeeGetSerializer, EmployeeListValuesSerializer),
+                ('tasks', tasks, TaskSerializer, TaskValuesSerializer),
+            ]
+            for name, queryset, serializer_class, values_serializer_class in cases:
+                drf = partial(self.serialize, serializer_class, queryset, request)
+                values = partial(values_serializer_class(request).serialize, queryset)
+
+                assert len(drf()) == len(values()) == rows
+                drf_time = self.measure(drf, repeat)
+                values_time = self.measure(values, repeat)
+                self.stdout.write(
+                    f'{name:<10} {rows} rows: serializer {drf_time * 1000:.1f} ms, '
+                    f'values() {values_time * 1000:.1f} ms ({drf_time / values_time:.1f}x faster)'
+                )
+
+            transaction.savepoint_rollback(savepoint)
+
+    def serialize(self, serializer_class, queryset, request):
+        # What the list views do: the sparse queryset (every field here) and the serializer.
+        queryset = sparse_queryset(queryset, serializer_class, request)
+        return serializer_class(queryset, many=True, context={'request': request}).data
+
+    def measure(self, serialize, repeat):
+        # Best of `repeat`, per response.
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            serialize()
+            timings.append(perf_counter() - start)
+        return min(timings)
+
+    def create_rows(self, count):
+        # bulk_create skips the signals (counters, summaries, welcome emails...), only the rows are needed.
+        company = Company.objects.create(name='Benchmark')
+        first_code = (Employee.objects.aggregate(Max('employee_code'))['employee_code__max'] or 0) + 1
+        users = User.objects.bulk_create(
+            User(username=f'benchmark{i}', password='!') for i in range(count)
+        )
+        employees = Employee.objects.bulk_create(
+            Employee(
+                user=user,
+                first_name='Bench',
+                last_name=f'Employee{i}',
+                company=company,
+                employee_code=first_code + i,
+            )
+            for i, user in enumerate(users)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(title=f'Task {i}', assigned_to=employee, assigned_by=employees[0])
+            for i, employee in enumerate(employees)
+        )
+        TaskFile.objects.bulk_create(
+            TaskFile(task=task, uploaded_by=employees[0], file=f'task_files/{task.pk}.txt', original_name='file.txt')
+            for task in tasks
+        )
+        return (
+            Employee.objects.filter(company=company).order_by('employee_code'),
+            Task.objects.filter(assigned_to__company=company).order_by('pk'),
+        )
@@ -0,0 +1,86 @@
+import statistics
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.models import Company, Employee, Task
+
+User = get_user_model()
+
+URL = '/api/tasks/'
+
+
+# Measures the size and latency of GET /api/tasks/ for each format and encoding available
+# (JSON, MessagePack with API_MSGPACK, gzip, brotli with the `brotli` package), both on a cache
+# miss and on a cache hit. Requests go through the whole middleware stack in-process, so the
+# latency leaves out the network: the transfer time at --bandwidth is estimated from the size.
+# The tasks are created inside a transaction that is rolled back. Ex:
+#   python manage.py benchmark_task_payloads --tasks 1000 --bandwidth 20
+class Command(BaseCommand):
+    help = "Measure /api/tasks/ payload size and latency per format and encoding (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='Tasks assigned to the benchmark employee.')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per measurement (median is kept).')
+        parser.add_argument('--bandwidth', type=float, default=20, help='Mbit/s used to estimate transfer times.')
+
+    def handle(self, *args, **options):
+        variants = {'json': {}, 'json + gzip': {'HTTP_ACCEPT_ENCODING': 'gzip'}}
+        try:
+            import brotli  # noqa: F401
+            variants['json + br'] = {'HTTP_ACCEPT_ENCODING': 'br'}
+        except ImportError:
+            self.stdout.write('brotli is not installed, skipping br.')
+        if 'api.renderers.MessagePackRenderer' in settings.API_RENDERER_CLASSES:
+            variants['msgpack'] = {'HTTP_ACCEPT': 'application/msgpack'}
+            variants['msgpack + gzip'] = {'HTTP_ACCEPT': 'application/msgpack', 'HTTP_ACCEPT_ENCODING': 'gzip'}
+        else:
+            self.stdout.write('API_MSGPACK is off, skipping msgpack.')
+
+        with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+            savepoint = transaction.savepoint()
+            client = APIClient()
+            client.force_authenticate(self.create_tasks(options['tasks']))
+
+            for name, headers in variants.items():
+                size, miss = self.measure(client, headers, options['repeat'], cold=True)
+                _, hit = self.measure(client, headers, options['repeat'], cold=False)
+                transfer = size * 8 / (options['bandwidth'] * 1_000_000)
+                self.stdout.write(
+                    f'{name:<15} {size / 1024:>8.1f} KiB  miss {miss * 1000:7.1f} ms  hit {hit * 1000:7.1f} ms  '
+                    f'+ ~{transfer * 1000:.1f} ms transfer at {options["bandwidth"]:g} Mbit/s'
+                )
+
+            transaction.savepoint_rollback(savepoint)
+
+    def measure(self, client, headers, repeat, cold):
+        timings = []
+        for _ in range(repeat):
+            if cold:
+                cache.clear()
+            start = perf_counter()
+            response = client.get(URL, **headers)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            timings.append(perf_counter() - start)
+        return len(content), statistics.median(timings)
+
+    def create_tasks(self, count):
+        company = Company.objects.create(name='Benchmark')
+        user = User.objects.create(username='benchmark-payloads', password='!')
+        first_code = (Employee.objects.aggregate(Max('employee_code'))['employee_code__max'] or 0) + 1
+        employee = Employee.objects.create(
+            user=user, first_name='Bench', last_name='Employee', company=company, employee_code=first_code,
+        )
+        Task.objects.bulk_create(
+            Task(title=f'Task {i}', description='Prepare the quarterly report and send it to the team.',
+                 assigned_to=employee, assigned_by=employee)
+            for i in range(count)
+        )
+        return user
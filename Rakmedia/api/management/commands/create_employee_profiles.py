@@ -32,8 +32,7 @@ class Command(BaseCommand):
                         user=user,
                         first_name=user.first_name or '',
                         last_name=user.last_name or '', 
-                        email = user.email or '',
-                        employee_code=100 + user.id,
+                        email = user.email or None,
                         salary=0,
                         company = default_company
                     )
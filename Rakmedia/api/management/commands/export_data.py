@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from api import exports
+
+
+# Exports employees or tasks as CSV/NDJSON with constant memory, the same format as the /api/exports/ endpoints.
+# Ex: python manage.py export_data employees --format csv --filter salary__gt=2000 --output employees.csv
+class Command(BaseCommand):
+    help = "Stream the employee directory or the task history to a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['employees', 'tasks'])
+        parser.add_argument('--format', choices=sorted(exports.EXPORT_FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--output', help='File to write to. Defaults to stdout.')
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='LOOKUP=VALUE',
+            help='EmployeeFilter lookup applied to the employee export (can be repeated).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=exports.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        filters = {}
+        for item in options['filter']:
+            lookup, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Invalid filter "{item}", expected LOOKUP=VALUE')
+            filters[lookup] = value
+
+        if options['dataset'] == 'employees':
+            columns = exports.EMPLOYEE_EXPORT_COLUMNS
+            try:
+                queryset = exports.employee_export_queryset(filters=filters)
+            except ValidationError as exc:
+                raise CommandError(f'Invalid filter: {exc.detail}') from exc
+            rows = exports.employee_rows(queryset, options['chunk_size'])
+        else:
+            if filters:
+                raise CommandError('Filters are only supported for the employee export')
+            columns = exports.TASK_EXPORT_COLUMNS
+            rows = exports.task_rows(exports.task_export_queryset(), options['chunk_size'])
+
+        lines = exports.stream_export(options['export_format'], columns, rows)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                count = sum(output.write(line) > 0 for line in lines)
+        else:
+            count = 0
+            for line in lines:
+                self.stdout.write(line, ending='')
+                count += 1
+
+        if options['export_format'] == 'csv':
+            count -= 1  # header row
+        # Written to stderr so it doesn't end up in the exported data when writing to stdout.
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} {options['dataset']}."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Employee, EmployeeType, JobRole, RoleTypeRule
+from api.services.role_types import (DEFAULT_RULES, invalid_employees,
+                                     invalidate_on_commit)
+
+
+# Loads the default role/type rules (api/services/role_types.DEFAULT_RULES) into RoleTypeRule,
+# matching the job role and employee type names case-insensitively. Rules already there are kept,
+# roles or types missing from the database are skipped. Safe to run again.
+# Then reports the employees whose position the rules don't allow, checked in one pass.
+# Ex: python manage.py load_role_type_rules
+class Command(BaseCommand):
+    help = "Load the default job role / employee type compatibility rules."
+
+    def handle(self, *args, **options):
+        roles = {name.lower(): pk for pk, name in JobRole.objects.values_list('pk', 'name')}
+        types = {name.lower(): pk for pk, name in EmployeeType.objects.values_list('pk', 'name')}
+
+        rules = [
+            RoleTypeRule(job_role_id=roles[role], employee_type_id=types[type_name])
+            for role, type_names in DEFAULT_RULES.items() if role in roles
+            for type_name in type_names if type_name in types
+        ]
+        with transaction.atomic():
+            existing = set(RoleTypeRule.objects.values_list('job_role_id', 'employee_type_id'))
+            new = [rule for rule in rules if (rule.job_role_id, rule.employee_type_id) not in existing]
+            RoleTypeRule.objects.bulk_create(new)
+            if new:
+                # bulk_create() sends no post_save.
+                invalidate_on_commit()
+
+        self.stdout.write(self.style.SUCCESS(f'Added {len(new)} rule(s), {len(existing)} already there.'))
+
+        failures = invalid_employees(Employee.objects.only('pk', 'first_name', 'last_name', 'position'))
+        for employee, message in failures:
+            self.stdout.write(self.style.WARNING(f'{employee} (id {employee.pk}): {message}'))
@@ -0,0 +1,148 @@
+import asyncio
+import statistics
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Sends GET requests to a running server from many concurrent keep-alive connections
+# and reports throughput and latency percentiles.
+#
+# Used to compare the sync (WSGI) and async (ASGI + ASYNC_READ_VIEWS) deployments of the read endpoints, Ex:
+#   gunicorn Rakmedia.wsgi -w 4
+#   gunicorn Rakmedia.asgi -k uvicorn.workers.UvicornWorker -w 4   (with ASYNC_READ_VIEWS=True)
+#   python manage.py loadtest --url http://127.0.0.1:8000/api/tasks/ --token <access token> --concurrency 500
+# The client only uses asyncio streams (plain HTTP/1.1), so nothing extra has to be installed.
+#
+# GET /api/tasks/ (20 tasks, cached), 500 connections for 30s, 2 workers each, SQLite, local memory cache,
+# DEBUG and Silk off, server and client sharing 1 CPU (two runs each):
+#   WSGI (gunicorn sync)     225.4 / 171.6 req/s   p50 2233 / 2969 ms   p95 2605 / 3396 ms   p99 2770 / 3425 ms
+#   ASGI (uvicorn workers)   136.1 / 141.6 req/s   p50 3414 / 3306 ms   p95 8124 / 4953 ms   p99 8363 / 5106 ms
+# On one CPU every request is CPU bound and the async views only add the sync_to_async hops, so WSGI wins:
+# ASGI pays off when requests wait on Redis or PostgreSQL and the workers have cores to spare.
+# Rerun on the production hardware before switching.
+class Command(BaseCommand):
+    help = "Load test an endpoint with concurrent keep-alive connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', required=True, help='Ex: http://127.0.0.1:8000/api/tasks/')
+        parser.add_argument('--token', help='JWT access token sent as "Authorization: Bearer <token>".')
+        parser.add_argument('--concurrency', type=int, default=500, help='Number of open connections.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run for.')
+        parser.add_argument('--timeout', type=float, default=30, help='Per request timeout in seconds.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Only http:// URLs are supported.")
+
+        headers = [
+            f"Host: {url.netloc}",
+            "Connection: keep-alive",
+            "Accept: application/json",
+        ]
+        if options['token']:
+            headers.append(f"Authorization: Bearer {options['token']}")
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        request = "\r\n".join([f"GET {path} HTTP/1.1", *headers, "", ""]).encode()
+
+        latencies, statuses, errors, elapsed = asyncio.run(self.run(
+            url.hostname, url.port or 80, request, options['concurrency'], options['duration'], options['timeout'],
+        ))
+        self.report(latencies, statuses, errors, elapsed, options['concurrency'])
+
+    async def run(self, host, port, request, concurrency, duration, timeout):
+        latencies = []
+        statuses = {}
+        errors = {}
+        deadline = perf_counter() + duration
+
+        async def worker():
+            reader = writer = None
+            while perf_counter() < deadline:
+                start = perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    writer.write(request)
+                    status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+                except (TimeoutError, OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                    name = type(exc).__name__
+                    errors[name] = errors.get(name, 0) + 1
+                    writer = close(writer)
+                    continue
+
+                latencies.append(perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                if not keep_alive:
+                    writer = close(writer)
+            close(writer)
+
+        start = perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, statuses, errors, perf_counter() - start
+
+    def report(self, latencies, statuses, errors, elapsed, concurrency):
+        total = len(latencies)
+        self.stdout.write(f"{total} responses from {concurrency} connections in {elapsed:.1f}s")
+        self.stdout.write(f"  Requests/s: {total / elapsed:.1f}" if elapsed else "  Requests/s: -")
+        self.stdout.write("  Status codes: " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items())))
+        if errors:
+            self.stdout.write(self.style.WARNING(
+                "  Errors: " + ", ".join(f"{name}: {n}" for name, n in sorted(errors.items()))
+            ))
+        if total < 2:
+            return
+
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(self.style.SUCCESS(
+            f"  Latency (ms): mean {statistics.fmean(latencies) * 1000:.1f}, "
+            f"p50 {percentiles[49] * 1000:.1f}, p95 {percentiles[94] * 1000:.1f}, "
+            f"p99 {percentiles[98] * 1000:.1f}, max {max(latencies) * 1000:.1f}"
+        ))
+
+
+async def read_response(reader):
+    """Reads one HTTP/1.1 response, returns (status code, keep-alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise asyncio.IncompleteReadError(b'', None)
+    status = int(status_line.split()[1])
+
+    length = None
+    chunked = False
+    keep_alive = True
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+
+    if chunked:
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
+
+
+def close(writer):
+    if writer is not None:
+        writer.close()
+    return None
@@ -0,0 +1,65 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+
+from api.models import StoredBlob, TaskFile
+from api.services.blobs import hash_file, store_blob
+
+
+# Moves task files uploaded before deduplication into the content-addressed blob store.
+# Each file is hashed; duplicates are pointed at the existing blob and their copy is deleted.
+# Safe to run again: only files without a blob are processed.
+# Ex: python manage.py migrate_task_file_blobs --dry-run
+class Command(BaseCommand):
+    help = "Deduplicate existing task files into the blob store and report the space reclaimed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be reclaimed.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        legacy = TaskFile.objects.filter(blob__isnull=True).exclude(file='').only('id', 'file', 'original_name').order_by('id')
+
+        migrated = duplicates = missing = reclaimed = 0
+        seen = set()
+
+        for task_file in legacy.iterator(chunk_size=options['chunk_size']):
+            old_name = task_file.file.name
+            if not default_storage.exists(old_name):
+                missing += 1
+                continue
+
+            with default_storage.open(old_name, 'rb') as content:
+                sha256 = hash_file(content)
+                size = content.size
+
+                if dry_run:
+                    if sha256 in seen or StoredBlob.objects.filter(sha256=sha256).exists():
+                        duplicates += 1
+                        reclaimed += size
+                    seen.add(sha256)
+                    migrated += 1
+                    continue
+
+                with transaction.atomic():
+                    blob, created = store_blob(content, sha256=sha256)
+                    task_file.blob = blob
+                    task_file.file = blob.file.name
+                    task_file.original_name = task_file.original_name or os.path.basename(old_name)
+                    task_file.save(update_fields=['blob', 'file', 'original_name'])
+                    transaction.on_commit(lambda name=old_name: default_storage.delete(name))
+
+            migrated += 1
+            if not created:
+                duplicates += 1
+                reclaimed += size
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{migrated} file(s) migrated, {duplicates} duplicate(s), '
+            f'{missing} missing from storage, {filesizeformat(reclaimed)} reclaimed.'
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.summaries import rebuild_summaries
+
+
+# Rebuilds every EmployeeSummary row (headcount and payroll per company for each department,
+# employee type and job role) with one grouped query per dimension.
+# The rows are normally kept up to date by the Employee signals, run this after the migration
+# that adds the table, and after bulk changes that skip signals (queryset.update(), raw SQL...).
+# Ex: python manage.py rebuild_employee_summaries
+class Command(BaseCommand):
+    help = "Rebuild the department, employee type and job role headcount/payroll summaries."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} summary row(s) in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.task_stats import reconcile
+
+
+# Recomputes every EmployeeTaskStats row from the tasks and files tables (two grouped queries),
+# prints the rows that drifted from the incrementally maintained counters and fixes them.
+# Also creates the missing rows (the migration that adds the table fills it for the existing employees).
+# Drift usually means tasks were changed with queryset.update()/bulk operations, which skip signals.
+# Ex: python manage.py reconcile_task_stats --dry-run
+class Command(BaseCommand):
+    help = "Recompute the per-employee task counters and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, change nothing.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        drift = reconcile(dry_run=options['dry_run'])
+
+        for employee_id, fields in drift:
+            changes = ', '.join(
+                f'{name} {stored} -> {actual}' for name, (stored, actual) in sorted(fields.items())
+            )
+            self.stdout.write(f'  Employee {employee_id}: {changes}')
+
+        elapsed = time.perf_counter() - started
+        prefix = '[dry run] found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {len(drift)} drifted employee counter row(s) in {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,41 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django_q.models import Schedule
+
+
+def next_midnight():
+    tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+    return timezone.make_aware(datetime.datetime.combine(tomorrow, datetime.time(0, 1)))
+
+
+# Recurring django-q jobs. Keyed by name, so running the command again updates them instead of adding duplicates.
+SCHEDULES = [
+    {
+        'name': 'sweep-stale-uploads',
+        'func': 'api.tasks.sweep_stale_uploads',
+        'schedule_type': Schedule.HOURLY,
+    },
+    {
+        'name': 'refresh-overdue-task-counts',
+        'func': 'api.tasks.refresh_overdue_task_counts',
+        'schedule_type': Schedule.DAILY,
+        # Right after midnight, when yesterday's due dates turn overdue.
+        'next_run': next_midnight,
+    },
+]
+
+
+# Ex: python manage.py register_schedules (run once per deploy, after migrate)
+class Command(BaseCommand):
+    help = "Create or update the recurring django-q schedules."
+
+    def handle(self, *args, **options):
+        for definition in SCHEDULES:
+            definition = dict(definition)
+            name = definition.pop('name')
+            if callable(definition.get('next_run')):
+                definition['next_run'] = definition['next_run']()
+            _, created = Schedule.objects.update_or_create(name=name, defaults=definition)
+            self.stdout.write(self.style.SUCCESS(f"{'Created' if created else 'Updated'} schedule {name}."))
@@ -0,0 +1,79 @@
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from api.services.media import (MANAGED_MEDIA_DIRS, iter_media_files,
+                                referenced_media_names, unreferenced_names)
+
+
+# Removes files under MEDIA_ROOT that no TaskFile, StoredBlob or Employee (picture or rendition) points at,
+# e.g. files left behind by bulk deletes or by replaced profile pictures.
+#
+# The database is read once into a set and diffed against a walk of the media directories,
+# so the cost doesn't grow with one query per file. Each batch is re-checked with one query per model
+# right before deleting, in case a file was referenced in the meantime.
+# Ex: python manage.py sweep_orphaned_files --dry-run
+class Command(BaseCommand):
+    help = "Delete media files that are no longer referenced by any row."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Skip files modified in the last N seconds (their row may not be committed yet).',
+        )
+        parser.add_argument(
+            '--dir',
+            action='append',
+            dest='directories',
+            help=f'MEDIA_ROOT sub-directory to sweep (can be repeated). Defaults to {", ".join(MANAGED_MEDIA_DIRS)}',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        directories = options['directories'] or MANAGED_MEDIA_DIRS
+        started = time.perf_counter()
+
+        referenced = referenced_media_names()
+        scanned = scanned_bytes = deleted = deleted_bytes = 0
+        batch = {}
+
+        for name, size in iter_media_files(directories, min_age=options['min_age']):
+            scanned += 1
+            scanned_bytes += size
+            if name in referenced:
+                continue
+            batch[name] = size
+            if len(batch) >= options['batch_size']:
+                count, size = self.delete_batch(batch, dry_run)
+                deleted += count
+                deleted_bytes += size
+                batch = {}
+
+        if batch:
+            count, size = self.delete_batch(batch, dry_run)
+            deleted += count
+            deleted_bytes += size
+
+        elapsed = time.perf_counter() - started
+        rate = scanned / elapsed if elapsed else 0
+        prefix = '[dry run] would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {deleted} orphaned file(s) ({filesizeformat(deleted_bytes)}) '
+            f'out of {scanned} scanned ({filesizeformat(scanned_bytes)}) '
+            f'in {elapsed:.2f}s, {rate:.0f} files/s.'
+        ))
+
+    def delete_batch(self, batch, dry_run):
+        orphans = unreferenced_names(batch)
+        for name in sorted(orphans):
+            if dry_run:
+                self.stdout.write(f'  {name}')
+            else:
+                default_storage.delete(name)
+        return len(orphans), sum(batch[name] for name in orphans)
@@ -0,0 +1,301 @@
+import random
+import time
+
+from asgiref.sync import (async_to_sync, iscoroutinefunction,
+                          markcoroutinefunction, sync_to_async)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models.sql.compiler import SQLCompiler
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.regex_helper import _lazy_re_compile
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.utils import metrics, server_timing
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip only without it.
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, status class and SQL queries (count and time) of every
+    request, by URL name and method, for the metrics endpoint (api/utils/metrics.py).
+    Left out at startup unless METRICS_ENABLED.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = metrics.QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        metrics.record_request(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = metrics.QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = await self.get_response(request)
+        metrics.record_request(request, response, time.perf_counter() - start, queries)
+        return response
+
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header with the request's db (time and query count), cache,
+    serialize, render and total time (see api/utils/server_timing.py), for staff
+    users and for SERVER_TIMING_SAMPLE_RATE (0 to 1) of the other requests.
+    Left out at startup unless SERVER_TIMING_ENABLED.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        server_timing.install()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        with server_timing.timing(server_timing.Timings()) as timings:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        return self.add_header(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with server_timing.timing(server_timing.Timings()) as timings:
+            with connection.execute_wrapper(timings):
+                response = await self.get_response(request)
+        return self.add_header(request, response, timings, time.perf_counter() - start)
+
+    @staticmethod
+    def add_header(request, response, timings, total):
+        # DRF authenticates in the view, and sets request.user for JWT requests too.
+        user = getattr(request, 'user', None)
+        if (user is not None and user.is_staff) or (
+            random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+        ):
+            response.headers['Server-Timing'] = timings.header(total)
+        return response
+
+class APICompressionMiddleware(GZipMiddleware):
+    """
+    Compresses API responses (API_COMPRESSION_PATHS) of the API_COMPRESSION_TYPES:
+    brotli when the client accepts it and the `brotli` package is installed, else gzip.
+
+    - Bodies under API_COMPRESSION_MIN_SIZE bytes are sent as they are; streaming
+      responses (exports) are always compressed.
+    - File downloads (Accept-Ranges / Content-Range) are left alone, their byte
+      ranges and ETags refer to the stored file.
+    - Strong ETags are made weak, as the bytes now depend on the encoding.
+    - Compression happens after rendering, so cache_response keeps storing the plain
+      data, shared by every encoding (and Vary: Accept-Encoding is set).
+    """
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and re_accepts_brotli.search(accept_encoding):
+            return self.compress_brotli(request, response)
+        return super().process_response(request, response)
+
+    def should_compress(self, request, response):
+        if not request.path.startswith(tuple(settings.API_COMPRESSION_PATHS)):
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        if response.has_header('Accept-Ranges') or response.has_header('Content-Range'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in settings.API_COMPRESSION_TYPES:
+            return False
+        return response.streaming or (
+            len(response.content) >= settings.API_COMPRESSION_MIN_SIZE
+        )
+
+    def compress_brotli(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        quality = settings.API_BROTLI_QUALITY
+
+        if response.streaming:
+            if response.is_async:
+                # Async streams are left to gzip, see GZipMiddleware.
+                return super().process_response(request, response)
+            response.streaming_content = self.brotli_sequence(
+                response.streaming_content, quality
+            )
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    @staticmethod
+    def brotli_sequence(sequence, quality):
+        compressor = brotli.Compressor(quality=quality)
+        for chunk in sequence:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class SilkSamplingMiddleware:
+    """
+    Runs Silk's middleware (recording the request, its SQL and its response) for a
+    sample of the requests only:
+
+    - Nothing happens unless SILK_ENABLED, the middleware is then left out at startup.
+    - Paths under SILK_EXCLUDE_PATHS are never recorded.
+    - A request with the SILK_PROFILE_HEADER header is recorded when it carries
+      SILK_PROFILE_TOKEN, or comes from a staff user (session login or JWT).
+    - Otherwise, SILK_SAMPLE_RATE (0 to 1) of the requests under SILK_INCLUDE_PATHS
+      (every path when empty) are recorded.
+
+    Silk's SQL wrapper (installed once per process) only runs inside a recorded
+    request. Silk removes the oldest recordings past SILKY_MAX_RECORDED_REQUESTS.
+    Under ASGI only the recorded requests go through a thread, Silk's middleware
+    being sync only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SILK_ENABLED:
+            raise MiddlewareNotUsed
+        from silk.middleware import SilkyMiddleware
+
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            self.silky = SilkyMiddleware(async_to_sync(get_response))
+        else:
+            self.silky = SilkyMiddleware(get_response)
+        install_sampled_sql_wrapper()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorded = self.sampled(request)
+        if recorded is None:
+            recorded = self.staff_request(request)
+        if not recorded:
+            return self.get_response(request)
+        return self.record(request)
+
+    async def __acall__(self, request):
+        recorded = self.sampled(request)
+        if recorded is None:
+            recorded = await sync_to_async(self.staff_request)(request)
+        if not recorded:
+            return await self.get_response(request)
+        return await sync_to_async(self.record)(request)
+
+    def record(self, request):
+        from silk.collector import DataCollector
+
+        try:
+            return self.silky(request)
+        finally:
+            # Silk only resets its (thread local) collector when the next recording
+            # starts, the requests in between must not be taken for this one.
+            DataCollector().clear()
+
+    @staticmethod
+    def sampled(request):
+        """Whether to record the request, None when it depends on the user."""
+        path = request.path_info
+        if path.startswith(tuple(settings.SILK_EXCLUDE_PATHS)):
+            return False
+
+        value = request.headers.get(settings.SILK_PROFILE_HEADER)
+        if value:
+            if settings.SILK_PROFILE_TOKEN and constant_time_compare(
+                value, settings.SILK_PROFILE_TOKEN
+            ):
+                return True
+            return None
+
+        if settings.SILK_INCLUDE_PATHS and not path.startswith(
+            tuple(settings.SILK_INCLUDE_PATHS)
+        ):
+            return False
+        return random.random() < settings.SILK_SAMPLE_RATE
+
+    @staticmethod
+    def staff_request(request):
+        # DRF only authenticates in the view: the API's JWT is checked here.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
+
+
+def install_sampled_sql_wrapper():
+    """
+    Silk records SQL by replacing SQLCompiler.execute_sql for the whole process, on
+    the first recorded request. This wrapper goes in first, and only hands the query
+    to Silk while a request is being recorded.
+    """
+    from silk.collector import DataCollector
+    from silk.sql import execute_sql
+
+    if getattr(SQLCompiler.execute_sql, 'sampled', False):
+        return
+    if not hasattr(SQLCompiler, '_execute_sql'):
+        # Silk checks this attribute, and then leaves execute_sql alone.
+        SQLCompiler._execute_sql = SQLCompiler.execute_sql
+
+    def sampled_execute_sql(self, *args, **kwargs):
+        if DataCollector().request is None:
+            return self._execute_sql(*args, **kwargs)
+        return execute_sql(self, *args, **kwargs)
+
+    sampled_execute_sql.sampled = True
+    SQLCompiler.execute_sql = sampled_execute_sql
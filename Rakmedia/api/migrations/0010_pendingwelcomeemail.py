@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_taskfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingWelcomeEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150)),
+                ('email', models.EmailField(max_length=254)),
+                ('password_reset_url', models.URLField(max_length=500)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_storedblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='profile_picture_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
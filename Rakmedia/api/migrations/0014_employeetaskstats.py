@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+# Creates the counter rows of the existing employees, counted like
+# api/services/task_stats.actual_stats() as of this migration.
+def backfill_task_stats(apps, schema_editor):
+    Employee = apps.get_model('api', 'Employee')
+    EmployeeTaskStats = apps.get_model('api', 'EmployeeTaskStats')
+    Task = apps.get_model('api', 'Task')
+    TaskFile = apps.get_model('api', 'TaskFile')
+
+    today = timezone.localdate()
+    tasks = {
+        row['assigned_to']: row
+        for row in Task.objects.values('assigned_to').order_by().annotate(
+            open=Count('id', filter=Q(completed=False)),
+            done=Count('id', filter=Q(completed=True)),
+            overdue=Count('id', filter=Q(completed=False, due_date__lt=today)),
+        )
+    }
+    files = dict(
+        TaskFile.objects.values('task__assigned_to').order_by()
+        .annotate(count=Count('id')).values_list('task__assigned_to', 'count')
+    )
+
+    rows = []
+    for employee_id in Employee.objects.values_list('id', flat=True).iterator():
+        counts = tasks.get(employee_id, {})
+        rows.append(EmployeeTaskStats(
+            employee_id=employee_id,
+            open_count=counts.get('open', 0),
+            completed_count=counts.get('done', 0),
+            overdue_count=counts.get('overdue', 0),
+            files_count=files.get(employee_id, 0),
+        ))
+    EmployeeTaskStats.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_employee_profile_picture_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeTaskStats',
+            fields=[
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to='api.employee')),
+                ('open_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('overdue_count', models.IntegerField(default=0)),
+                ('files_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_task_stats, migrations.RunPython.noop),
+    ]
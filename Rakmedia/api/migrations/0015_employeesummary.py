@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_employeetaskstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('department', 'Department'), ('employee_type', 'Employee type'), ('job_role', 'Job role')], max_length=20)),
+                ('key_id', models.PositiveIntegerField()),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('headcount', models.PositiveIntegerField(default=0)),
+                ('salaried_count', models.PositiveIntegerField(default=0)),
+                ('total_salary', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='employee_summaries', to='api.company')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company', 'dimension', 'key_id'), name='unique_employee_summary')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# api/services/role_types.DEFAULT_RULES as of this migration, the combinations the old
+# hard-coded map enforced. Loaded by (case-insensitive) name so they hold from the
+# deploy on, `manage.py load_role_type_rules` loads them again (and reports).
+DEFAULT_RULES = {
+    'ceo': ['officer'],
+    'cto': ['officer'],
+    'cmo': ['officer'],
+    'cfo': ['officer'],
+    'coo': ['officer'],
+    'finance manager': ['manager'],
+    'hr manager': ['manager'],
+    'pr manager': ['manager'],
+    'creative manager': ['manager'],
+    'project manager': ['manager', 'officer'],
+    'backend developer': ['white collar'],
+    'ui/ux designer': ['white collar'],
+    'graphic designer': ['white collar'],
+    'social media': ['white collar'],
+    'photography': ['white collar'],
+    'videography': ['white collar'],
+    'montage': ['white collar'],
+    'erp system': ['white collar'],
+    'cleaner': ['blue collar'],
+    'technician/maintenance': ['blue collar'],
+    'kitchen staff': ['blue collar'],
+    'driver': ['blue collar'],
+}
+
+
+def load_default_rules(apps, schema_editor):
+    JobRole = apps.get_model('api', 'JobRole')
+    EmployeeType = apps.get_model('api', 'EmployeeType')
+    RoleTypeRule = apps.get_model('api', 'RoleTypeRule')
+
+    roles = {name.lower(): pk for pk, name in JobRole.objects.values_list('pk', 'name')}
+    types = {name.lower(): pk for pk, name in EmployeeType.objects.values_list('pk', 'name')}
+
+    RoleTypeRule.objects.bulk_create([
+        RoleTypeRule(job_role_id=roles[role], employee_type_id=types[type_name])
+        for role, type_names in DEFAULT_RULES.items() if role in roles
+        for type_name in type_names if type_name in types
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_employeesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleTypeRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='role_rules', to='api.employeetype')),
+                ('job_role', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='type_rules', to='api.jobrole')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job_role', 'employee_type'), name='unique_role_type_rule')],
+            },
+        ),
+        migrations.RunPython(load_default_rules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_roletyperule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.PositiveBigIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='employee_code',
+            field=models.PositiveIntegerField(blank=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_employee_code_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingwelcomeemail',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
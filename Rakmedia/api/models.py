@@ -1,7 +1,10 @@
+import os
+import uuid
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
 # Create your models here.
 
@@ -74,6 +77,49 @@ class EmployeePosition(models.Model):
     def __str__(self):
         return f'Position {self.id}'
 
+    # Rejects combinations the role's RoleTypeRule rows don't allow.
+    def clean(self):
+        from .services import role_types
+
+        if self.job_role_id and self.employee_type_id and not role_types.is_allowed(
+            self.job_role_id, self.employee_type_id
+        ):
+            raise ValidationError(
+                role_types.combination_error(self.job_role_id, self.employee_type_id)
+            )
+
+
+
+# The employee types a job role can be combined with (Ex: CEO + Officer).
+# Roles without any rule can be combined with every type.
+# Read through the in-memory matrix of api/services/role_types.py. The default rules are loaded
+# by migration 0016, and again by `python manage.py load_role_type_rules`.
+class RoleTypeRule(models.Model):
+
+    job_role = models.ForeignKey(JobRole, on_delete=models.CASCADE, related_name='type_rules')
+    employee_type = models.ForeignKey(EmployeeType, on_delete=models.CASCADE, related_name='role_rules')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job_role', 'employee_type'], name='unique_role_type_rule'),
+        ]
+
+    def __str__(self):
+        return f'{self.job_role_id} + {self.employee_type_id}'
+
+
+
+# Employees created without an employee_code get the next free ones,
+# a whole bulk_create() reserving its block of codes at once (see api/services/employee_codes.py).
+class EmployeeQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .services import employee_codes
+
+        objs = list(objs)
+        employee_codes.assign_codes(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 
 # Represents and individual employee.
@@ -99,6 +145,11 @@ class Employee(models.Model):
         blank=True,
     )
 
+    # Resized copies of the profile picture, filled in by a background task:
+    # {'source': <profile_picture name>, 'sizes': {'64': {'webp': <name>, 'jpeg': <name>}, ...}}
+    # They only apply while 'source' matches the current picture.
+    profile_picture_renditions = models.JSONField(default=dict, blank=True)
+
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True, blank=True, null=True)
@@ -107,7 +158,10 @@ class Employee(models.Model):
     position = models.ForeignKey(EmployeePosition, on_delete=models.SET_NULL, null=True, blank=True, related_name='employees')
     hire_date = models.DateField(null=True, blank=True)
     salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    employee_code = models.PositiveIntegerField(default=999, unique=True)
+    # Left empty, the next free code is assigned on save (see api/services/employee_codes.py).
+    employee_code = models.PositiveIntegerField(unique=True, blank=True)
+
+    objects = EmployeeQuerySet.as_manager()
 
 
     # This is for displaying the formatted employee code, so we don't have to store a string in the DB.
@@ -123,56 +177,36 @@ class Employee(models.Model):
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
+
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            from .services import employee_codes
+
+            employee_codes.assign_codes([self])
+        super().save(*args, **kwargs)
     
     
     # Ensure the employee's position type logically matches the job role.
+    # Checked against the cached role/type matrix, no queries once it is loaded.
     def clean(self):
-        if not self.position_id:
-            return
-        
-        position = getattr(self, '_prefetched_objects_cache', {}).get('position') or self.position
+        from .services import role_types
+
+        if self.position_id in role_types.invalid_position_ids():
+            raise ValidationError(role_types.position_error(self.position_id))
+
+
+
+# Counters handing out unique numbers, such as the employee codes.
+# `next_value` is the first number not handed out yet.
+class CodeCounter(models.Model):
+
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f'{self.name}: {self.next_value}'
 
-        if not position:
-            return
-        
-        if self.position is None:
-            return ""
-    
-        role_name = self.position.job_role.name.lower()
-        emp_type = self.position.employee_type.name.lower()
-
-        role_type_map = {
-            'CEO': ['Officer'],
-            'CTO': ['Officer'],
-            'CMO': ['Officer'],
-            'CFO': ['Officer'],
-            'COO': ['Officer'],
-            'Finance Manager': ['Manager'],
-            'HR Manager': ['Manager'],
-            'PR Manager': ['Manager'],
-            'Creative Manager': ['Manager'],
-            'Project Manager': ['Manager', 'Officer'],
-            'backend develope': ['white collar'],
-            'ui/ux designer': ['white collar'],
-            'graphic designer': ['white collar'],
-            'social media': ['white collar'],
-            'photography': ['white collar'],
-            'videography': ['white collar'],
-            'montage': ['white collar'],
-            'erp system': ['white collar'],
-            'cleaner': ['blue collar'],
-            'technician/maintenance': ['blue collar'],
-            'kitchen staff': ['blue collar'],
-            'driver': ['blue collar'],
-        }
-
-
-        allowed_types = role_type_map.get(role_name)
-        if allowed_types and emp_type not in allowed_types:
-            raise ValidationError(
-                f'Invalid role-type combination: {position.job_role.name} cannot be assigned to {position.employee_type.name}.'
-            )
-    
 
 
 # We're using the user model as an employee-profile object.
@@ -220,18 +254,142 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+    def save(self, *args, **kwargs):
+        # Always in a transaction: the task_stats signals lock the row while reading its previous state,
+        # so concurrent saves of one task (two PATCHes of `completed`) apply their transitions one after the other.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title    
     
 
+
+# Headcount and payroll per company for each department, employee type and job role.
+# One row per (company, dimension, key_id), where key_id is the Department/EmployeeType/JobRole id.
+# Rows are recomputed for the affected groups when employees change (see api/services/summaries.py),
+# `python manage.py rebuild_employee_summaries` rebuilds all of them.
+class EmployeeSummary(models.Model):
+    DEPARTMENT = 'department'
+    EMPLOYEE_TYPE = 'employee_type'
+    JOB_ROLE = 'job_role'
+    DIMENSIONS = [
+        (DEPARTMENT, 'Department'),
+        (EMPLOYEE_TYPE, 'Employee type'),
+        (JOB_ROLE, 'Job role'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='employee_summaries')
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    key_id = models.PositiveIntegerField()
+    name = models.CharField(max_length=100, blank=True)
+    headcount = models.PositiveIntegerField(default=0)
+    # Employees without a salary count in the headcount but not in the average.
+    salaried_count = models.PositiveIntegerField(default=0)
+    total_salary = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'dimension', 'key_id'], name='unique_employee_summary'),
+        ]
+
+    @property
+    def average_salary(self):
+        if not self.salaried_count:
+            return None
+        return self.total_salary / self.salaried_count
+
+    def __str__(self):
+        return f'{self.get_dimension_display()} {self.name} ({self.headcount} employees)'
+
+
+
+# Task counts per employee (tasks assigned to them), kept up to date by the Task/TaskFile signals
+# with F() increments (see api/services/task_stats.py), so listing a team with counts is a plain join.
+# `overdue_count` also moves when a day passes, it is refreshed by the daily `refresh_overdue_task_counts` task.
+# `python manage.py reconcile_task_stats` recomputes everything and reports drift.
+class EmployeeTaskStats(models.Model):
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name='task_stats')
+    open_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    overdue_count = models.IntegerField(default=0)
+    files_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'Task stats of {self.employee}'
+
+
+# The bytes of task files, stored once per SHA-256 and shared by every TaskFile with that content (see api/services/blobs.py).
+class StoredBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='task_files/blobs/')
+    size = models.PositiveBigIntegerField()
+    # How many TaskFiles point at this blob, the stored file is only deleted when the last one goes.
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.sha256} ({self.ref_count} reference(s))'
+
+
+
 # This represents a file that is related to a specific task.
 # Files can be uploaded by either the manager or the assigned employee.
 class TaskFile(models.Model):
     task = models.ForeignKey( 'Task', on_delete=models.CASCADE, related_name='files')
     uploaded_by = models.ForeignKey( 'Employee', on_delete=models.SET_NULL, null=True, blank=True, related_name='uploaded_files')
+    # For deduplicated files `file` holds the blob's path, `original_name` the name it was uploaded with.
+    # Files uploaded before deduplication have no blob until `migrate_task_file_blobs` is run.
     file = models.FileField(upload_to='task_files/')
+    blob = models.ForeignKey(StoredBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='task_files')
+    original_name = models.CharField(max_length=255, blank=True)
     description = models.CharField(max_length=255, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def display_name(self):
+        return self.original_name or os.path.basename(self.file.name)
+
+    def __str__(self):
+        return f'{self.display_name} (Task ID: {self.task.id})'
+
+
+
+# A chunked, resumable task file upload that is still in progress.
+# Chunks are appended to a partial file in CHUNKED_UPLOAD_TEMP_DIR until `offset` reaches `size`,
+# then the upload is finalized into a TaskFile and this row is deleted.
+class TaskFileUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey('Task', on_delete=models.CASCADE, related_name='pending_uploads')
+    uploaded_by = models.ForeignKey('Employee', on_delete=models.SET_NULL, null=True, blank=True, related_name='pending_uploads')
+    filename = models.CharField(max_length=255)
+    description = models.CharField(max_length=255, blank=True, null=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def partial_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f'{self.id}.part')
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size} bytes, Task ID: {self.task_id})'
+
+
+
+# A welcome email waiting to be delivered by the batched email task (api.tasks.flush_welcome_emails).
+# Rows are deleted once the email is sent, failed sends keep the row with the error so they can be retried.
+# claimed_at marks the rows a flush is sending, outside of any transaction (see WELCOME_EMAIL_CLAIM_TIMEOUT).
+class PendingWelcomeEmail(models.Model):
+    username = models.CharField(max_length=150)
+    email = models.EmailField()
+    password_reset_url = models.URLField(max_length=500)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
-        return f'{self.file.name} (Task ID: {self.task.id})'
\ No newline at end of file
+        return f'Welcome email for {self.email}'
@@ -0,0 +1,43 @@
+import codecs
+
+import orjson
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import msgpack
+except ImportError:  # Optional, see MessagePackParser.
+    msgpack = None
+
+
+# orjson-based counterpart of DRF's JSONParser (see api/renderers.py).
+# Bodies in another charset than UTF-8 are left to JSONParser.
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}') from exc
+
+
+# Request bodies sent as "Content-Type: application/msgpack" (see MessagePackRenderer).
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured('API_MSGPACK needs the msgpack package.')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except ValueError as exc:  # Every msgpack unpacking error is one.
+            raise ParseError(f'MessagePack parse error - {exc}') from exc
@@ -0,0 +1,69 @@
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import msgpack
+except ImportError:  # Optional, see MessagePackRenderer.
+    msgpack = None
+
+# orjson-based JSON for the API (API_JSON_BACKEND='orjson', see settings/base.py).
+#
+# Same bytes as DRF's JSONRenderer (compact, UTF-8, U+2028/U+2029 escaped). Values
+# orjson doesn't handle the same way (dates and times, Decimal, lazy strings,
+# querysets...) are passed to DRF's own encoder. Indented output (the browsable API,
+# ?indent=) is left to JSONRenderer, and so is data orjson refuses (integers past
+# 64 bits).
+#
+# Floats are the exception, checking for them would cost what orjson saves:
+# - the same values, written differently where the exponent shows (1e16, not 1e+16),
+# - NaN and Infinity render as null, where JSONRenderer raises (STRICT_JSON).
+# The API serves Decimal fields as strings and has no FloatField, so only computed
+# floats (none today) would show it.
+
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONRenderer.encoder_class()
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+        except TypeError:  # orjson.JSONEncodeError
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
+
+
+# MessagePack for clients sending "Accept: application/msgpack" (API_MSGPACK, needs the
+# optional `msgpack` package). Values are converted like in JSON (dates as ISO strings,
+# Decimal as float...), so both formats decode to the same data.
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured('API_MSGPACK needs the msgpack package.')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
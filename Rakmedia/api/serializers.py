@@ -1,7 +1,19 @@
+import re
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.validators import EMPTY_VALUES
 from rest_framework import serializers
+from rest_framework.fields import SkipField
 
+from .filters import EmployeeBulkFilter
 from .models import (Company, Department, Employee, EmployeePosition,
-                     EmployeeType, JobRole, Task, TaskFile, User)
+                     EmployeeSummary, EmployeeType, JobRole, Task, TaskFile,
+                     TaskFileUpload, User)
+from .services import reference_data, role_types
+from .services.thumbnails import renditions_are_current
+from .utils.sparse_fields import SparseFieldsMixin, field_paths
 
 
 # Basic Company serializer
@@ -25,6 +37,23 @@ class DepartmentSerializer(serializers.ModelSerializer):
 
 
 
+# Headcount and payroll of one department, employee type or job role (read only).
+class EmployeeSummarySerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='key_id', read_only=True)
+    average_salary = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = EmployeeSummary
+        fields = (
+            'id',
+            'name',
+            'headcount',
+            'total_salary',
+            'average_salary',
+        )
+
+
+
 # Nested-serializer for Employee Type
 class EmployeeTypeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -67,11 +96,29 @@ class EmployeePositionSerializer(serializers.ModelSerializer):
 
 
 
+# The job role or employee type name of an employee's position, resolved from the
+# position_id through the reference data registry instead of joining three tables.
+# Left out without a position, like a 'position.job_role.name' source would be.
+class PositionNameField(serializers.ReadOnlyField):
+
+    def __init__(self, attribute, **kwargs):
+        self.attribute = attribute
+        super().__init__(source='position_id', **kwargs)
+
+    def get_attribute(self, instance):
+        position = reference_data.registry().position(instance.position_id)
+        if position is None:
+            raise SkipField()
+        return getattr(position, self.attribute)
+
+
+
 # This is for serializing an employee's full nested data
-class EmployeeDetailSerializer(serializers.ModelSerializer):
+# Supports ?fields= / ?omit= (see api/utils/sparse_fields.py).
+class EmployeeDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     employee_code = serializers.CharField( source='formatted_employee_code', read_only=True )
-    job_role = serializers.CharField( source='position.job_role.name', read_only=True )
-    employee_type = serializers.CharField( source='position.employee_type.name', read_only=True )
+    job_role = PositionNameField('job_role')
+    employee_type = PositionNameField('employee_type')
     department: serializers.SlugRelatedField = serializers.SlugRelatedField(
         many=True,
         slug_field="name",
@@ -81,22 +128,24 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
     username = serializers.CharField( source='user.username', read_only=True )
     user_email = serializers.EmailField( source='user.email' )
     role = serializers.SerializerMethodField()
+    profile_picture_renditions = serializers.SerializerMethodField()
 
     def get_role(self, obj):
         # Returns a normalized, lowercase role based on the employee_type.
         # Used by the frontend to determine dashboard and access logic
         
-        try:
-            employee_type = obj.position.employee_type.name.lower()
-            # Normalize synonyms for consistency
-            if employee_type in ['manager', 'officer']:
-                return employee_type
-            elif employee_type in ['white collar', 'blue collar']:
-                return 'employee'
-            return employee_type
-        except AttributeError:
+        position = reference_data.registry().position(obj.position_id)
+        if position is None:
             return 'employee' # fallback if position/employee_type is missing
 
+        employee_type = position.employee_type.lower()
+        # Normalize synonyms for consistency
+        if employee_type in ['manager', 'officer']:
+            return employee_type
+        elif employee_type in ['white collar', 'blue collar']:
+            return 'employee'
+        return employee_type
+
     def get_profile_picture(self, obj):
         request = self.context.get('request')
         if request is None:
@@ -105,6 +154,29 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
             return (request.build_absolute_uri(obj.profile_picture.url))
         return None
 
+    # URLs of the resized pictures, by size and format: {'64': {'webp': url, 'jpeg': url}, ...}
+    # Until the background job has made them (or if it failed), every entry points at the original picture.
+    def get_profile_picture_renditions(self, obj):
+        if not obj.profile_picture:
+            return None
+
+        request = self.context.get('request')
+
+        def absolute(url):
+            return request.build_absolute_uri(url) if request else url
+
+        if renditions_are_current(obj):
+            return {
+                size: {fmt: absolute(default_storage.url(name)) for fmt, name in formats.items()}
+                for size, formats in obj.profile_picture_renditions['sizes'].items()
+            }
+
+        original = absolute(obj.profile_picture.url)
+        return {
+            str(size): {fmt: original for fmt in settings.PROFILE_PICTURE_RENDITION_FORMATS}
+            for size in settings.PROFILE_PICTURE_RENDITION_SIZES
+        }
+
     class Meta:
         model = Employee
         fields = (
@@ -120,8 +192,19 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
             'salary',
             'department',
             'profile_picture',
+            'profile_picture_renditions',
             'role',
         )
+        # What each field reads, so sparse querysets only join and load that.
+        field_sources = {
+            'username': ('user__username',),
+            'user_email': ('user__email',),
+            'job_role': ('position',),
+            'employee_type': ('position',),
+            'department': ('department__name',),
+            'profile_picture_renditions': ('profile_picture', 'profile_picture_renditions'),
+            'role': ('position',),
+        }
     
 
     def update(self, instance, validated_data):
@@ -148,7 +231,7 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
 
 
 # This is just for fetching (GET) a specific employee.
-class EmployeeGetSerializer(serializers.ModelSerializer):
+class EmployeeGetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     employee_code = serializers.CharField(source='formatted_employee_code', read_only=True)
     username = serializers.CharField(source= 'user.username', read_only=True)
     
@@ -161,11 +244,17 @@ class EmployeeGetSerializer(serializers.ModelSerializer):
             'first_name',
             'last_name',
         )
+        field_sources = {
+            'username': ('user__username',),
+        }
 
 
 
 # This is for positng new employee data.
 class EmployeePostSerializer(serializers.ModelSerializer):
+    # Always handed out by the code counter (api/services/employee_codes.py), a code sent
+    # by the client could race another create into the unique constraint.
+    employee_code = serializers.CharField(source='formatted_employee_code', read_only=True)
     position = serializers.PrimaryKeyRelatedField(
         queryset=EmployeePosition.objects.select_related('job_role', 'employee_type').all()
     )
@@ -189,23 +278,15 @@ class EmployeePostSerializer(serializers.ModelSerializer):
         # Restrict M2M query
         self.fields['department'].queryset = Department.objects.only('id', 'name')
 
-        # Cache position choices for HTML form (only once per request)
+        # Position choices for the HTML form, labelled from the reference data registry.
         # This is for the classic N+1 Query optimization issue we faced with the EmployeePosition model,
         # Specifically the __str__() method that was causing too many Db hits (3x The amount of employees that are in the DB).
         request = self.context.get('request')
         if request and getattr(request.accepted_renderer, 'format', None) == 'html':
-            view = self.context.get('view')
-            if view is None:
-                return
-            if getattr(view, '_position_choices_cache', None) is None:       
-                view._position_choices_cache = list(  
-                    EmployeePosition.objects.select_related('job_role', 'employee_type')  
-                ) 
-
             self.fields['position'] = serializers.ChoiceField( 
                 choices=[
-                    (str(pos.id), f'{pos.job_role.name} ({pos.employee_type.name})')
-                    for pos in view._position_choices_cache
+                    (str(pos.id), pos.display_name)
+                    for pos in reference_data.registry().positions.values()
                 ],
                 required=True,
                 label='Position'
@@ -213,14 +294,6 @@ class EmployeePostSerializer(serializers.ModelSerializer):
 
 
     # --- Field Validations ---
-    def validate_employee_code(self, value):
-        if not isinstance(value, int) or not (1 <= value <= 999):
-            raise serializers.ValidationError('Employee code must consist of exactly 3 digits')
-        if Employee.objects.filter(employee_code=value).exists():
-            raise serializers.ValidationError('An employee with that code already exists')
-        return value
-
-
     def validate_email(self, value):
         if not value:
             raise serializers.ValidationError('Email address is required.')
@@ -237,6 +310,138 @@ class EmployeePostSerializer(serializers.ModelSerializer):
         return value
     
 
+# --- Bulk employee updates (PATCH /api/employees/bulk/, see api/services/employee_bulk.py) ---
+
+# "+5%" / "-2.5%" (percentage), "+200" / "-200" (amount added), "5000" (new salary).
+SALARY_EXPRESSION = re.compile(r'^([+-])?(\d+(?:\.\d{1,2})?)(%)?$')
+
+
+# A salary change for every matched employee, as (kind, amount):
+# ('percent', Decimal('5')), ('add', Decimal('-200')) or ('set', Decimal('5000')).
+class SalaryExpressionField(serializers.Field):
+    default_error_messages = {
+        'invalid': 'Expected "+5%", "-2.5%", "+200", "-200" or a salary like "5000".',
+        'not_positive': 'Salaries must stay greater than zero.',
+    }
+
+    def to_internal_value(self, data):
+        match = SALARY_EXPRESSION.match(str(data).replace(' ', ''))
+        if not match:
+            self.fail('invalid')
+        sign, amount, percent = match.groups()
+        amount = Decimal(amount)
+        if percent:
+            if not sign:
+                self.fail('invalid')
+            if sign == '-' and amount >= 100:
+                self.fail('not_positive')
+            return ('percent', -amount if sign == '-' else amount)
+        if sign:
+            return ('add', -amount if sign == '-' else amount)
+        if amount <= 0:
+            self.fail('not_positive')
+        return ('set', amount)
+
+    def to_representation(self, value):
+        return value
+
+
+# The fields a bulk update can change. `departments` replaces the employee's departments.
+class EmployeeChangesSerializer(serializers.Serializer):
+    salary = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'), required=False)
+    position = serializers.IntegerField(allow_null=True, required=False)
+    hire_date = serializers.DateField(allow_null=True, required=False)
+    departments = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('No changes given.')
+        return attrs
+
+
+class EmployeeExpressionChangesSerializer(EmployeeChangesSerializer):
+    salary = SalaryExpressionField(required=False)
+
+
+class EmployeeBulkItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    changes = EmployeeChangesSerializer()
+
+
+# Either `updates`: [{"id": 1, "changes": {"salary": "5200.00", "departments": [2]}}, ...]
+# or `filter` + `changes`: {"filter": {"department": "Tech"}, "changes": {"salary": "+5%"}}
+# (the filter takes the EmployeeBulkFilter parameters).
+# Referenced employees, positions and departments are checked with one query each.
+class EmployeeBulkUpdateSerializer(serializers.Serializer):
+    updates = EmployeeBulkItemSerializer(many=True, required=False)
+    filter = serializers.DictField(required=False)
+    changes = EmployeeExpressionChangesSerializer(required=False)
+
+    def validate_updates(self, value):
+        if not value:
+            raise serializers.ValidationError('No updates given.')
+        if len(value) > settings.EMPLOYEE_BULK_UPDATE_MAX:
+            raise serializers.ValidationError(f'At most {settings.EMPLOYEE_BULK_UPDATE_MAX} employees can be updated at once.')
+
+        ids = [item['id'] for item in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('Each employee can only appear once.')
+        missing = set(ids) - set(Employee.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(f'Unknown employee id(s): {", ".join(map(str, sorted(missing)))}.')
+        return value
+
+    def validate_filter(self, value):
+        if not value:
+            raise serializers.ValidationError('An empty filter would update every employee.')
+        filterset = EmployeeBulkFilter(data=value, queryset=Employee.objects.all())
+        unknown = set(value) - set(filterset.filters)
+        if unknown:
+            raise serializers.ValidationError(f'Unknown filter(s): {", ".join(sorted(unknown))}.')
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        # django-filter skips blank values, a blank filter would match every employee.
+        blank = [name for name in value if filterset.form.cleaned_data.get(name) in EMPTY_VALUES]
+        if blank:
+            raise serializers.ValidationError(f'Blank filter(s): {", ".join(sorted(blank))}.')
+        # The matched employees, as a queryset.
+        return filterset.qs
+
+    def validate(self, attrs):
+        if ('updates' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Send either `updates`, or `filter` with `changes`.')
+        if 'filter' in attrs and 'changes' not in attrs:
+            raise serializers.ValidationError({'changes': 'This field is required with `filter`.'})
+
+        all_changes = [item['changes'] for item in attrs.get('updates', [])] or [attrs['changes']]
+        self.validate_positions({changes['position'] for changes in all_changes if changes.get('position')})
+        self.validate_departments({pk for changes in all_changes for pk in changes.get('departments', ())})
+
+        salary = attrs.get('changes', {}).get('salary')
+        if salary and salary[0] == 'add' and salary[1] < 0:
+            if attrs['filter'].filter(salary__lte=-salary[1]).exists():
+                raise serializers.ValidationError({'changes': {'salary': SalaryExpressionField.default_error_messages['not_positive']}})
+        return attrs
+
+    def validate_positions(self, ids):
+        if not ids:
+            return
+        found = set(EmployeePosition.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if ids - found:
+            raise serializers.ValidationError({'position': f'Unknown position id(s): {", ".join(map(str, sorted(ids - found)))}.'})
+        invalid = ids & role_types.invalid_position_ids()
+        if invalid:
+            raise serializers.ValidationError({'position': list(role_types.position_errors(invalid).values())})
+
+    def validate_departments(self, ids):
+        if not ids:
+            return
+        found = set(Department.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if ids - found:
+            raise serializers.ValidationError({'departments': f'Unknown department id(s): {", ".join(map(str, sorted(ids - found)))}.'})
+
+
+
 # Serializer for User model aka (Employee Profile)
 class UserSerializer(serializers.ModelSerializer):
     employee_profile = EmployeeGetSerializer(read_only=True)
@@ -254,7 +459,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # Serializer for task files.
-class TaskFileSerializer(serializers.ModelSerializer):
+class TaskFileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     uploaded_by_name = serializers.SerializerMethodField()
 
     class Meta:
@@ -262,10 +467,15 @@ class TaskFileSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'file',
+            'original_name',
             'description',
             'uploaded_at',
             'uploaded_by_name',
         ]
+        read_only_fields = ['original_name']
+        field_sources = {
+            'uploaded_by_name': ('uploaded_by__first_name', 'uploaded_by__last_name'),
+        }
 
     def get_uploaded_by_name(self, obj):
         return (
@@ -275,8 +485,32 @@ class TaskFileSerializer(serializers.ModelSerializer):
 
 
 
+# Serializer for chunked task file uploads, used to start an upload and to report its progress.
+class TaskFileUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaskFileUpload
+        fields = [
+            'id',
+            'filename',
+            'description',
+            'size',
+            'offset',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('File size must be greater than zero')
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'File size cannot exceed {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes')
+        return value
+
+
+
 # Serializer for tasks.
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     assigned_to_name = serializers.CharField(source='assigned_to.user.username', read_only=True)
     assigned_by_name = serializers.CharField(source='assigned_by.user.username', read_only=True)
     files = TaskFileSerializer(many=True, read_only=True)
@@ -288,6 +522,11 @@ class TaskSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'files', 'assigned_to', 'assigned_to_name',
             'assigned_by', 'assigned_by_name', 'due_date', 'completed', 'created_at',
         ]
+        field_sources = {
+            'assigned_to_name': ('assigned_to__user__username',),
+            'assigned_by_name': ('assigned_by__user__username',),
+            'files': field_paths(TaskFileSerializer, prefix='files__'),
+        }
 
 
 
@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from api.models import StoredBlob, TaskFile
+from api.services.media import delete_files_later
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def hash_file(file):
+    """Returns the SHA-256 hex digest of `file`, read in small blocks."""
+    sha256 = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+        sha256.update(block)
+    file.seek(0)
+    return sha256.hexdigest()
+
+
+def blob_name(sha256):
+    # Two-character fan-out keeps directories small.
+    return f'{sha256[:2]}/{sha256}'
+
+
+def store_blob(file, sha256=None):
+    """
+    Returns (blob, created) for the content of `file`, with one more reference taken.
+    Uses `sha256` (or `file.sha256`, set by the hashing upload handlers) when known,
+    otherwise hashes the file. Content that is already stored is not written again.
+    """
+    sha256 = sha256 or getattr(file, 'sha256', None) or hash_file(file)
+
+    with transaction.atomic():
+        if _add_reference(sha256):
+            return StoredBlob.objects.get(sha256=sha256), False
+
+        blob = StoredBlob(sha256=sha256, size=file.size)
+        blob.file.save(blob_name(sha256), file, save=False)
+        try:
+            with transaction.atomic():
+                blob.save()
+        except IntegrityError:
+            # Someone stored the same content at the same time, keep theirs.
+            blob.file.delete(save=False)
+            _add_reference(sha256)
+            return StoredBlob.objects.get(sha256=sha256), False
+
+    return blob, True
+
+
+def _add_reference(sha256):
+    return StoredBlob.objects.filter(sha256=sha256).update(
+        ref_count=F('ref_count') + 1
+    )
+
+
+def release_blob(blob_id):
+    """
+    Drops one reference to a blob. The last reference deletes the row and queues
+    the deletion of the stored bytes. Returns True if the blob was deleted.
+    """
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return False
+        if blob.ref_count > 1:
+            StoredBlob.objects.filter(pk=blob_id).update(
+                ref_count=F('ref_count') - 1
+            )
+            return False
+
+        blob.delete()
+        delete_files_later(blob.file.name)
+    return True
+
+
+def create_task_file(task, uploaded_by, file, description=None, filename=None):
+    """Creates a TaskFile backed by the deduplicated blob store."""
+    with transaction.atomic():
+        blob, _ = store_blob(file)
+        return TaskFile.objects.create(
+            task=task,
+            uploaded_by=uploaded_by,
+            file=blob.file.name,
+            blob=blob,
+            original_name=os.path.basename(filename or file.name),
+            description=description,
+        )
@@ -0,0 +1,106 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import Employee, EmployeeTaskStats, Task
+
+MANAGER_TYPES = Q(position__employee_type__name__iexact='manager') | Q(
+    position__employee_type__name__iexact='officer'
+)
+
+CACHE_PREFIX = 'manager_dashboard'
+CACHE_TIMEOUT = 900
+
+# Every cached dashboard key embeds two versions:
+# - one per manager (their user id), bumped when their tasks, team or profile change,
+# - a global one, bumped by rare changes that can affect any dashboard
+#   (positions, employee types, job roles, companies).
+# Bumping a version orphans the old entries, they expire after CACHE_TIMEOUT.
+GLOBAL_VERSION_KEY = f'{CACHE_PREFIX}:version'
+
+
+def version_key(user_id):
+    return f'{CACHE_PREFIX}:version:{user_id}'
+
+
+def cache_key(user_id, full_path):
+    versions = cache.get_many([GLOBAL_VERSION_KEY, version_key(user_id)])
+    global_version = versions.get(GLOBAL_VERSION_KEY, 0)
+    manager_version = versions.get(version_key(user_id), 0)
+    # Overdue counts change at midnight even when nothing is saved.
+    today = timezone.localdate().isoformat()
+    return (
+        f'{CACHE_PREFIX}:{user_id}:{global_version}.{manager_version}:'
+        f'{today}:{full_path}'
+    )
+
+
+def bump_versions(user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        version = time.time_ns()
+        cache.set_many({version_key(user_id): version for user_id in user_ids}, None)
+
+
+def bump_global_version():
+    cache.set(GLOBAL_VERSION_KEY, time.time_ns(), None)
+
+
+def manager_user_ids(company_id, **department_filter):
+    """User ids of the managers/officers of the company in the matching departments."""
+    return set(
+        Employee.objects.filter(
+            MANAGER_TYPES,
+            company_id=company_id,
+            user__isnull=False,
+            **department_filter,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def team_manager_user_ids(employee_ids):
+    """User ids of the managers/officers whose team includes one of `employee_ids`."""
+    return set(
+        Employee.objects.filter(
+            MANAGER_TYPES,
+            user__isnull=False,
+            department__employees__in=employee_ids,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def affected_user_ids(employee):
+    """The employee's own dashboard (profile) and the dashboards listing them."""
+    managers = manager_user_ids(employee.company_id, department__employees=employee)
+    return {employee.user_id} | managers
+
+
+def member_stats(employee):
+    """A team member's EmployeeTaskStats counters (select_related('task_stats'))."""
+    try:
+        stats = employee.task_stats
+    except EmployeeTaskStats.DoesNotExist:
+        return {'open': 0, 'completed': 0, 'overdue': 0, 'files': 0}
+    return {
+        'open': stats.open_count,
+        'completed': stats.completed_count,
+        'overdue': stats.overdue_count,
+        'files': stats.files_count,
+    }
+
+
+def assigned_task_totals(manager):
+    """Open, completed and overdue counts of all the tasks `manager` assigned."""
+    today = timezone.localdate()
+    totals = Task.objects.filter(assigned_by=manager).aggregate(
+        open_count=Count('id', filter=Q(completed=False)),
+        completed_count=Count('id', filter=Q(completed=True)),
+        overdue_count=Count('id', filter=Q(completed=False, due_date__lt=today)),
+    )
+    return {
+        'open': totals['open_count'],
+        'completed': totals['completed_count'],
+        'overdue': totals['overdue_count'],
+    }
@@ -1,7 +1,24 @@
 from api.models import Employee
+from api.services import reference_data
 
 
 def is_manager_or_officer(employee) -> bool:
-    if not employee or not employee.position or not employee.position.employee_type:
+    # Read from the position id, without loading the position and its type.
+    if not employee:
         return False
-    return employee.position.employee_type.name.lower() in {"manager", "officer"}
\ No newline at end of file
+    return reference_data.registry().is_manager_position(employee.position_id)
+
+
+def get_department_employees(employee):
+    """
+    Employees under a manager's or officer's authority:
+    everyone in the same company sharing one of their departments (except themselves).
+    Regular employees get an empty queryset.
+    """
+    if not is_manager_or_officer(employee):
+        return Employee.objects.none()
+
+    return Employee.objects.filter(
+        company=employee.company_id,
+        department__in=employee.department.all(),
+    ).exclude(id=employee.id).distinct()
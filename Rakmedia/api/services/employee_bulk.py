@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models import DecimalField, F
+from django.db.models.functions import Round
+
+from api.models import Employee
+from api.utils.cache_signals import schedule_cache_invalidation
+from api.utils.outbox import on_commit_once
+
+from . import dashboard, summaries
+
+# Bulk employee updates (annual salary revisions, reorganisations), applied with a few
+# statements whatever the number of employees: bulk_update() or a single UPDATE with F()
+# expressions, and the departments' through-table rows diffed in bulk.
+#
+# These skip the Employee signals, so the caches, dashboards and summaries those keep
+# up to date are invalidated once per transaction instead (after_bulk_change()).
+
+Membership = Employee.department.through
+SALARY = Employee._meta.get_field('salary')
+
+
+def salary_expression(kind, amount):
+    """The new salary column, for a ('percent' | 'add' | 'set', amount) change."""
+    if kind == 'percent':
+        factor = 1 + amount / 100
+        return Round(
+            F('salary') * factor, 2,
+            output_field=DecimalField(max_digits=SALARY.max_digits, decimal_places=2),
+        )
+    if kind == 'add':
+        return F('salary') + amount
+    return amount
+
+
+def replace_departments(departments_by_employee):
+    """
+    Sets each employee's departments ({employee_id: department ids}) with one read, one
+    DELETE and one INSERT of the through-table rows that actually change.
+    """
+    current = Membership.objects.filter(employee_id__in=departments_by_employee)
+    wanted = {
+        (employee_id, department_id)
+        for employee_id, department_ids in departments_by_employee.items()
+        for department_id in department_ids
+    }
+    stale = []
+    kept = set()
+    for pk, employee_id, department_id in current.values_list(
+        'pk', 'employee_id', 'department_id'
+    ):
+        if (employee_id, department_id) in wanted:
+            kept.add((employee_id, department_id))
+        else:
+            stale.append(pk)
+
+    if stale:
+        Membership.objects.filter(pk__in=stale).delete()
+    Membership.objects.bulk_create(
+        [
+            Membership(employee_id=employee_id, department_id=department_id)
+            for employee_id, department_id in sorted(wanted - kept)
+        ],
+        batch_size=1000,
+    )
+
+
+def after_bulk_change():
+    # What the Employee save/m2m signals would have scheduled, once for the whole batch.
+    schedule_cache_invalidation('Employee')
+    on_commit_once(
+        ('invalidate_manager_dashboard', 'all'), dashboard.bump_global_version
+    )
+    on_commit_once(('employee_summary', 'rebuild'), summaries.rebuild_summaries)
+
+
+def update_employees(updates):
+    """
+    Applies per-employee changes ([{'id': ..., 'changes': {...}}], validated by
+    EmployeeBulkUpdateSerializer) with one bulk_update(). Returns the number updated.
+    """
+    changes_by_id = {item['id']: item['changes'] for item in updates}
+    fields = sorted({
+        name for changes in changes_by_id.values() for name in changes
+    } - {'departments'})
+
+    with transaction.atomic():
+        if fields:
+            employees = list(
+                Employee.objects.select_for_update()
+                .filter(pk__in=changes_by_id)
+                .only('pk', *fields)
+            )
+            for employee in employees:
+                for name, value in changes_by_id[employee.pk].items():
+                    if name in fields:
+                        setattr(employee, Employee._meta.get_field(name).attname, value)
+            Employee.objects.bulk_update(employees, fields, batch_size=500)
+
+        departments = {
+            pk: changes['departments']
+            for pk, changes in changes_by_id.items()
+            if 'departments' in changes
+        }
+        if departments:
+            replace_departments(departments)
+        after_bulk_change()
+    return len(changes_by_id)
+
+
+def update_matching(queryset, changes):
+    """
+    Applies the same changes to every employee of `queryset` with a single UPDATE
+    (salary as an expression, Ex: ('percent', Decimal('5')) for salary * 1.05).
+    Returns the number of employees updated.
+    """
+    columns = {
+        Employee._meta.get_field(name).attname: value
+        for name, value in changes.items()
+        if name not in ('salary', 'departments')
+    }
+    if 'salary' in changes:
+        columns['salary'] = salary_expression(*changes['salary'])
+
+    with transaction.atomic():
+        # The filter may join departments, the ids are read once (distinct) and reused.
+        ids = list(queryset.order_by().values_list('pk', flat=True).distinct())
+        if ids and columns:
+            Employee.objects.filter(pk__in=ids).update(**columns)
+        if ids and 'departments' in changes:
+            replace_departments({pk: changes['departments'] for pk in ids})
+        if ids:
+            after_bulk_change()
+    return len(ids)
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+
+from api.models import CodeCounter, Employee
+
+# Employee codes come from a counter row (CodeCounter 'employee_code') instead of
+# checking which codes are free: a single UPDATE moves the counter past a whole block
+# of codes, so concurrent creates and bulk imports never pick the same code and never
+# need to retry. The API hands out every code this way, only imports and scripts
+# choose theirs (claim() then moves the counter past them).
+#
+# The UPDATE locks the counter row until the transaction it runs in ends. In autocommit
+# (API creates, there is no ATOMIC_REQUESTS) that is the UPDATE itself. Inside a
+# caller's atomic() block, other creates wait until that block commits: the price of
+# handing the codes of a rolled back transaction out again instead of leaving gaps.
+# Keep such blocks short, or reserve() a whole block of codes up front.
+
+EMPLOYEE_CODES = 'employee_code'
+
+
+def create_counter():
+    # Starts after the codes already in use, the first time codes are handed out.
+    highest = Employee.objects.aggregate(highest=Max('employee_code'))['highest'] or 0
+    try:
+        with transaction.atomic():
+            CodeCounter.objects.create(
+                name=EMPLOYEE_CODES,
+                next_value=max(settings.EMPLOYEE_CODE_START, highest + 1),
+            )
+    except IntegrityError:
+        pass  # Created by a concurrent transaction.
+
+
+def reserve(count):
+    """`count` consecutive unused codes, reserved with one UPDATE (as a range)."""
+    if count <= 0:
+        return range(0)
+
+    counter = CodeCounter.objects.filter(name=EMPLOYEE_CODES)
+    with transaction.atomic():
+        if not counter.update(next_value=F('next_value') + count):
+            create_counter()
+            counter.update(next_value=F('next_value') + count)
+        next_value = counter.values_list('next_value', flat=True).get()
+    return range(next_value - count, next_value)
+
+
+def claim(code):
+    """Moves the counter past a code chosen by hand, so it is never handed out."""
+    CodeCounter.objects.filter(name=EMPLOYEE_CODES, next_value__lte=code).update(
+        next_value=code + 1
+    )
+
+
+def assign_codes(employees):
+    """Gives the employees without an employee_code the next free codes."""
+    missing = [employee for employee in employees if employee.employee_code is None]
+    chosen = [
+        int(employee.employee_code)
+        for employee in employees
+        if employee.employee_code is not None
+    ]
+    if chosen:
+        claim(max(chosen))
+    for employee, code in zip(missing, reserve(len(missing)), strict=True):
+        employee.employee_code = code
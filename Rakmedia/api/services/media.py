@@ -0,0 +1,92 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from api.models import Employee, StoredBlob, TaskFile
+from api.services.thumbnails import rendition_names
+from api.utils.outbox import enqueue_task
+
+logger = logging.getLogger(__name__)
+
+# Directories of MEDIA_ROOT that only hold files owned by the models below.
+MANAGED_MEDIA_DIRS = ('task_files/', 'profile_pics/')
+
+
+def delete_files_later(*names):
+    """
+    Deletes stored files from a django-q worker once the current transaction commits.
+    Nothing is deleted on rollback, and the request never waits on storage.
+    """
+    names = [name for name in names if name]
+    if names:
+        enqueue_task('api.tasks.delete_stored_files', *names)
+
+
+def delete_stored_files(*names):
+    deleted = 0
+    for name in names:
+        try:
+            default_storage.delete(name)
+            deleted += 1
+        except Exception:
+            logger.exception('Could not delete stored file %s', name)
+    return deleted
+
+
+def referenced_media_names():
+    """
+    Every stored file name the database still points at.
+    One query per model, no matter how many files there are.
+    """
+    referenced = set(TaskFile.objects.values_list('file', flat=True).iterator())
+    referenced.update(StoredBlob.objects.values_list('file', flat=True).iterator())
+    employees = Employee.objects.values_list(
+        'profile_picture', 'profile_picture_renditions'
+    )
+    for picture, renditions in employees.iterator():
+        referenced.add(picture)
+        referenced.update(rendition_names(renditions))
+    referenced.discard('')
+    referenced.discard(None)
+    return referenced
+
+
+def unreferenced_names(names):
+    """
+    The subset of `names` that no FileField references, one query per model.
+    Renditions aren't re-checked: a replaced rendition is never referenced again.
+    """
+    names = set(names)
+    names -= set(TaskFile.objects.filter(file__in=names).values_list('file', flat=True))
+    names -= set(
+        StoredBlob.objects.filter(file__in=names).values_list('file', flat=True)
+    )
+    names -= set(
+        Employee.objects.filter(profile_picture__in=names)
+        .values_list('profile_picture', flat=True)
+    )
+    return names
+
+
+def iter_media_files(directories=MANAGED_MEDIA_DIRS, min_age=0):
+    """
+    Yields (name, size) for the files under the given MEDIA_ROOT directories,
+    with names relative to MEDIA_ROOT like the ones stored in FileFields.
+    Files modified in the last `min_age` seconds are skipped: their row may not be
+    committed yet.
+    """
+    root = os.fspath(settings.MEDIA_ROOT)
+    cutoff = time.time() - min_age
+    for directory in directories:
+        top = os.path.join(root, directory)
+        for dirpath, _, filenames in os.walk(top):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                if stat.st_mtime > cutoff:
+                    continue
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                yield name, stat.st_size
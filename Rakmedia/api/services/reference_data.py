@@ -0,0 +1,83 @@
+from typing import NamedTuple
+
+from api.models import (Company, Department, EmployeePosition, EmployeeType,
+                        JobRole)
+from api.utils.process_cache import ProcessCache
+
+# The reference tables (companies, departments, employee types, job roles and positions)
+# are tiny and rarely change, but nearly every request reads them. They are loaded once
+# per process into a Registry (five small queries), so permissions and serializers
+# resolve ids to names without joins. Any change to them bumps VERSION_KEY in the shared
+# cache (see api/signals.py), and every process reloads on its next request.
+
+VERSION_KEY = 'reference_data:version'
+
+# Employee types that manage the employees of their departments.
+MANAGER_TYPES = {'manager', 'officer'}
+
+
+class Position(NamedTuple):
+    id: int
+    job_role_id: int
+    job_role: str
+    employee_type_id: int
+    employee_type: str
+
+    @property
+    def display_name(self):
+        return f'{self.job_role} ({self.employee_type})'
+
+
+class Registry:
+    """The reference tables of one load, as {id: name} dicts and Position tuples."""
+
+    def __init__(self):
+        self.companies = dict(Company.objects.order_by('pk').values_list('pk', 'name'))
+        self.departments = dict(Department.objects.values_list('pk', 'name'))
+        self.employee_types = dict(EmployeeType.objects.values_list('pk', 'name'))
+        self.job_roles = dict(JobRole.objects.values_list('pk', 'name'))
+        self.positions = {
+            pk: Position(
+                pk, job_role_id, self.job_roles[job_role_id],
+                employee_type_id, self.employee_types[employee_type_id],
+            )
+            for pk, job_role_id, employee_type_id in EmployeePosition.objects.order_by(
+                'pk'
+            ).values_list('pk', 'job_role_id', 'employee_type_id')
+        }
+        self.manager_positions = frozenset(
+            pk for pk, position in self.positions.items()
+            if position.employee_type.lower() in MANAGER_TYPES
+        )
+
+    @property
+    def default_company_id(self):
+        """The first company (by id), which new employees join by default."""
+        return next(iter(self.companies), None)
+
+    def position(self, position_id):
+        return self.positions.get(position_id)
+
+    def is_manager_position(self, position_id):
+        return position_id in self.manager_positions
+
+
+_registry = ProcessCache(VERSION_KEY, Registry)
+
+
+def registry():
+    """This process' registry, reloaded after any process changed the tables."""
+    return _registry.get()
+
+
+def pin():
+    """For async views: `async with pin()` loads the registry off the event loop."""
+    return _registry.pin()
+
+
+def invalidate():
+    _registry.invalidate()
+
+
+def invalidate_on_commit():
+    _registry.invalidate_on_commit()
@@ -0,0 +1,150 @@
+from collections import defaultdict
+
+from api.models import EmployeePosition, EmployeeType, JobRole, RoleTypeRule
+from api.utils.process_cache import ProcessCache
+
+# Which employee types each job role can be combined with, as data (RoleTypeRule rows).
+#
+# The rules and positions are read once per process into frozensets of ids, so
+# validating an employee is a set lookup. Any change to the rules or positions bumps
+# VERSION_KEY in the shared cache, and every process reloads on its next check
+# (api/utils/process_cache.py).
+
+VERSION_KEY = 'role_type_rules:version'
+
+# The rules loaded by migration 0016 and `manage.py load_role_type_rules`, by
+# (case-insensitive) name.
+DEFAULT_RULES = {
+    'ceo': ['officer'],
+    'cto': ['officer'],
+    'cmo': ['officer'],
+    'cfo': ['officer'],
+    'coo': ['officer'],
+    'finance manager': ['manager'],
+    'hr manager': ['manager'],
+    'pr manager': ['manager'],
+    'creative manager': ['manager'],
+    'project manager': ['manager', 'officer'],
+    'backend developer': ['white collar'],
+    'ui/ux designer': ['white collar'],
+    'graphic designer': ['white collar'],
+    'social media': ['white collar'],
+    'photography': ['white collar'],
+    'videography': ['white collar'],
+    'montage': ['white collar'],
+    'erp system': ['white collar'],
+    'cleaner': ['blue collar'],
+    'technician/maintenance': ['blue collar'],
+    'kitchen staff': ['blue collar'],
+    'driver': ['blue collar'],
+}
+
+
+class Matrix:
+    """The allowed (job_role_id, employee_type_id) pairs, read in two queries."""
+
+    def __init__(self):
+        allowed = defaultdict(set)
+        for job_role_id, employee_type_id in RoleTypeRule.objects.values_list(
+            'job_role_id', 'employee_type_id'
+        ):
+            allowed[job_role_id].add(employee_type_id)
+
+        self.restricted_roles = frozenset(allowed)
+        self.allowed = frozenset(
+            (job_role_id, employee_type_id)
+            for job_role_id, type_ids in allowed.items()
+            for employee_type_id in type_ids
+        )
+        positions = EmployeePosition.objects.values_list(
+            'pk', 'job_role_id', 'employee_type_id'
+        )
+        self.invalid_positions = frozenset(
+            pk
+            for pk, job_role_id, employee_type_id in positions
+            if not self.is_allowed(job_role_id, employee_type_id)
+        )
+
+    def is_allowed(self, job_role_id, employee_type_id):
+        return (
+            job_role_id not in self.restricted_roles
+            or (job_role_id, employee_type_id) in self.allowed
+        )
+
+
+_matrix = ProcessCache(VERSION_KEY, Matrix)
+
+
+def matrix():
+    """This process' matrix, reloaded after any process changed the rules."""
+    return _matrix.get()
+
+
+def invalidate():
+    """Makes every process reload its matrix on its next check."""
+    _matrix.invalidate()
+
+
+def invalidate_on_commit():
+    _matrix.invalidate_on_commit()
+
+
+def is_allowed(job_role_id, employee_type_id):
+    return matrix().is_allowed(job_role_id, employee_type_id)
+
+
+def invalid_position_ids():
+    """The ids of the positions whose employee type their job role doesn't allow."""
+    return matrix().invalid_positions
+
+
+def error_message(role, employee_type):
+    return (
+        f'Invalid role-type combination: {role} cannot be assigned to {employee_type}.'
+    )
+
+
+def combination_error(job_role_id, employee_type_id):
+    role = JobRole.objects.filter(pk=job_role_id).values_list('name', flat=True)
+    employee_type = EmployeeType.objects.filter(pk=employee_type_id).values_list(
+        'name', flat=True
+    )
+    return error_message(role.first(), employee_type.first())
+
+
+def position_error(position_id):
+    return position_errors([position_id])[position_id]
+
+
+def position_errors(position_ids):
+    """The validation message of each position, the names read in one query."""
+    rows = EmployeePosition.objects.filter(pk__in=position_ids).values_list(
+        'pk', 'job_role__name', 'employee_type__name'
+    )
+    return {
+        pk: error_message(role, employee_type) for pk, role, employee_type in rows
+    }
+
+
+def invalid_employees(employees):
+    """
+    Bulk Employee.clean() for imports: (employee, message) for each employee (instance
+    or dict with 'position_id') holding a disallowed position. The matrix is read at
+    most once and the messages in one query, whatever the number of employees.
+    """
+    invalid = invalid_position_ids()
+    failures = []
+    for employee in employees:
+        position_id = (
+            employee.get('position_id') if isinstance(employee, dict)
+            else employee.position_id
+        )
+        if position_id in invalid:
+            failures.append((employee, position_id))
+    if not failures:
+        return []
+
+    messages = position_errors({position_id for _, position_id in failures})
+    return [
+        (employee, messages[position_id]) for employee, position_id in failures
+    ]
@@ -0,0 +1,97 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from api.models import Employee, EmployeeSummary
+from api.utils.outbox import on_commit_once
+
+# The Employee field each summary dimension groups by.
+DIMENSION_FIELDS = {
+    EmployeeSummary.DEPARTMENT: 'department',
+    EmployeeSummary.EMPLOYEE_TYPE: 'position__employee_type',
+    EmployeeSummary.JOB_ROLE: 'position__job_role',
+}
+
+
+def aggregates(field):
+    return {
+        'name': Max(f'{field}__name'),
+        'headcount': Count('id'),
+        'salaried_count': Count('salary'),
+        'total_salary': Sum('salary'),
+    }
+
+
+def employee_groups(employee_id):
+    """
+    The (company_id, dimension, key_id) groups an employee currently counts in,
+    read with one query (one row per department).
+    """
+    rows = Employee.objects.filter(pk=employee_id).values_list(
+        'company_id', *DIMENSION_FIELDS.values()
+    )
+    groups = set()
+    for company_id, *keys in rows:
+        for dimension, key_id in zip(DIMENSION_FIELDS, keys, strict=True):
+            if key_id:
+                groups.add((company_id, dimension, key_id))
+    return groups
+
+
+def refresh_group(company_id, dimension, key_id):
+    """Recomputes one summary row from the employees table (deleted when empty)."""
+    field = DIMENSION_FIELDS[dimension]
+    with transaction.atomic():
+        # The row lock serializes concurrent refreshes of the same group,
+        # so the last one to write is also the last one to read.
+        summary, _ = EmployeeSummary.objects.select_for_update().get_or_create(
+            company_id=company_id, dimension=dimension, key_id=key_id
+        )
+        totals = Employee.objects.filter(
+            company_id=company_id, **{field: key_id}
+        ).aggregate(**aggregates(field))
+
+        if not totals['headcount']:
+            summary.delete()
+            return
+        summary.name = totals['name'] or ''
+        summary.headcount = totals['headcount']
+        summary.salaried_count = totals['salaried_count']
+        summary.total_salary = totals['total_salary'] or 0
+        summary.save()
+
+
+def schedule_refresh(groups):
+    """Refreshes each (company_id, dimension, key_id) group once, after commit."""
+    for group in groups:
+        on_commit_once(('employee_summary', *group), partial(refresh_group, *group))
+
+
+def rebuild_summaries():
+    """Recomputes every summary row, one grouped query per dimension."""
+    rows = []
+    for dimension, field in DIMENSION_FIELDS.items():
+        groups = (
+            Employee.objects.filter(**{f'{field}__isnull': False})
+            .values('company', field)
+            .order_by()
+            .annotate(**aggregates(field))
+        )
+        rows += [
+            EmployeeSummary(
+                company_id=group['company'],
+                dimension=dimension,
+                key_id=group[field],
+                name=group['name'] or '',
+                headcount=group['headcount'],
+                salaried_count=group['salaried_count'],
+                total_salary=group['total_salary'] or 0,
+            )
+            for group in groups
+        ]
+
+    with transaction.atomic():
+        EmployeeSummary.objects.all().delete()
+        EmployeeSummary.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
@@ -0,0 +1,156 @@
+from django.db.models import (Count, F, IntegerField, OuterRef, Q, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.models import Employee, EmployeeTaskStats, Task, TaskFile
+
+STAT_FIELDS = ('open_count', 'completed_count', 'overdue_count', 'files_count')
+
+
+def task_counts(completed, due_date, today=None):
+    """What one task adds to its assignee's counters."""
+    today = today or timezone.localdate()
+    return {
+        'open_count': int(not completed),
+        'completed_count': int(completed),
+        'overdue_count': int(
+            not completed and due_date is not None and due_date < today
+        ),
+    }
+
+
+def apply_counts(employee_id, counts, sign=1):
+    """Adds (or with sign=-1 subtracts) `counts` in a single UPDATE."""
+    changes = {
+        name: F(name) + sign * value for name, value in counts.items() if value
+    }
+    if employee_id and changes:
+        EmployeeTaskStats.objects.filter(employee_id=employee_id).update(**changes)
+
+
+def apply_task_change(old, new, files_count=None):
+    """
+    Moves the counters for one task, `old` and `new` being
+    (assigned_to_id, completed, due_date) before and after the change, or None
+    when the task was created/deleted. `files_count` is needed for reassignments.
+    """
+    today = timezone.localdate()
+    old_counts = task_counts(*old[1:], today=today) if old else {}
+    new_counts = task_counts(*new[1:], today=today) if new else {}
+
+    if old and new and old[0] == new[0]:
+        apply_counts(new[0], {
+            name: new_counts[name] - old_counts[name] for name in new_counts
+        })
+        return
+
+    if old:
+        if new:
+            old_counts['files_count'] = files_count or 0
+        apply_counts(old[0], old_counts, sign=-1)
+    if new:
+        if old:
+            new_counts['files_count'] = files_count or 0
+        apply_counts(new[0], new_counts)
+
+
+def apply_file_change(task_id, sign=1):
+    """Counts a task file for the task's assignee, in one UPDATE."""
+    assignee = Task.objects.filter(pk=task_id).values('assigned_to_id')
+    EmployeeTaskStats.objects.filter(employee_id=Subquery(assignee)).update(
+        files_count=F('files_count') + sign
+    )
+
+
+def overdue_counts(today=None):
+    today = today or timezone.localdate()
+    return (
+        Task.objects.filter(
+            assigned_to=OuterRef('employee_id'), completed=False, due_date__lt=today
+        )
+        .values('assigned_to')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+
+
+def refresh_overdue_counts():
+    """Recomputes every overdue_count in one UPDATE (tasks turn overdue at midnight)."""
+    return EmployeeTaskStats.objects.update(
+        overdue_count=Coalesce(
+            Subquery(overdue_counts(), output_field=IntegerField()), Value(0)
+        )
+    )
+
+
+def actual_stats():
+    """Counters recomputed from the tasks and files tables: {employee_id: {...}}."""
+    today = timezone.localdate()
+    stats = {
+        employee_id: dict.fromkeys(STAT_FIELDS, 0)
+        for employee_id in Employee.objects.values_list('id', flat=True)
+    }
+
+    rows = (
+        Task.objects.values('assigned_to')
+        .order_by()
+        .annotate(
+            open=Count('id', filter=Q(completed=False)),
+            done=Count('id', filter=Q(completed=True)),
+            overdue=Count('id', filter=Q(completed=False, due_date__lt=today)),
+        )
+    )
+    for row in rows:
+        stats[row['assigned_to']].update(
+            open_count=row['open'],
+            completed_count=row['done'],
+            overdue_count=row['overdue'],
+        )
+
+    files = (
+        TaskFile.objects.values('task__assigned_to')
+        .order_by()
+        .annotate(count=Count('id'))
+    )
+    for row in files:
+        stats[row['task__assigned_to']]['files_count'] = row['count']
+    return stats
+
+
+def reconcile(dry_run=False):
+    """
+    Compares the stored counters with actual_stats() and fixes the rows that drifted
+    (or are missing) unless `dry_run`.
+    Returns [(employee_id, {field: (stored, actual)})], None as stored for missing rows.
+    """
+    actual = actual_stats()
+    stored = {stats.employee_id: stats for stats in EmployeeTaskStats.objects.all()}
+
+    drift = []
+    to_update = []
+    to_create = []
+    for employee_id, counts in actual.items():
+        row = stored.get(employee_id)
+        if row is None:
+            drift.append((employee_id, {
+                name: (None, value) for name, value in counts.items()
+            }))
+            to_create.append(EmployeeTaskStats(employee_id=employee_id, **counts))
+            continue
+
+        changed = {
+            name: (getattr(row, name), value)
+            for name, value in counts.items()
+            if getattr(row, name) != value
+        }
+        if changed:
+            drift.append((employee_id, changed))
+            for name, (_, value) in changed.items():
+                setattr(row, name, value)
+            to_update.append(row)
+
+    if not dry_run:
+        EmployeeTaskStats.objects.bulk_create(to_create, batch_size=500)
+        EmployeeTaskStats.objects.bulk_update(to_update, STAT_FIELDS, batch_size=500)
+    return drift
@@ -0,0 +1,102 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from api.models import Employee
+
+RENDITION_DIR = 'profile_pics/renditions/'
+
+PIL_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+
+def renditions_are_current(employee):
+    renditions = employee.profile_picture_renditions or {}
+    return bool(employee.profile_picture) and (
+        renditions.get('source') == employee.profile_picture.name
+    )
+
+
+def render_renditions(source_name):
+    """
+    Builds every size/format rendition of the stored image `source_name`.
+    Only touches storage, never the database, so it can run in a worker process.
+    Returns the `profile_picture_renditions` value for the image.
+    """
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    quality = settings.PROFILE_PICTURE_RENDITION_QUALITY
+
+    with default_storage.open(source_name, 'rb') as source:
+        image = Image.open(source)
+        # Phone photos are often stored sideways with an EXIF rotation flag.
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    sizes = {}
+    for size in settings.PROFILE_PICTURE_RENDITION_SIZES:
+        # Square crop around the center, avatars are always shown as squares/circles.
+        resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        sizes[str(size)] = {}
+        for fmt in settings.PROFILE_PICTURE_RENDITION_FORMATS:
+            output = resized
+            if fmt == 'jpeg' and output.mode != 'RGB':
+                output = output.convert('RGB')
+            buffer = io.BytesIO()
+            output.save(buffer, PIL_FORMATS[fmt], quality=quality)
+            name = default_storage.save(
+                f'{RENDITION_DIR}{stem}-{size}.{fmt}', ContentFile(buffer.getvalue())
+            )
+            sizes[str(size)][fmt] = name
+
+    return {'source': source_name, 'sizes': sizes}
+
+
+def rendition_names(renditions):
+    for formats in (renditions or {}).get('sizes', {}).values():
+        yield from formats.values()
+
+
+def save_renditions(employee_id, renditions):
+    """
+    Stores `renditions` on the employee if the picture they were made from is still
+    the current one, and deletes the renditions they replace. Otherwise the new
+    files are discarded. Returns True if they were saved.
+    """
+    previous = (
+        Employee.objects.filter(pk=employee_id)
+        .values_list('profile_picture_renditions', flat=True)
+        .first()
+    )
+    # update() doesn't send post_save, so this doesn't enqueue another rendition job.
+    updated = Employee.objects.filter(
+        pk=employee_id, profile_picture=renditions['source']
+    ).update(profile_picture_renditions=renditions)
+
+    if updated:
+        discard = set(rendition_names(previous)) - set(rendition_names(renditions))
+    else:
+        discard = set(rendition_names(renditions))
+    for name in discard:
+        default_storage.delete(name)
+    return bool(updated)
+
+
+def generate_renditions(employee_id):
+    employee = (
+        Employee.objects.filter(pk=employee_id)
+        .only('id', 'profile_picture', 'profile_picture_renditions')
+        .first()
+    )
+    if employee is None or not employee.profile_picture:
+        return False
+    if renditions_are_current(employee):
+        return False
+    return save_renditions(
+        employee_id, render_renditions(employee.profile_picture.name)
+    )
@@ -0,0 +1,169 @@
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import TaskFileUpload
+from api.services.blobs import create_task_file, hash_file
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UploadOffsetMismatch(Exception):
+    """The chunk doesn't start where the upload currently ends."""
+
+    def __init__(self, offset):
+        super().__init__(f'Expected a chunk starting at byte {offset}')
+        self.offset = offset
+
+
+class IncompleteUpload(Exception):
+    """The upload can't be finalized before every byte has been received."""
+
+
+# The assembled partial file, exposed like a TemporaryUploadedFile so FileSystemStorage
+# moves it into MEDIA_ROOT with a rename instead of copying it.
+class PartialUploadFile(File):
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def parse_content_range(header):
+    """
+    Parses 'bytes <start>-<end>/<total>' into (start, end, total).
+    `total` is None for '*'. Returns None for a missing or malformed header.
+    """
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+
+    start, end, total = match.groups()
+    start, end = int(start), int(end)
+    if end < start:
+        return None
+    return start, end, None if total == '*' else int(total)
+
+
+def start_upload(task, uploaded_by, filename, size, description=None):
+    upload = TaskFileUpload.objects.create(
+        task=task,
+        uploaded_by=uploaded_by,
+        filename=os.path.basename(filename),
+        size=size,
+        description=description,
+    )
+    os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+    open(upload.partial_path, 'wb').close()
+    return upload
+
+
+def append_chunk(upload_id, stream, start, length):
+    """
+    Writes up to `length` bytes read from `stream` at byte `start`.
+    The body is copied in small blocks, so memory use doesn't depend on the chunk size.
+    If the connection drops mid-chunk, the bytes that did arrive are kept and
+    the client resumes from the returned offset.
+    The upload row is only locked to check and advance the offset, not while a slow
+    client sends the body.
+    """
+    upload = TaskFileUpload.objects.get(pk=upload_id)
+    if start != upload.offset:
+        raise UploadOffsetMismatch(upload.offset)
+
+    remaining = min(length, upload.size - start)
+    with open(upload.partial_path, 'r+b') as partial:
+        # Bytes past the offset, left by an interrupted or a concurrent write, are
+        # overwritten; the file never grows past `size`.
+        partial.seek(start)
+        while remaining > 0:
+            block = stream.read(min(READ_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            partial.write(block)
+            remaining -= len(block)
+        end = partial.tell()
+
+    with transaction.atomic():
+        # Of concurrent PUTs for the same bytes, only the first to finish moves the
+        # offset, the others get the new one.
+        upload = TaskFileUpload.objects.select_for_update().get(pk=upload_id)
+        if upload.offset != start:
+            raise UploadOffsetMismatch(upload.offset)
+        upload.offset = end
+        upload.save(update_fields=['offset', 'updated_at'])
+    return upload
+
+
+def finish_upload(upload_id):
+    """
+    Turns a fully received upload into a deduplicated TaskFile.
+    The TaskFile is created and the upload row removed in one transaction.
+    Chunks can arrive in separate processes, so the hash is computed here in one pass,
+    before locking the upload: a complete upload's bytes no longer change.
+    Raises TaskFileUpload.DoesNotExist if it was finished concurrently.
+    """
+    upload = TaskFileUpload.objects.get(pk=upload_id)
+    if upload.offset != upload.size:
+        raise IncompleteUpload(f'Received {upload.offset} of {upload.size} bytes')
+
+    partial_path = upload.partial_path
+    try:
+        with open(partial_path, 'rb') as partial:
+            sha256 = hash_file(partial)
+    except FileNotFoundError:
+        # Already moved into the blob store by a concurrent finish.
+        raise TaskFileUpload.DoesNotExist from None
+
+    with transaction.atomic():
+        upload = TaskFileUpload.objects.select_for_update().get(pk=upload_id)
+        with open(partial_path, 'rb') as partial:
+            file = PartialUploadFile(partial)
+            file.sha256 = sha256
+            task_file = create_task_file(
+                task=upload.task,
+                uploaded_by=upload.uploaded_by,
+                file=file,
+                description=upload.description,
+                filename=upload.filename,
+            )
+        upload.delete()
+
+    # FileSystemStorage moved the partial file into the blob store, other storages
+    # copied it, and nothing was written if the content was already stored.
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    return task_file
+
+
+def sweep_stale_uploads():
+    """
+    Deletes uploads that haven't received a chunk for CHUNKED_UPLOAD_EXPIRY seconds,
+    along with partial files that no longer have an upload row.
+    Returns the number of partial files removed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+    TaskFileUpload.objects.filter(updated_at__lt=cutoff).delete()
+
+    temp_dir = settings.CHUNKED_UPLOAD_TEMP_DIR
+    if not os.path.isdir(temp_dir):
+        return 0
+
+    active = {
+        f'{upload_id}.part'
+        for upload_id in TaskFileUpload.objects.values_list('id', flat=True)
+    }
+    removed = 0
+    with os.scandir(temp_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.part') or entry.name in active:
+                continue
+            # Only old files: a new upload may have created one after `active` was read.
+            if entry.stat().st_mtime < cutoff.timestamp():
+                os.remove(entry.path)
+                removed += 1
+    return removed
@@ -3,11 +3,21 @@ import string
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
 from django.dispatch import receiver
-from django_q.tasks import async_task
+from django_q.signals import pre_enqueue
 
-from .models import Employee
+from .models import (Company, Department, Employee, EmployeePosition,
+                     EmployeeSummary, EmployeeTaskStats, EmployeeType, JobRole,
+                     RoleTypeRule, Task, TaskFile)
+from .services import reference_data, role_types, summaries, task_stats
+from .services.blobs import release_blob
+from .services.media import delete_files_later
+from .services.thumbnails import rendition_names, renditions_are_current
+from .tasks import queue_welcome_email
+from .utils import metrics
+from .utils.outbox import enqueue_task, on_commit_once
 
 # Uncomment this block if you want to automatically create an employee profile when a new employee is added to the database.
 # We're already using a signal that automatically creates a new user when and employee is added to the database,
@@ -74,7 +84,15 @@ def create_user_for_employee(sender, instance, created, **kwargs):
     if created and not instance.user:
         # Create a new user for this employee
         username = generate_username(instance.first_name, instance.last_name)
-        password = generate_secure_password()
+
+        # In 'reset_link' onboarding the welcome email carries a set-password link,
+        # so the account never needs a real password. Passing None stores an unusable
+        # password without running the PBKDF2 hasher (~100ms of CPU per employee).
+        # The reset token stays valid because it is derived from the stored password value.
+        if getattr(settings, 'EMPLOYEE_ONBOARDING_MODE', 'reset_link') == 'reset_link':
+            password = None
+        else:
+            password = generate_secure_password()
 
         user = User.objects.create_user(
             username=username,
@@ -100,6 +118,10 @@ def enqueue_welcome_for_user(sender, instance, created, **kwargs):
     email = instance.email
     username = instance.username
 
+    # Nothing to send to (e.g. superusers created without an email address).
+    if not email:
+        return
+
     # ------ Preferred: create a one-time password reset link ------
     # You can use Django's PasswordResetTokenGenerator and build a link to frontend that accepts the token.
     # Example (backend generates token + uid):
@@ -116,12 +138,210 @@ def enqueue_welcome_for_user(sender, instance, created, **kwargs):
     reset_path = f"/auth/reset-password/?uid={uid}&token={token}"
     password_reset_url = frontend_base + reset_path
 
-    # Enqueue the safer reset-link email
-    async_task("api.tasks.send_welcome_with_reset_link", username, email, password_reset_url)
+    # Queue the safer reset-link email, pending emails are sent in batches over one SMTP connection.
+    queue_welcome_email(username, email, password_reset_url)
 
     # ---------------- Alternative (not recommended): send plaintext password ----------------
     # If you created a random password and stored it temporarily during creation,
     # you could use that here. Example commented code:
     # plain_password = getattr(instance, "_plain_password", None)
     # if plain_password:
-    #     async_task("api.tasks.send_welcome_email_plain", username, plain_password, email)
\ No newline at end of file
+    #     async_task("api.tasks.send_welcome_email_plain", username, plain_password, email)
+
+
+
+# Resizing happens in a django-q worker once the new picture is committed.
+# Until then the serializers fall back to the original picture.
+@receiver(post_save, sender=Employee)
+def enqueue_profile_picture_renditions(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    if not instance.profile_picture or renditions_are_current(instance):
+        return
+    enqueue_task('api.tasks.generate_profile_picture_renditions', instance.pk)
+
+
+
+# Storage cleanup for deleted rows, also when they go in a cascade (a Task with its files, an Employee...).
+# Files are deleted by a django-q worker after commit, so a rolled back delete never loses a file.
+# Deduplicated task files drop their blob reference instead, the bytes go with the last reference.
+@receiver(post_delete, sender=TaskFile)
+def release_task_file_storage(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+    else:
+        delete_files_later(instance.file.name)
+
+
+
+@receiver(post_delete, sender=Employee)
+def release_profile_picture_storage(sender, instance, **kwargs):
+    delete_files_later(
+        instance.profile_picture.name,
+        *rendition_names(instance.profile_picture_renditions),
+    )
+
+
+
+# Per-employee task counters (EmployeeTaskStats), moved with F() updates as tasks and files change.
+# The previous state of an updated task is read (and locked, Task.save() being atomic) before saving,
+# so two concurrent saves of the same task can't both apply the same transition.
+@receiver(post_save, sender=Employee)
+def create_task_stats(sender, instance, created, **kwargs):
+    if created:
+        EmployeeTaskStats.objects.get_or_create(employee=instance)
+
+
+def task_state(task):
+    due_date = Task._meta.get_field('due_date').to_python(task.due_date)
+    return (task.assigned_to_id, bool(task.completed), due_date)
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    instance._previous_state = None
+    if instance._state.adding or instance.pk is None:
+        return
+    # Task.save() runs in a transaction, the lock is held until the counters are moved.
+    queryset = Task.objects.filter(pk=instance.pk).select_for_update()
+    instance._previous_state = queryset.values_list('assigned_to_id', 'completed', 'due_date').first()
+
+
+@receiver(post_save, sender=Task)
+def update_task_stats(sender, instance, created, **kwargs):
+    previous = None if created else getattr(instance, '_previous_state', None)
+    current = task_state(instance)
+    if previous == current:
+        return
+
+    files_count = None
+    if previous and previous[0] != current[0]:
+        files_count = TaskFile.objects.filter(task=instance).count()
+    task_stats.apply_task_change(previous, current, files_count=files_count)
+
+
+@receiver(post_delete, sender=Task)
+def remove_task_stats(sender, instance, **kwargs):
+    task_stats.apply_task_change(task_state(instance), None)
+
+
+@receiver(post_save, sender=TaskFile)
+def count_task_file(sender, instance, created, **kwargs):
+    if created:
+        task_stats.apply_file_change(instance.task_id)
+
+
+@receiver(post_delete, sender=TaskFile)
+def uncount_task_file(sender, instance, **kwargs):
+    task_stats.apply_file_change(instance.task_id, sign=-1)
+
+
+
+# Headcount/payroll summaries (EmployeeSummary): the groups an employee leaves or joins are recomputed after commit.
+# Groups are read before the change (pre_save/pre_delete) and after it, so moves refresh both sides.
+SUMMARY_FIELDS = {'company', 'position', 'salary'}
+SUMMARY_DIMENSIONS = {
+    Department: EmployeeSummary.DEPARTMENT,
+    EmployeeType: EmployeeSummary.EMPLOYEE_TYPE,
+    JobRole: EmployeeSummary.JOB_ROLE,
+}
+
+
+def affects_summaries(update_fields):
+    return update_fields is None or bool(SUMMARY_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=Employee)
+def remember_summary_groups(sender, instance, update_fields=None, **kwargs):
+    instance._summary_groups = set()
+    if not instance._state.adding and instance.pk and affects_summaries(update_fields):
+        instance._summary_groups = summaries.employee_groups(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+def refresh_employee_summaries(sender, instance, update_fields=None, **kwargs):
+    if affects_summaries(update_fields):
+        previous = getattr(instance, '_summary_groups', set())
+        summaries.schedule_refresh(previous | summaries.employee_groups(instance.pk))
+
+
+@receiver(pre_delete, sender=Employee)
+def refresh_summaries_for_deleted_employee(sender, instance, **kwargs):
+    summaries.schedule_refresh(summaries.employee_groups(instance.pk))
+
+
+@receiver(m2m_changed, sender=Employee.department.through)
+def refresh_department_summaries(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # department.employees.add(...): `instance` is the Department, `pk_set` the employees.
+        employees = Employee.objects.filter(pk__in=pk_set) if pk_set else instance.employees.all()
+        company_ids = employees.values_list('company_id', flat=True).distinct()
+        groups = {(company_id, EmployeeSummary.DEPARTMENT, instance.pk) for company_id in company_ids}
+    else:
+        department_ids = pk_set if pk_set else instance.department.values_list('id', flat=True)
+        groups = {(instance.company_id, EmployeeSummary.DEPARTMENT, pk) for pk in department_ids}
+    summaries.schedule_refresh(groups)
+
+
+# Summary rows keep the group's name, so renames are copied over and deleted groups dropped.
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=EmployeeType)
+@receiver(post_save, sender=JobRole)
+def rename_summaries(sender, instance, created, **kwargs):
+    if not created:
+        EmployeeSummary.objects.filter(
+            dimension=SUMMARY_DIMENSIONS[sender], key_id=instance.pk
+        ).update(name=instance.name or '')
+
+
+@receiver(post_delete, sender=Department)
+@receiver(post_delete, sender=EmployeeType)
+@receiver(post_delete, sender=JobRole)
+def delete_summaries(sender, instance, **kwargs):
+    EmployeeSummary.objects.filter(dimension=SUMMARY_DIMENSIONS[sender], key_id=instance.pk).delete()
+
+
+# Changing what a position means (or deleting it, which clears employees' positions with an UPDATE)
+# moves whole groups of employees, the summaries are rebuilt instead.
+@receiver(post_save, sender=EmployeePosition)
+@receiver(post_delete, sender=EmployeePosition)
+def rebuild_summaries_for_position(sender, instance, created=False, **kwargs):
+    if not created:
+        on_commit_once(('employee_summary', 'rebuild'), summaries.rebuild_summaries)
+
+
+
+# The role/type matrix (api/services/role_types.py) is cached per process,
+# every process reloads it after the rules or the positions change.
+@receiver(post_save, sender=RoleTypeRule)
+@receiver(post_delete, sender=RoleTypeRule)
+@receiver(post_save, sender=EmployeePosition)
+@receiver(post_delete, sender=EmployeePosition)
+def invalidate_role_type_matrix(sender, instance, **kwargs):
+    role_types.invalidate_on_commit()
+
+
+
+# Same for the reference data registry (api/services/reference_data.py).
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=EmployeeType)
+@receiver(post_delete, sender=EmployeeType)
+@receiver(post_save, sender=JobRole)
+@receiver(post_delete, sender=JobRole)
+@receiver(post_save, sender=EmployeePosition)
+@receiver(post_delete, sender=EmployeePosition)
+def invalidate_reference_data(sender, instance, **kwargs):
+    reference_data.invalidate_on_commit()
+
+
+
+# Counts the django-q tasks sent to the broker, by function (see api/utils/metrics.py).
+@receiver(pre_enqueue)
+def count_enqueued_task(sender, task, **kwargs):
+    metrics.record_enqueued_task(task['func'])
@@ -1,6 +1,19 @@
 # api/tasks.py
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from .models import PendingWelcomeEmail
+from .utils.outbox import on_commit_once
+
+WELCOME_EMAIL_FLUSH_SCHEDULED_KEY = 'welcome_email:flush_scheduled'
+WELCOME_EMAIL_FLUSH_ENQUEUED_KEY = 'welcome_email:flush_enqueued'
 
 
 def send_welcome_email_plain(username: str, password: str, email: str):
@@ -28,8 +41,17 @@ def send_welcome_with_reset_link(username: str, email: str, password_reset_url:
     Safer approach: send reset link (one-time or time-limited).
     password_reset_url is the full link which user clicks to set password.
     """
+    message = build_welcome_with_reset_link_message(username, email, password_reset_url)
+    message.send(fail_silently=False)
+
+
+def build_welcome_with_reset_link_message(username: str, email: str, password_reset_url: str, connection=None):
+    """
+    Builds the reset-link welcome email without sending it,
+    so it can be delivered on its own or as part of a batch.
+    """
     subject = "Welcome — activate your account / set password"
-    message = f"""
+    body = f"""
 Hello {username},
 
 Your account has been created. Please click the link below to set your password:
@@ -37,4 +59,159 @@ Your account has been created. Please click the link below to set your password:
 
 If you did not request this, ignore this email.
 """
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email], connection=connection)
+
+
+def queue_welcome_email(username: str, email: str, password_reset_url: str):
+    """
+    Stores a welcome email for batched delivery instead of sending it right away.
+    After commit, a flush is enqueued as soon as a full batch is waiting,
+    otherwise one is scheduled to run after WELCOME_EMAIL_BATCH_WINDOW seconds.
+    """
+    PendingWelcomeEmail.objects.create(username=username, email=email, password_reset_url=password_reset_url)
+
+    # Decide on the flush once the transaction commits, so a rolled back signup never reaches the broker
+    # and a bulk onboarding in one transaction only triggers a single flush.
+    on_commit_once('trigger_welcome_email_flush', trigger_welcome_email_flush)
+
+
+def trigger_welcome_email_flush():
+    pending = PendingWelcomeEmail.objects.filter(attempts__lt=settings.WELCOME_EMAIL_MAX_ATTEMPTS).count()
+    if pending >= settings.WELCOME_EMAIL_BATCH_SIZE and cache.add(
+        WELCOME_EMAIL_FLUSH_ENQUEUED_KEY, True, settings.WELCOME_EMAIL_BATCH_WINDOW
+    ):
+        async_task("api.tasks.flush_welcome_emails")
+    else:
+        schedule_welcome_email_flush(settings.WELCOME_EMAIL_BATCH_WINDOW)
+
+
+def schedule_welcome_email_flush(delay: int):
+    """
+    Schedules a single flush `delay` seconds from now.
+    The cache key makes sure only one flush is scheduled per window.
+    """
+    if not cache.add(WELCOME_EMAIL_FLUSH_SCHEDULED_KEY, True, delay):
+        return
+
+    from django_q.models import Schedule
+
+    Schedule.objects.create(
+        func="api.tasks.flush_welcome_emails",
+        schedule_type=Schedule.ONCE,
+        next_run=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def flush_welcome_emails():
+    """
+    Sends pending welcome emails in batches of WELCOME_EMAIL_BATCH_SIZE,
+    each batch over a single SMTP connection.
+    Sent rows are deleted, failed rows keep their error and are retried later
+    until they reach WELCOME_EMAIL_MAX_ATTEMPTS.
+    Returns a (sent, failed) tuple.
+    """
+    # The next queued email (or failed send) may schedule another flush from now on.
+    cache.delete_many([WELCOME_EMAIL_FLUSH_SCHEDULED_KEY, WELCOME_EMAIL_FLUSH_ENQUEUED_KEY])
+
+    sent_count = 0
+    failed_count = 0
+    last_id = 0
+
+    while True:
+        # Claimed and committed first, so no lock is held while talking to the SMTP server.
+        batch = _claim_welcome_emails(last_id)
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        sent, failed = _deliver_welcome_emails(batch)
+        with transaction.atomic():
+            PendingWelcomeEmail.objects.filter(id__in=[row.id for row in sent]).delete()
+            for row in failed:
+                row.claimed_at = None
+            PendingWelcomeEmail.objects.bulk_update(failed, ['attempts', 'last_error', 'claimed_at'])
+
+        sent_count += len(sent)
+        failed_count += len(failed)
+
+    if failed_count and PendingWelcomeEmail.objects.filter(attempts__lt=settings.WELCOME_EMAIL_MAX_ATTEMPTS).exists():
+        schedule_welcome_email_flush(settings.WELCOME_EMAIL_RETRY_DELAY)
+
+    return sent_count, failed_count
+
+
+def _claim_welcome_emails(last_id):
+    # Rows claimed by another flush are skipped, unless it died more than WELCOME_EMAIL_CLAIM_TIMEOUT ago.
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.WELCOME_EMAIL_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        batch = list(
+            PendingWelcomeEmail.objects.select_for_update(skip_locked=True)
+            .filter(id__gt=last_id, attempts__lt=settings.WELCOME_EMAIL_MAX_ATTEMPTS)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale))
+            .order_by('id')[:settings.WELCOME_EMAIL_BATCH_SIZE]
+        )
+        PendingWelcomeEmail.objects.filter(id__in=[row.id for row in batch]).update(claimed_at=now)
+    return batch
+
+
+def _deliver_welcome_emails(batch):
+    # Opens one connection for the whole batch and sends each message over it,
+    # so a failing recipient doesn't stop the rest of the batch from being delivered.
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+
+    try:
+        connection.open()
+    except Exception as exc:
+        for row in batch:
+            row.attempts += 1
+            row.last_error = str(exc)
+        return sent, batch
+
+    try:
+        for row in batch:
+            message = build_welcome_with_reset_link_message(
+                row.username, row.email, row.password_reset_url, connection=connection
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                row.attempts += 1
+                row.last_error = str(exc)
+                failed.append(row)
+            else:
+                sent.append(row)
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+# Runs hourly (see the register_schedules command).
+def sweep_stale_uploads():
+    from .services.uploads import sweep_stale_uploads as sweep
+
+    return sweep()
+
+
+# Scheduled daily (see register_schedules): open tasks past their due date become overdue
+# without any write, so the overdue counters are recomputed once a day.
+def refresh_overdue_task_counts():
+    from .services.task_stats import refresh_overdue_counts
+
+    return refresh_overdue_counts()
+
+
+# Enqueued whenever an employee's profile picture changes (see api/signals.py).
+def generate_profile_picture_renditions(employee_id: int):
+    from .services.thumbnails import generate_renditions
+
+    return generate_renditions(employee_id)
+
+
+# Storage deletions queued after commit by api.services.media.delete_files_later.
+def delete_stored_files(*names: str):
+    from .services.media import delete_stored_files as delete
+
+    return delete(*names)
@@ -1,5 +1,3 @@
-import random
-
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
@@ -38,7 +36,6 @@ class BaseAPITestCase(APITestCase):
             first_name="Manager",
             last_name="User",
             company=self.company,
-            employee_code=f"{random.randint(0, 999):03}",
         )
         self.manager.position = self.manager_position
         self.manager.save()
@@ -49,7 +46,6 @@ class BaseAPITestCase(APITestCase):
             first_name="Employee",
             last_name="User",
             company=self.company,
-            employee_code=f"{random.randint(0, 999):03}",
         )
 
         self.employee.department.set([dept])
@@ -114,7 +110,6 @@ class TaskTests(BaseAPITestCase):
             first_name='Other',
             last_name='User',
             company=self.company,
-            employee_code=f"{random.randint(0, 999):03}",
         )
         task = Task.objects.create(title="Another", description="Task", assigned_to=other_employee)
         self.auth(self.employee_token)
@@ -1,14 +1,15 @@
-import random
-
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.utils.module_loading import import_string
 from rest_framework.test import APIClient
 
 from api.models import (Company, Department, Employee, EmployeePosition,
                         EmployeeType, JobRole, Task, TaskFile)
+from api.utils import outbox
+from api.utils.process_cache import ProcessCache
 
 User = get_user_model()
 
@@ -16,6 +17,10 @@ User = get_user_model()
 @pytest.fixture(autouse=True)
 def clear_cache():
     cache.clear()
+    # The process caches only look at the cleared version every
+    # PROCESS_CACHE_CHECK_INTERVAL, their value may come from a rolled back test.
+    for process_cache in ProcessCache.instances:
+        process_cache.value = None
     
 @pytest.fixture
 def company(db):
@@ -47,7 +52,6 @@ def manager_employee(company, department):
         first_name='Manager',
         last_name='User',
         company=company,
-        employee_code=random.randint(100, 999),
         position=position,
     )
 
@@ -76,7 +80,6 @@ def employee(company, department):
         first_name='Employee',
         last_name='User',
         company=company,
-        employee_code=random.randint(100, 900),
         position=position,
     )
     employee.department.set([department])
@@ -103,7 +106,6 @@ def other_employee(company, department):
         first_name="Other",
         last_name="User",
         company=company,
-        employee_code=random.randint(100, 999),
         position=position,
     )
     other_employee.department.set([department])
@@ -163,4 +165,28 @@ def task_file_uploaded_by_other(other_employee):
         file=uploaded_file,
     )
 
-    return task_file
\ No newline at end of file
+    return task_file
+
+
+@pytest.fixture
+def commit_pending(django_capture_on_commit_callbacks):
+    """
+    Runs the outbox side effects still pending in the test transaction (the fixtures'
+    changes) as their commit would, so that a test only sees the ones it causes next.
+    """
+    def run():
+        with django_capture_on_commit_callbacks(execute=True):
+            # The first entry to run flushes its whole batch.
+            outbox.on_commit_once('commit_pending', lambda: None)
+
+    return run
+
+
+@pytest.fixture
+def sync_outbox(monkeypatch):
+    """Runs the tasks flushed by the outbox in-process instead of enqueuing them."""
+    monkeypatch.setattr(
+        outbox,
+        "async_task",
+        lambda func, *args, **kwargs: import_string(func)(*args, **kwargs),
+    )
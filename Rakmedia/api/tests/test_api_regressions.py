@@ -218,3 +218,30 @@ class TestDashboardRedirect:
             reverse("api_my_dashboard_redirect")
         )
         assert response.data["redirect_to"] == "/dashboard/"
+
+
+@pytest.mark.django_db
+class TestCachedResponseInvalidation:
+
+    def test_changes_only_expire_the_affected_responses(
+        self, authenticated_employee_client, employee, commit_pending,
+        django_capture_on_commit_callbacks,
+    ):
+
+        from api.models import Task
+
+        task = Task.objects.create(
+            title="Before", description="A", assigned_to=employee
+        )
+        url = reverse("employee-tasks")
+        assert authenticated_employee_client.get(url).data[0]["title"] == "Before"
+        commit_pending()
+        cache.set("reference_data:version", "kept", None)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            task.title = "After"
+            task.save()
+
+        assert authenticated_employee_client.get(url).data[0]["title"] == "After"
+        # The rest of the shared cache is left alone.
+        assert cache.get("reference_data:version") == "kept"
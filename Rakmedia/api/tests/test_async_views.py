@@ -0,0 +1,131 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import async_views, views
+from api.models import Task
+from api.utils.cache_decorator import prefix_version, response_cache_key
+
+PATHS = {
+    'employee_profile': '/api/employees/me/',
+    'employee_tasks': '/api/tasks/',
+    'manager_tasks': '/api/manager-tasks/',
+    'department_employees': '/api/department-employees/',
+    'my_dashboard_redirect': '/api/my-dashboard',
+}
+
+
+def call_async(view_name, user=None, method='get', data=None, **extra):
+    if user is not None:
+        token = RefreshToken.for_user(user).access_token
+        extra['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    request = getattr(RequestFactory(), method)(
+        PATHS[view_name], data or {}, **extra
+    )
+    return async_to_sync(getattr(async_views, view_name))(request)
+
+
+def sync_client(client, user):
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def tasks(employee, other_employee, manager_employee, task_file_uploaded_by_other):
+    Task.objects.create(
+        title='B', assigned_to=employee, assigned_by=manager_employee
+    )
+    Task.objects.create(
+        title='A', assigned_to=other_employee, assigned_by=manager_employee
+    )
+
+
+@pytest.fixture
+def api_client():
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+
+    @pytest.mark.parametrize('view_name,query', [
+        ('employee_profile', None),
+        ('employee_tasks', None),
+        ('manager_tasks', {'ordering': 'title'}),
+        ('department_employees', {'first_name__icontains': 'emp'}),
+        ('my_dashboard_redirect', None),
+    ])
+    def test_same_json_as_sync_view(
+        self, view_name, query, api_client, manager_employee, tasks
+    ):
+        # Non-staff, so the department and task scoping applies.
+        user = manager_employee.user
+        user.is_staff = False
+        user.save()
+
+        response = call_async(view_name, user, data=query)
+        cache.clear()
+        expected = sync_client(api_client, user).get(PATHS[view_name], query or {})
+
+        assert response.status_code == expected.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+        assert json.loads(response.content) == expected.json()
+
+    def test_employee_sees_only_own_tasks(self, employee, tasks):
+        response = call_async('employee_tasks', employee.user)
+
+        assert [task['title'] for task in json.loads(response.content)] == ['B']
+
+    def test_requires_authentication(self, db):
+        response = call_async('employee_profile')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'] == 'Bearer realm="api"'
+
+    def test_invalid_token_is_rejected(self, db):
+        response = call_async(
+            'employee_tasks', HTTP_AUTHORIZATION='Bearer not-a-token'
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert json.loads(response.content)['code'] == 'token_not_valid'
+
+    def test_shares_cache_entries_with_sync_views(self, employee):
+        call_async('employee_profile', employee.user)
+
+        key = response_cache_key(
+            'employee_profile', prefix_version('employee_profile'), employee.user.id,
+            PATHS['employee_profile'],
+        )
+        assert cache.get(key)['status'] == 200
+
+    def test_other_methods_use_the_sync_view(self, employee):
+        response = call_async(
+            'employee_profile',
+            employee.user,
+            method='patch',
+            data=json.dumps({'first_name': 'Renamed'}),
+            content_type='application/json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        employee.refresh_from_db()
+        assert employee.first_name == 'Renamed'
+
+    def test_paginated_views_fall_back_to_sync_view(self, monkeypatch, employee):
+        monkeypatch.setattr(
+            views.TaskListCreateAPIView, 'pagination_class', PageNumberPagination
+        )
+        monkeypatch.setattr(PageNumberPagination, 'page_size', 5)
+
+        response = call_async('employee_tasks', employee.user)
+
+        assert 'results' in json.loads(response.rendered_content)
@@ -0,0 +1,115 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Task
+
+URL = reverse('api_batch')
+
+
+def batch(client, *paths):
+    return client.post(URL, {'requests': list(paths)}, format='json')
+
+
+def app_queries(queries, table):
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT')
+        and '"silk_' not in query['sql']
+        and f'FROM "{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestBatchRequests:
+
+    def test_results_match_direct_calls(
+        self, authenticated_manager_client, manager_employee, employee
+    ):
+        Task.objects.create(
+            title='T', assigned_to=employee, assigned_by=manager_employee
+        )
+        paths = [
+            '/api/employees/me/', '/api/manager-tasks/', '/api/department-employees/',
+        ]
+        direct = [authenticated_manager_client.get(path).data for path in paths]
+        cache.clear()
+
+        response = batch(
+            authenticated_manager_client,
+            'employees/me/', {'path': '/api/manager-tasks/'}, 'department-employees/',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['responses']
+        assert [r['status'] for r in results] == [200, 200, 200]
+        assert [r['path'] for r in results] == paths
+        assert [r['body'] for r in results] == direct
+
+    def test_sub_requests_keep_their_own_permissions(
+        self, authenticated_employee_client
+    ):
+        response = batch(
+            authenticated_employee_client, 'employees/me/', 'departments/summary/'
+        )
+
+        results = response.data['responses']
+        assert results[0]['status'] == status.HTTP_200_OK
+        assert results[1]['status'] == status.HTTP_403_FORBIDDEN
+
+    def test_shares_the_cache_with_direct_calls(self, authenticated_employee_client):
+        direct = authenticated_employee_client.get('/api/employees/me/')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = batch(authenticated_employee_client, 'employees/me/')
+
+        assert response.data['responses'][0]['body'] == direct.data
+        # The cached profile is served without loading the employee again.
+        assert app_queries(queries, 'api_department') == []
+
+    def test_user_and_employee_are_loaded_once(self, authenticated_employee_client):
+        with CaptureQueriesContext(connection) as queries:
+            response = batch(
+                authenticated_employee_client,
+                'employees/me/', 'tasks/', 'tasks/?completed=true', 'my-dashboard',
+            )
+
+        assert all(r['status'] == 200 for r in response.data['responses'])
+        assert len(app_queries(queries, 'api_user')) == 1
+        assert len(app_queries(queries, 'api_employee')) == 1
+
+    def test_unknown_outside_and_nested_paths_are_rejected(
+        self, authenticated_employee_client
+    ):
+        response = batch(
+            authenticated_employee_client,
+            'nope/', '/admin/', 'https://example.com/api/tasks/', 'batch/',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [r['status'] for r in response.data['responses']] == [
+            404, 400, 400, 400,
+        ]
+
+    def test_streaming_endpoints_cannot_be_batched(
+        self, authenticated_manager_client
+    ):
+        response = batch(authenticated_manager_client, 'exports/employees.csv')
+
+        assert response.data['responses'][0]['status'] == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_size_is_capped(self, authenticated_employee_client, settings):
+        settings.API_BATCH_MAX_REQUESTS = 2
+
+        response = batch(authenticated_employee_client, *['tasks/'] * 3)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self, db):
+        response = batch(APIClient(), 'tasks/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,179 @@
+import hashlib
+import io
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import StoredBlob, Task, TaskFile
+
+BRIEF = b'the same brief, attached everywhere' * 100
+
+
+@pytest.fixture
+def tasks(settings, tmp_path, employee, manager_employee):
+    settings.MEDIA_ROOT = tmp_path
+    return [
+        Task.objects.create(
+            title=f'Task {n}', assigned_to=employee, assigned_by=manager_employee
+        )
+        for n in range(2)
+    ]
+
+
+def upload(client, task, content=BRIEF, name='brief.pdf'):
+    return client.post(
+        reverse('task-file-upload', args=[task.id]),
+        {'file': SimpleUploadedFile(name, content), 'description': 'Brief'},
+        format='multipart',
+    )
+
+
+def delete(client, task_file):
+    return client.delete(
+        reverse('task-file-delete', args=[task_file.task_id, task_file.id])
+    )
+
+
+def stored_files(root):
+    return [
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(root)
+        for name in names
+    ]
+
+
+@pytest.mark.django_db
+class TestDeduplicatedUploads:
+
+    def test_identical_uploads_share_one_blob(
+        self, authenticated_employee_client, tasks, settings
+    ):
+        first = upload(authenticated_employee_client, tasks[0])
+        second = upload(authenticated_employee_client, tasks[1], name='copy.pdf')
+
+        assert first.status_code == second.status_code == status.HTTP_201_CREATED
+        blob = StoredBlob.objects.get()
+        assert blob.sha256 == hashlib.sha256(BRIEF).hexdigest()
+        assert blob.ref_count == 2
+        assert blob.size == len(BRIEF)
+        assert len(stored_files(settings.MEDIA_ROOT)) == 1
+        assert first.data['file'] == second.data['file']
+        assert {first.data['original_name'], second.data['original_name']} == {
+            'brief.pdf', 'copy.pdf'
+        }
+
+    def test_bytes_are_deleted_with_the_last_reference(
+        self, authenticated_employee_client, tasks, settings, sync_outbox,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            upload(authenticated_employee_client, tasks[0])
+            upload(authenticated_employee_client, tasks[1])
+        first, second = TaskFile.objects.order_by('id')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = delete(authenticated_employee_client, first)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert StoredBlob.objects.get().ref_count == 1
+        assert len(stored_files(settings.MEDIA_ROOT)) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            delete(authenticated_employee_client, second)
+        assert not StoredBlob.objects.exists()
+        assert stored_files(settings.MEDIA_ROOT) == []
+
+    def test_deleting_a_task_releases_its_files(
+        self, authenticated_employee_client, tasks
+    ):
+        upload(authenticated_employee_client, tasks[0])
+        upload(authenticated_employee_client, tasks[1])
+
+        tasks[0].delete()
+
+        assert StoredBlob.objects.get().ref_count == 1
+
+    def test_download_uses_original_name(
+        self, authenticated_employee_client, tasks
+    ):
+        file_id = upload(authenticated_employee_client, tasks[0]).data['id']
+
+        response = authenticated_employee_client.get(
+            reverse('task-file-download', args=[tasks[0].id, file_id])
+        )
+
+        assert 'brief.pdf' in response['Content-Disposition']
+        assert response['Content-Type'] == 'application/pdf'
+
+    def test_chunked_upload_reuses_existing_blob(
+        self, authenticated_employee_client, tasks, settings, tmp_path
+    ):
+        settings.CHUNKED_UPLOAD_TEMP_DIR = tmp_path / 'partial'
+        client = authenticated_employee_client
+        upload(client, tasks[0])
+
+        upload_id = client.post(
+            reverse('task-file-upload-start', args=[tasks[1].id]),
+            {'filename': 'again.pdf', 'size': len(BRIEF)},
+            format='json',
+        ).data['id']
+        client.put(
+            reverse('task-file-upload-chunk', args=[tasks[1].id, upload_id]),
+            data=BRIEF,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-{len(BRIEF) - 1}/{len(BRIEF)}',
+        )
+        client.post(
+            reverse('task-file-upload-complete', args=[tasks[1].id, upload_id])
+        )
+
+        assert StoredBlob.objects.get().ref_count == 2
+        assert os.listdir(settings.CHUNKED_UPLOAD_TEMP_DIR) == []
+
+
+@pytest.mark.django_db
+class TestMigrateTaskFileBlobs:
+
+    @pytest.fixture
+    def legacy_files(self, tasks):
+        return [
+            TaskFile.objects.create(
+                task=task, file=ContentFile(content, name=name)
+            )
+            for task, content, name in [
+                (tasks[0], BRIEF, 'a.pdf'),
+                (tasks[1], BRIEF, 'b.pdf'),
+                (tasks[1], b'unique', 'c.txt'),
+            ]
+        ]
+
+    def test_dry_run_reports_without_changes(self, legacy_files):
+        out = io.StringIO()
+        call_command('migrate_task_file_blobs', '--dry-run', stdout=out)
+
+        assert '1 duplicate(s)' in out.getvalue()
+        assert not StoredBlob.objects.exists()
+
+    def test_migrates_and_reclaims_duplicates(
+        self, legacy_files, settings, django_capture_on_commit_callbacks
+    ):
+        out = io.StringIO()
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('migrate_task_file_blobs', stdout=out)
+
+        assert '3 file(s) migrated, 1 duplicate(s)' in out.getvalue()
+        assert StoredBlob.objects.count() == 2
+        brief = StoredBlob.objects.get(sha256=hashlib.sha256(BRIEF).hexdigest())
+        assert brief.ref_count == 2
+        assert len(stored_files(settings.MEDIA_ROOT)) == 2
+        assert set(TaskFile.objects.values_list('original_name', flat=True)) == {
+            'a.pdf', 'b.pdf', 'c.txt'
+        }
+
+        out = io.StringIO()
+        call_command('migrate_task_file_blobs', stdout=out)
+        assert '0 file(s) migrated' in out.getvalue()
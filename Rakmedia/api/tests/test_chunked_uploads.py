@@ -0,0 +1,254 @@
+import io
+import os
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Task, TaskFile, TaskFileUpload
+from api.services import blobs, uploads
+from api.services.blobs import hash_file
+from api.services.uploads import (UploadOffsetMismatch, append_chunk,
+                                  parse_content_range, sweep_stale_uploads)
+
+CONTENT = b'abcdefghij' * 5
+SIZE = len(CONTENT)
+
+
+@pytest.fixture
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.CHUNKED_UPLOAD_TEMP_DIR = tmp_path / 'partial'
+    return settings
+
+
+@pytest.fixture
+def task(employee, manager_employee):
+    return Task.objects.create(
+        title='Edit', assigned_to=employee, assigned_by=manager_employee
+    )
+
+
+def start(client, task, size=SIZE):
+    return client.post(
+        reverse('task-file-upload-start', args=[task.id]),
+        {'filename': 'raw.mov', 'size': size},
+        format='json',
+    )
+
+
+def put_chunk(client, task, upload_id, start_byte, end_byte, total=SIZE):
+    return client.put(
+        reverse('task-file-upload-chunk', args=[task.id, upload_id]),
+        data=CONTENT[start_byte:end_byte + 1],
+        content_type='application/octet-stream',
+        HTTP_CONTENT_RANGE=f'bytes {start_byte}-{end_byte}/{total}',
+    )
+
+
+def complete(client, task, upload_id):
+    return client.post(
+        reverse('task-file-upload-complete', args=[task.id, upload_id])
+    )
+
+
+@pytest.mark.django_db
+class TestChunkedUpload:
+
+    def test_upload_in_chunks_creates_task_file(
+        self, authenticated_employee_client, upload_dirs, task, employee
+    ):
+        client = authenticated_employee_client
+        response = start(client, task)
+        assert response.status_code == status.HTTP_201_CREATED
+        upload_id = response.data['id']
+        assert response.data['offset'] == 0
+
+        assert put_chunk(client, task, upload_id, 0, 19).data['offset'] == 20
+        assert put_chunk(client, task, upload_id, 20, 49).data['offset'] == 50
+
+        response = complete(client, task, upload_id)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        task_file = TaskFile.objects.get(task=task)
+        assert task_file.uploaded_by == employee
+        with task_file.file.open('rb') as stored:
+            assert stored.read() == CONTENT
+        assert not TaskFileUpload.objects.exists()
+        assert os.listdir(upload_dirs.CHUNKED_UPLOAD_TEMP_DIR) == []
+
+    def test_out_of_order_chunk_returns_current_offset(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        client = authenticated_employee_client
+        upload_id = start(client, task).data['id']
+        put_chunk(client, task, upload_id, 0, 9)
+
+        response = put_chunk(client, task, upload_id, 20, 29)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data['offset'] == 10
+
+    def test_chunk_sent_twice_at_once_moves_the_offset_once(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        upload_id = start(authenticated_employee_client, task).data['id']
+
+        class RacedStream(io.BytesIO):
+            # The same chunk, sent again by a retrying client, finishes first.
+            def read(self, size=-1):
+                TaskFileUpload.objects.filter(pk=upload_id).update(offset=10)
+                return super().read(size)
+
+        with pytest.raises(UploadOffsetMismatch) as raised:
+            append_chunk(upload_id, RacedStream(CONTENT[:10]), 0, 10)
+
+        assert raised.value.offset == 10
+        assert TaskFileUpload.objects.get(pk=upload_id).offset == 10
+
+    def test_finishing_a_finished_upload_is_not_found(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        client = authenticated_employee_client
+        upload_id = start(client, task).data['id']
+        put_chunk(client, task, upload_id, 0, 49)
+        # A concurrent finish already moved the bytes, and is about to commit.
+        os.remove(TaskFileUpload.objects.get(pk=upload_id).partial_path)
+
+        response = complete(client, task, upload_id)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not TaskFile.objects.exists()
+
+    def test_progress_lets_client_resume(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        client = authenticated_employee_client
+        upload_id = start(client, task).data['id']
+        put_chunk(client, task, upload_id, 0, 29)
+
+        response = client.get(
+            reverse('task-file-upload-chunk', args=[task.id, upload_id])
+        )
+
+        assert response.data['offset'] == 30
+        assert response.data['size'] == len(CONTENT)
+
+    def test_incomplete_upload_cannot_be_finished(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        client = authenticated_employee_client
+        upload_id = start(client, task).data['id']
+        put_chunk(client, task, upload_id, 0, 9)
+
+        response = complete(client, task, upload_id)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not TaskFile.objects.exists()
+
+    def test_missing_or_mismatched_content_range_is_rejected(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        client = authenticated_employee_client
+        upload_id = start(client, task).data['id']
+        url = reverse('task-file-upload-chunk', args=[task.id, upload_id])
+
+        response = client.put(
+            url, data=CONTENT, content_type='application/octet-stream'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = put_chunk(client, task, upload_id, 0, 9, total=999)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_other_employees_cannot_touch_the_upload(
+        self, authenticated_employee_client, upload_dirs, task, other_employee
+    ):
+        upload_id = start(authenticated_employee_client, task).data['id']
+        other_client = APIClient()
+        other_client.force_authenticate(user=other_employee.user)
+
+        response = put_chunk(other_client, task, upload_id, 0, 9)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_size_over_limit_is_rejected(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        upload_dirs.CHUNKED_UPLOAD_MAX_SIZE = 10
+        response = start(authenticated_employee_client, task)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_chunk_over_limit_is_rejected(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        upload_dirs.CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 10
+        client = authenticated_employee_client
+        upload_id = start(client, task).data['id']
+
+        response = put_chunk(client, task, upload_id, 0, 10)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert put_chunk(client, task, upload_id, 0, 9).data['offset'] == 10
+
+
+@pytest.mark.django_db
+class TestSweepStaleUploads:
+
+    def test_sweep_removes_expired_uploads_and_orphans(
+        self, authenticated_employee_client, upload_dirs, task
+    ):
+        client = authenticated_employee_client
+        stale_id = start(client, task).data['id']
+        fresh_id = start(client, task).data['id']
+        stale = TaskFileUpload.objects.get(pk=stale_id)
+        old = timezone.now() - timedelta(days=2)
+        TaskFileUpload.objects.filter(pk=stale_id).update(updated_at=old)
+        os.utime(stale.partial_path, (old.timestamp(), old.timestamp()))
+
+        assert sweep_stale_uploads() == 1
+
+        assert list(TaskFileUpload.objects.values_list('id', flat=True)) == [
+            TaskFileUpload.objects.get(pk=fresh_id).id
+        ]
+        assert not os.path.exists(stale.partial_path)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_the_upload_is_hashed_before_it_is_locked(upload_dirs, task, monkeypatch):
+    hashed_in_transaction = []
+
+    def spying_hash_file(file):
+        hashed_in_transaction.append(connection.in_atomic_block)
+        return hash_file(file)
+
+    monkeypatch.setattr(uploads, 'hash_file', spying_hash_file)
+    monkeypatch.setattr(blobs, 'hash_file', spying_hash_file)
+    upload = uploads.start_upload(task, task.assigned_to, 'raw.mov', SIZE)
+    append_chunk(upload.id, io.BytesIO(CONTENT), 0, SIZE)
+
+    task_file = uploads.finish_upload(upload.id)
+
+    assert hashed_in_transaction == [False]  # Once, and not under the lock.
+    assert task_file.blob.sha256 == hash_file(io.BytesIO(CONTENT))
+
+
+def test_parse_content_range():
+    assert parse_content_range('bytes 0-9/50') == (0, 9, 50)
+    assert parse_content_range('bytes 10-19/*') == (10, 19, None)
+    assert parse_content_range('bytes 9-0/50') is None
+    assert parse_content_range(None) is None
+
+
+@pytest.mark.django_db
+def test_register_schedules_is_idempotent():
+    from django_q.models import Schedule
+
+    call_command('register_schedules', stdout=io.StringIO())
+    call_command('register_schedules', stdout=io.StringIO())
+
+    assert Schedule.objects.filter(func='api.tasks.sweep_stale_uploads').count() == 1
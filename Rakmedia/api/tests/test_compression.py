@@ -0,0 +1,124 @@
+import datetime
+import decimal
+import gzip
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Task, TaskFile
+from api.parsers import MessagePackParser
+from api.renderers import MessagePackRenderer
+
+GZIP = {'HTTP_ACCEPT_ENCODING': 'gzip, deflate'}
+URL = '/api/tasks/'
+
+
+@pytest.fixture
+def many_tasks(employee, manager_employee):
+    Task.objects.bulk_create(
+        Task(
+            title=f'Task {i}', description='Prepare the quarterly report.',
+            assigned_to=employee, assigned_by=manager_employee,
+        )
+        for i in range(50)
+    )
+
+
+@pytest.mark.django_db
+class TestAPICompression:
+
+    def test_large_responses_are_gzipped(
+        self, authenticated_employee_client, many_tasks
+    ):
+        plain = authenticated_employee_client.get(URL)
+        compressed = authenticated_employee_client.get(URL, **GZIP)
+
+        assert 'Content-Encoding' not in plain
+        assert compressed['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in compressed['Vary']
+        assert len(compressed.content) < len(plain.content)
+        # The second request is a cache hit, compressed from the same cached data.
+        assert gzip.decompress(compressed.content) == plain.content
+
+    def test_small_responses_are_sent_as_is(
+        self, authenticated_employee_client, many_tasks, settings
+    ):
+        settings.API_COMPRESSION_MIN_SIZE = 10 ** 6
+
+        response = authenticated_employee_client.get(URL, **GZIP)
+
+        assert 'Content-Encoding' not in response
+
+    def test_streaming_exports_are_gzipped(
+        self, authenticated_employee_client, many_tasks
+    ):
+        response = authenticated_employee_client.get(
+            reverse('task-export', args=['csv']), **GZIP
+        )
+
+        assert response['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        assert 'Task 49' in body
+
+    def test_file_downloads_keep_their_bytes_and_etag(
+        self, authenticated_employee_client, employee, settings, tmp_path
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        content = b'name,total\n' * 500
+        task = Task.objects.create(title='T', assigned_to=employee)
+        task_file = TaskFile.objects.create(
+            task=task, uploaded_by=employee,
+            file=SimpleUploadedFile('report.csv', content, content_type='text/csv'),
+        )
+        url = reverse('task-file-download', args=[task.id, task_file.id])
+
+        response = authenticated_employee_client.get(url, **GZIP)
+        not_modified = authenticated_employee_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'], **GZIP
+        )
+
+        assert 'Content-Encoding' not in response
+        assert b''.join(response.streaming_content) == content
+        assert not response['ETag'].startswith('W/')
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_brotli_is_preferred_when_available(
+        self, authenticated_employee_client, many_tasks
+    ):
+        brotli = pytest.importorskip('brotli')
+        plain = authenticated_employee_client.get(URL)
+
+        response = authenticated_employee_client.get(
+            URL, HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.content) == plain.content
+
+
+@pytest.mark.django_db
+class TestMessagePack:
+
+    def test_not_offered_unless_enabled(self, authenticated_employee_client):
+        response = authenticated_employee_client.get(
+            URL, HTTP_ACCEPT='application/msgpack'
+        )
+
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+    def test_renders_and_parses_the_same_data_as_json(self):
+        msgpack = pytest.importorskip('msgpack')
+        data = {
+            'salary': decimal.Decimal('10.50'),
+            'due_date': datetime.date(2030, 1, 31),
+            'files': [{'id': 1}],
+        }
+        body = MessagePackRenderer().render(data)
+
+        assert msgpack.unpackb(body) == {
+            'salary': 10.5, 'due_date': '2030-01-31', 'files': [{'id': 1}],
+        }
+        assert MessagePackParser().parse(io.BytesIO(body)) == msgpack.unpackb(body)
@@ -0,0 +1,268 @@
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import (Department, Employee, EmployeePosition,
+                        EmployeeSummary, EmployeeType, JobRole, RoleTypeRule)
+from api.services import summaries
+from api.utils.cache_decorator import prefix_version
+
+URL = reverse('employee-bulk-update')
+ENGINEERING = {'department': 'Engineering'}
+
+
+def set_salaries(**salaries):
+    for pk, salary in salaries.items():
+        Employee.objects.filter(pk=pk).update(salary=salary)
+
+
+def salary(employee):
+    return Employee.objects.values_list('salary', flat=True).get(pk=employee.pk)
+
+
+def departments(employee):
+    return set(employee.department.values_list('name', flat=True))
+
+
+@pytest.fixture
+def tech(company):
+    return Department.objects.create(name='Tech', company=company)
+
+
+@pytest.fixture
+def after_commit(monkeypatch, django_capture_on_commit_callbacks):
+    """Runs the on-commit invalidations of the changes made inside the block."""
+    @contextmanager
+    def run():
+        with django_capture_on_commit_callbacks(execute=True):
+            yield
+
+    return run
+
+
+@pytest.mark.django_db
+class TestBulkUpdateByIds:
+
+    def test_requires_an_admin(self, authenticated_employee_client, employee):
+        response = authenticated_employee_client.patch(URL, {
+            'updates': [{'id': employee.pk, 'changes': {'salary': '1.00'}}],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_applies_each_employees_changes(
+        self, authenticated_manager_client, employee, other_employee, tech
+    ):
+        position = other_employee.position
+        response = authenticated_manager_client.patch(URL, {'updates': [
+            {
+                'id': employee.pk,
+                'changes': {'salary': '4200.50', 'position': position.pk},
+            },
+            {
+                'id': other_employee.pk,
+                'changes': {'departments': [tech.pk], 'hire_date': None},
+            },
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'updated': 2}
+        employee.refresh_from_db()
+        assert employee.salary == Decimal('4200.50')
+        assert employee.position_id == position.pk
+        assert departments(employee) == {'Engineering'}
+        assert departments(other_employee) == {'Tech'}
+
+    def test_query_count_does_not_grow_with_the_batch(
+        self, authenticated_manager_client, manager_employee, employee,
+        other_employee, tech,
+    ):
+        changes = {'salary': '3000', 'departments': [tech.pk]}
+
+        def run(people):
+            with CaptureQueriesContext(connection) as queries:
+                response = authenticated_manager_client.patch(URL, {'updates': [
+                    {'id': person.pk, 'changes': changes} for person in people
+                ]}, format='json')
+            assert response.status_code == status.HTTP_200_OK
+            return len([
+                query for query in queries.captured_queries
+                if query['sql'].startswith(('SELECT', 'UPDATE', 'INSERT', 'DELETE'))
+                and '"silk_' not in query['sql']
+            ])
+
+        one = run([employee])
+        # Some rows are already up to date, the rest change.
+        three = run([manager_employee, employee, other_employee])
+
+        assert three == one
+
+    def test_invalid_batches_change_nothing(
+        self, authenticated_manager_client, employee, other_employee
+    ):
+        response = authenticated_manager_client.patch(URL, {'updates': [
+            {'id': employee.pk, 'changes': {'salary': '10.00'}},
+            {'id': 999999, 'changes': {'salary': '10.00'}},
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Unknown employee id(s): 999999.' in str(response.data)
+        assert salary(employee) is None
+
+    def test_rejects_positions_the_role_rules_disallow(
+        self, authenticated_manager_client, employee, company
+    ):
+        ceo = JobRole.objects.create(name='CEO', company=company)
+        officer = EmployeeType.objects.create(name='Officer')
+        driver_type = EmployeeType.objects.create(name='Blue Collar')
+        RoleTypeRule.objects.create(job_role=ceo, employee_type=officer)
+        position = EmployeePosition.objects.create(
+            job_role=ceo, employee_type=driver_type
+        )
+
+        response = authenticated_manager_client.patch(URL, {'updates': [
+            {'id': employee.pk, 'changes': {'position': position.pk}},
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'CEO cannot be assigned to Blue Collar' in str(response.data)
+
+    def test_rejects_empty_and_duplicate_entries(
+        self, authenticated_manager_client, employee
+    ):
+        empty = authenticated_manager_client.patch(URL, {'updates': [
+            {'id': employee.pk, 'changes': {}},
+        ]}, format='json')
+        duplicate = authenticated_manager_client.patch(URL, {'updates': [
+            {'id': employee.pk, 'changes': {'salary': '1.00'}},
+            {'id': employee.pk, 'changes': {'salary': '2.00'}},
+        ]}, format='json')
+
+        assert empty.status_code == status.HTTP_400_BAD_REQUEST
+        assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestBulkUpdateByFilter:
+
+    def test_raises_salaries_by_a_percentage(
+        self, authenticated_manager_client, manager_employee, employee,
+        other_employee, tech,
+    ):
+        employee.department.set([tech])
+        other_employee.department.set([tech])
+        set_salaries(**{
+            str(employee.pk): '3000.00', str(manager_employee.pk): '5000.00',
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_manager_client.patch(URL, {
+                'filter': {'department': 'tech'}, 'changes': {'salary': '+5%'},
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'updated': 2}
+        assert salary(employee) == Decimal('3150.00')
+        # Employees without a salary keep none, other departments are left alone.
+        assert salary(other_employee) is None
+        assert salary(manager_employee) == Decimal('5000.00')
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "api_employee"')
+        ]
+        assert len(updates) == 1
+
+    @pytest.mark.parametrize('expression, expected', [
+        ('-10%', '2700.00'),
+        ('+250', '3250.00'),
+        ('-250.50', '2749.50'),
+        ('4000', '4000.00'),
+    ])
+    def test_salary_expressions(
+        self, authenticated_manager_client, employee, expression, expected
+    ):
+        set_salaries(**{str(employee.pk): '3000.00'})
+
+        response = authenticated_manager_client.patch(URL, {
+            'filter': {'id': str(employee.pk)}, 'changes': {'salary': expression},
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert salary(employee) == Decimal(expected)
+
+    @pytest.mark.parametrize('body', [
+        {'filter': {}, 'changes': {'salary': '+5%'}},
+        {'filter': {'colour': 'blue'}, 'changes': {'salary': '+5%'}},
+        {'filter': ENGINEERING},
+        {'filter': ENGINEERING, 'changes': {'salary': '5%'}},
+        {'filter': ENGINEERING, 'changes': {'salary': '-100%'}},
+        # Would bring the salary of 3000 to zero.
+        {'filter': ENGINEERING, 'changes': {'salary': '-3000'}},
+        {'filter': ENGINEERING, 'changes': {'salary': '+5%'}, 'updates': []},
+    ])
+    def test_rejects_invalid_requests(
+        self, authenticated_manager_client, employee, body
+    ):
+        set_salaries(**{str(employee.pk): '3000.00'})
+
+        response = authenticated_manager_client.patch(URL, body, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert salary(employee) == Decimal('3000.00')
+
+    @pytest.mark.parametrize('blank_filter', [
+        {'department': ''},
+        {'salary__gt': ''},
+        {'id': ''},
+        {'department': 'Engineering', 'job_role': ''},
+    ])
+    def test_rejects_blank_filters(
+        self, authenticated_manager_client, employee, other_employee, blank_filter
+    ):
+        set_salaries(**{str(employee.pk): '3000.00', str(other_employee.pk): '3000.00'})
+
+        response = authenticated_manager_client.patch(URL, {
+            'filter': blank_filter, 'changes': {'salary': '4000'},
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Blank filter' in str(response.data['filter'])
+        assert salary(employee) == salary(other_employee) == Decimal('3000.00')
+
+    def test_moves_a_filtered_group_to_other_departments(
+        self, authenticated_manager_client, employee, other_employee, tech
+    ):
+        response = authenticated_manager_client.patch(URL, {
+            'filter': {'job_role': 'developer'}, 'changes': {'departments': [tech.pk]},
+        }, format='json')
+
+        assert response.data == {'updated': 1}
+        assert departments(employee) == {'Tech'}
+        assert departments(other_employee) == {'Engineering'}
+
+    def test_invalidates_caches_and_summaries_once(
+        self, authenticated_manager_client, employee, department, after_commit
+    ):
+        set_salaries(**{str(employee.pk): '3000.00'})
+        summaries.rebuild_summaries()
+        version = prefix_version('employee_list')
+        cache.set('unrelated', 'kept', None)
+
+        with after_commit():
+            response = authenticated_manager_client.patch(URL, {
+                'filter': ENGINEERING, 'changes': {'salary': '+10%'},
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert prefix_version('employee_list') != version
+        assert cache.get('unrelated') == 'kept'
+        row = EmployeeSummary.objects.get(
+            dimension=EmployeeSummary.DEPARTMENT, key_id=department.pk
+        )
+        assert row.total_salary == Decimal('3300.00')
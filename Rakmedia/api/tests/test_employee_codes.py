@@ -0,0 +1,115 @@
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import CodeCounter, Employee
+from api.services import employee_codes
+
+User = get_user_model()
+
+
+def new_employee(company, **fields):
+    return Employee(first_name='New', last_name='Hire', company=company, **fields)
+
+
+def counter_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith(('SELECT', 'UPDATE', 'INSERT'))
+        and '"api_codecounter"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestEmployeeCodes:
+
+    def test_codes_are_handed_out_in_order(self, company, settings):
+        settings.EMPLOYEE_CODE_START = 100
+
+        first = Employee.objects.create(first_name='A', last_name='A', company=company)
+        second = Employee.objects.create(first_name='B', last_name='B', company=company)
+
+        assert (first.employee_code, second.employee_code) == (100, 101)
+        assert first.formatted_employee_code == 'EMP-100'
+
+    def test_bulk_create_reserves_a_block_in_one_update(self, company):
+        employee_codes.reserve(1)
+        employees = [new_employee(company) for _ in range(50)]
+
+        with CaptureQueriesContext(connection) as queries:
+            Employee.objects.bulk_create(employees)
+
+        codes = [employee.employee_code for employee in employees]
+        assert codes == list(range(codes[0], codes[0] + 50))
+        assert len(counter_queries(queries)) == 2  # The UPDATE and reading it back.
+
+    def test_starts_after_the_codes_already_in_use(self, company, settings):
+        settings.EMPLOYEE_CODE_START = 100
+        Employee.objects.bulk_create([new_employee(company, employee_code=500)])
+        CodeCounter.objects.all().delete()
+
+        employee = Employee.objects.create(
+            first_name='A', last_name='A', company=company
+        )
+
+        assert employee.employee_code == 501
+
+    def test_codes_chosen_by_hand_are_skipped(self, company):
+        auto = Employee.objects.create(first_name='A', last_name='A', company=company)
+        chosen = auto.employee_code + 1
+        Employee.objects.create(
+            first_name='B', last_name='B', company=company, employee_code=chosen
+        )
+
+        later = Employee.objects.bulk_create(
+            [new_employee(company), new_employee(company)]
+        )
+
+        codes = [employee.employee_code for employee in later]
+        assert codes == [chosen + 1, chosen + 2]
+
+    def test_reserved_blocks_never_overlap(self, db):
+        blocks = [employee_codes.reserve(size) for size in (1, 5, 1, 20)]
+
+        codes = [code for block in blocks for code in block]
+        assert len(codes) == len(set(codes)) == 27
+        assert employee_codes.reserve(0) == range(0)
+
+    def test_profiles_for_existing_users_get_distinct_codes(self, company):
+        users = [
+            User.objects.create_user(username=f'user{i}', password='pass1234')
+            for i in range(3)
+        ]
+
+        call_command('create_employee_profiles', stdout=io.StringIO())
+
+        codes = Employee.objects.filter(user__in=users).values_list(
+            'employee_code', flat=True
+        )
+        assert len(set(codes)) == 3
+
+    def test_the_api_ignores_codes_sent_by_the_client(
+        self, authenticated_manager_client, manager_employee
+    ):
+        payload = {
+            'first_name': 'New',
+            'last_name': 'Hire',
+            'email': 'new.hire@example.com',
+            'position': manager_employee.position_id,
+            'department': [],
+            'salary': '1000.00',
+            'employee_code': manager_employee.employee_code,
+        }
+
+        response = authenticated_manager_client.post(
+            '/api/employees/', payload, format='json'
+        )
+
+        assert response.status_code == 201
+        created = Employee.objects.get(email='new.hire@example.com')
+        assert created.employee_code != manager_employee.employee_code
+        assert response.data['employee_code'] == created.formatted_employee_code
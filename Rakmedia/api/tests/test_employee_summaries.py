@@ -0,0 +1,180 @@
+import io
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Company, Department, EmployeeSummary
+from api.services import summaries
+
+URL = reverse('department-summary')
+
+
+def summary(dimension, key_id):
+    return EmployeeSummary.objects.filter(dimension=dimension, key_id=key_id).first()
+
+
+FIELDS = ('company_id', 'dimension', 'key_id', 'name', 'headcount',
+          'salaried_count', 'total_salary')
+
+
+@pytest.fixture
+def salaries(manager_employee, employee, other_employee):
+    for person, salary in (
+        (manager_employee, '5000'), (employee, '3000'), (other_employee, None),
+    ):
+        person.salary = salary
+        person.save()
+    # Incremental refreshes run after commit, which never happens around fixtures.
+    summaries.rebuild_summaries()
+
+
+@pytest.fixture
+def after_commit(monkeypatch, django_capture_on_commit_callbacks):
+    """Runs the on-commit refreshes of the changes made inside the block."""
+    @contextmanager
+    def run():
+        with django_capture_on_commit_callbacks(execute=True):
+            yield
+
+    return run
+
+
+@pytest.mark.django_db
+class TestIncrementalSummaries:
+
+    def test_rebuild_computes_headcount_and_payroll(self, department, salaries):
+        row = summary(EmployeeSummary.DEPARTMENT, department.id)
+
+        assert row.company_id == department.company_id
+        assert row.name == 'Engineering'
+        assert row.headcount == 3
+        assert row.total_salary == Decimal('8000')
+        # The employee without a salary is left out of the average.
+        assert row.average_salary == Decimal('4000')
+
+    def test_types_and_roles_are_summarized(self, salaries, employee):
+        employee_type = summary(
+            EmployeeSummary.EMPLOYEE_TYPE, employee.position.employee_type_id
+        )
+        job_role = summary(EmployeeSummary.JOB_ROLE, employee.position.job_role_id)
+
+        assert (employee_type.headcount, employee_type.total_salary) == (2, 3000)
+        assert (job_role.headcount, job_role.total_salary) == (1, 3000)
+
+    def test_salary_change_refreshes_the_employee_groups(
+        self, department, employee, salaries, after_commit
+    ):
+        with after_commit():
+            employee.salary = Decimal('4000')
+            employee.save()
+
+        row = summary(EmployeeSummary.DEPARTMENT, department.id)
+        assert row.total_salary == Decimal('9000')
+        assert summary(
+            EmployeeSummary.JOB_ROLE, employee.position.job_role_id
+        ).total_salary == Decimal('4000')
+
+    def test_moving_departments_refreshes_both(
+        self, company, department, employee, salaries, after_commit
+    ):
+        sales = Department.objects.create(name='Sales', company=company)
+
+        with after_commit():
+            employee.department.set([sales])
+
+        assert summary(EmployeeSummary.DEPARTMENT, sales.id).headcount == 1
+        assert summary(EmployeeSummary.DEPARTMENT, department.id).headcount == 2
+
+    def test_deleted_employee_leaves_the_summary(
+        self, department, employee, salaries, after_commit
+    ):
+        with after_commit():
+            employee.delete()
+
+        assert summary(EmployeeSummary.DEPARTMENT, department.id).headcount == 2
+        assert summary(EmployeeSummary.JOB_ROLE, employee.position.job_role_id) is None
+
+    def test_renames_are_copied(self, department, salaries):
+        department.name = 'R&D'
+        department.save()
+
+        assert summary(EmployeeSummary.DEPARTMENT, department.id).name == 'R&D'
+
+    def test_incremental_rows_match_a_rebuild(
+        self, company, employee, other_employee, salaries, after_commit
+    ):
+        sales = Department.objects.create(name='Sales', company=company)
+        with after_commit():
+            other_employee.salary = Decimal('1000')
+            other_employee.save()
+            employee.department.add(sales)
+            sales.employees.add(other_employee)
+        incremental = set(EmployeeSummary.objects.values_list(*FIELDS))
+
+        out = io.StringIO()
+        call_command('rebuild_employee_summaries', stdout=out)
+
+        assert set(EmployeeSummary.objects.values_list(*FIELDS)) == incremental
+        assert f'Rebuilt {len(incremental)} summary row(s)' in out.getvalue()
+
+    def test_groups_of_an_employee_are_read_in_one_query(self, employee, department):
+        with CaptureQueriesContext(connection) as queries:
+            groups = summaries.employee_groups(employee.pk)
+
+        # Silk, enabled in dev settings, may add an EXPLAIN of it.
+        assert len([q for q in queries if q['sql'].startswith('SELECT')]) == 1
+        assert (
+            employee.company_id, EmployeeSummary.DEPARTMENT, department.id
+        ) in groups
+
+
+@pytest.mark.django_db
+class TestDepartmentSummaryEndpoint:
+
+    def test_staff_get_their_company_summary(
+        self, authenticated_manager_client, department, salaries
+    ):
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_manager_client.get(URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        [engineering] = response.data['departments']
+        assert engineering == {
+            'id': department.id,
+            'name': 'Engineering',
+            'headcount': 3,
+            'total_salary': '8000.00',
+            'average_salary': '4000.00',
+        }
+        assert len(response.data['employee_types']) == 2
+        assert len(response.data['job_roles']) == 3
+        summary_queries = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "api_employeesummary"')
+        ]
+        assert len(summary_queries) == 1
+
+    def test_other_companies_are_not_included(
+        self, authenticated_manager_client, salaries
+    ):
+        EmployeeSummary.objects.create(
+            company=Company.objects.create(name='Other'),
+            dimension=EmployeeSummary.DEPARTMENT,
+            key_id=999,
+            headcount=1,
+        )
+
+        response = authenticated_manager_client.get(URL)
+
+        assert 999 not in [row['id'] for row in response.data['departments']]
+
+    def test_regular_employees_are_forbidden(self, authenticated_employee_client):
+        response = authenticated_employee_client.get(URL)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
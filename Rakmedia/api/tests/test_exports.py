@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Task
+
+
+def read_stream(response):
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestEmployeeExport:
+
+    def test_manager_exports_department_as_csv(
+        self, authenticated_manager_client, manager_employee, employee, other_employee
+    ):
+        # Non-staff managers only see their departments.
+        manager_employee.user.is_staff = False
+        manager_employee.user.save()
+        employee.salary = 1500
+        employee.save()
+
+        response = authenticated_manager_client.get(
+            reverse('employee-export', args=['csv'])
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/csv'
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert {row['username'] for row in rows} == {'employee', 'other'}
+
+        row = next(row for row in rows if row['username'] == 'employee')
+        assert row['employee_code'] == employee.formatted_employee_code
+        assert row['departments'] == 'Engineering'
+        assert row['job_role'] == 'Developer'
+        assert row['salary'] == '1500.00'
+
+    def test_export_applies_employee_filters(
+        self, authenticated_manager_client, employee, other_employee
+    ):
+        response = authenticated_manager_client.get(
+            reverse('employee-export', args=['ndjson']),
+            {'first_name__iexact': 'other'},
+        )
+
+        lines = read_stream(response).splitlines()
+        assert [json.loads(line)['username'] for line in lines] == ['other']
+
+    def test_invalid_filters_are_rejected(self, authenticated_manager_client):
+        response = authenticated_manager_client.get(
+            reverse('employee-export', args=['csv']), {'salary__gt': 'abc'}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'salary__gt' in response.data
+
+    def test_regular_employee_exports_nobody(
+        self, authenticated_employee_client, other_employee
+    ):
+        response = authenticated_employee_client.get(
+            reverse('employee-export', args=['ndjson'])
+        )
+        assert read_stream(response) == ''
+
+    def test_unknown_format_is_not_found(self, authenticated_manager_client):
+        response = authenticated_manager_client.get(
+            reverse('employee-export', args=['xlsx'])
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestTaskExport:
+
+    def test_employee_exports_own_tasks_with_file_counts(
+        self, authenticated_employee_client, employee, other_employee,
+        manager_employee, task_file_uploaded_by_other,
+    ):
+        Task.objects.create(
+            title='Mine', assigned_to=employee, assigned_by=manager_employee
+        )
+        Task.objects.create(title='Not mine', assigned_to=other_employee)
+
+        response = authenticated_employee_client.get(
+            reverse('task-export', args=['ndjson'])
+        )
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['title'] for row in rows] == ['Mine']
+        assert rows[0]['assigned_by_name'] == 'manager'
+        assert rows[0]['file_count'] == 0
+
+    def test_staff_exports_every_task(
+        self, authenticated_manager_client, task_file_uploaded_by_other
+    ):
+        response = authenticated_manager_client.get(
+            reverse('task-export', args=['csv'])
+        )
+
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert [row['file_count'] for row in rows] == ['1']
+
+    def test_export_requires_auth(self, client):
+        response = client.get(reverse('task-export', args=['csv']))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_export_data_command(employee, other_employee):
+    out = io.StringIO()
+    call_command(
+        'export_data', 'employees', '--format', 'ndjson',
+        '--filter', 'last_name__iexact=user', stdout=out, stderr=io.StringIO(),
+    )
+
+    usernames = {json.loads(line)['username'] for line in out.getvalue().splitlines()}
+    assert usernames == {'employee', 'other'}
+
+
+@pytest.mark.django_db
+def test_export_data_command_rejects_invalid_filters(employee):
+    with pytest.raises(CommandError, match='salary__gt'):
+        call_command(
+            'export_data', 'employees', '--filter', 'salary__gt=abc',
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
@@ -0,0 +1,139 @@
+import datetime
+
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import Employee, Task, TaskFile
+
+
+@pytest.fixture
+def tasks(manager_employee, employee, other_employee, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    done = Task.objects.create(
+        title='Done', description='All good', assigned_to=employee,
+        assigned_by=manager_employee, due_date=datetime.date(2030, 1, 31),
+        completed=True,
+    )
+    Task.objects.create(title='Open', assigned_to=employee)
+    Task.objects.create(
+        title='Other', assigned_to=other_employee, assigned_by=manager_employee
+    )
+    TaskFile.objects.create(
+        task=done, uploaded_by=employee, description='Report',
+        file=ContentFile(b'x', name='report.txt'),
+    )
+    # Uploader deleted: 'Unknown'.
+    TaskFile.objects.create(task=done, file=ContentFile(b'y', name='notes.txt'))
+
+
+@pytest.fixture
+def employee_without_user(company, department):
+    employee = Employee.objects.create(
+        first_name='No', last_name='Account', company=company, employee_code=7
+    )
+    employee.department.set([department])
+    Employee.objects.filter(pk=employee.pk).update(user=None)
+    return employee
+
+
+def both(client, settings, url, **params):
+    """The same request served by the DRF serializer and by the values() one."""
+    responses = []
+    for fast in (False, True):
+        settings.FAST_LIST_SERIALIZERS = fast
+        cache.clear()
+        response = client.get(url, params)
+        assert response.status_code == 200
+        responses.append(response.json())
+    return responses
+
+
+@pytest.mark.django_db
+class TestValuesSerializerContract:
+
+    @pytest.mark.parametrize('params', [
+        {},
+        {'fields': 'id,title,files'},
+        {'omit': 'files,assigned_by_name'},
+        {'completed': 'true'},
+    ])
+    def test_tasks(self, authenticated_employee_client, settings, tasks, params):
+        drf, fast = both(
+            authenticated_employee_client, settings, '/api/tasks/', **params
+        )
+
+        assert fast == drf
+
+    def test_tasks_have_their_files_and_null_relations(
+        self, authenticated_employee_client, settings, tasks
+    ):
+        _, fast = both(authenticated_employee_client, settings, '/api/tasks/')
+
+        rows = fast['results'] if isinstance(fast, dict) else fast
+        done = next(row for row in rows if row['title'] == 'Done')
+        assert [f['uploaded_by_name'] for f in done['files']] == [
+            'Employee User', 'Unknown',
+        ]
+        assert done['due_date'] == '2030-01-31'
+        # No assigning manager, so no name either (the serializer skips it too).
+        opened = next(row for row in rows if row['title'] == 'Open')
+        assert opened['assigned_by'] is None
+        assert 'assigned_by_name' not in opened
+
+    def test_manager_tasks(self, authenticated_manager_client, settings, tasks):
+        drf, fast = both(authenticated_manager_client, settings, '/api/manager-tasks/')
+
+        assert fast == drf
+
+    def test_task_files(self, authenticated_manager_client, settings, tasks):
+        task = Task.objects.get(title='Done')
+
+        drf, fast = both(
+            authenticated_manager_client, settings, f'/api/tasks/{task.id}/files/'
+        )
+
+        assert fast == drf
+
+    @pytest.mark.parametrize('params', [
+        {}, {'omit': 'username'}, {'ordering': '-employee_code'},
+    ])
+    def test_department_employees(
+        self, authenticated_manager_client, settings, employee, other_employee,
+        employee_without_user, params,
+    ):
+        drf, fast = both(
+            authenticated_manager_client, settings, '/api/department-employees/',
+            **params,
+        )
+
+        assert fast == drf
+
+    def test_employee_list(self, settings, employee, employee_without_user):
+        drf, fast = both(APIClient(), settings, '/api/employees/', size=10)
+
+        assert fast == drf
+
+
+@pytest.mark.django_db
+class TestValuesSerializerQueries:
+
+    def test_tasks_with_files_take_two_queries(
+        self, authenticated_employee_client, settings, tasks
+    ):
+        settings.FAST_LIST_SERIALIZERS = True
+
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_employee_client.get('/api/tasks/')
+
+        task_queries = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and '"silk_' not in query['sql']
+            and '"api_task' in query['sql']
+            and 'COUNT(' not in query['sql']
+        ]
+        assert len(task_queries) == 2
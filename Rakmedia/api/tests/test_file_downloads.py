@@ -0,0 +1,113 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Task, TaskFile
+
+CONTENT = b'0123456789' * 10
+
+
+@pytest.fixture
+def task_file(settings, tmp_path, employee, other_employee):
+    settings.MEDIA_ROOT = tmp_path
+    task = Task.objects.create(
+        title='Video', assigned_to=employee, assigned_by=employee
+    )
+    return TaskFile.objects.create(
+        task=task,
+        uploaded_by=employee,
+        file=SimpleUploadedFile('cut.mp4', CONTENT, content_type='video/mp4'),
+    )
+
+
+def download_url(task_file):
+    return reverse('task-file-download', args=[task_file.task_id, task_file.id])
+
+
+def read(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestTaskFileDownload:
+
+    def test_assignee_downloads_whole_file(
+        self, authenticated_employee_client, task_file
+    ):
+        response = authenticated_employee_client.get(download_url(task_file))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert read(response) == CONTENT
+        assert response['Content-Type'] == 'video/mp4'
+        assert response['Accept-Ranges'] == 'bytes'
+        assert 'attachment' in response['Content-Disposition']
+        assert response['ETag']
+
+    def test_range_request_returns_partial_content(
+        self, authenticated_employee_client, task_file
+    ):
+        response = authenticated_employee_client.get(
+            download_url(task_file), HTTP_RANGE='bytes=10-19'
+        )
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Range'] == f'bytes 10-19/{len(CONTENT)}'
+        assert read(response) == CONTENT[10:20]
+
+    def test_suffix_range_and_unsatisfiable_range(
+        self, authenticated_employee_client, task_file
+    ):
+        response = authenticated_employee_client.get(
+            download_url(task_file), HTTP_RANGE='bytes=-5'
+        )
+        assert read(response) == CONTENT[-5:]
+
+        response = authenticated_employee_client.get(
+            download_url(task_file), HTTP_RANGE='bytes=500-'
+        )
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+    def test_conditional_requests_return_not_modified(
+        self, authenticated_employee_client, task_file
+    ):
+        first = authenticated_employee_client.get(download_url(task_file))
+
+        by_etag = authenticated_employee_client.get(
+            download_url(task_file), HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        by_date = authenticated_employee_client.get(
+            download_url(task_file), HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+        )
+
+        assert by_etag.status_code == status.HTTP_304_NOT_MODIFIED
+        assert by_date.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_nginx_accel_redirect(
+        self, authenticated_employee_client, task_file, settings
+    ):
+        settings.FILE_DOWNLOAD_ACCEL = 'nginx'
+
+        response = authenticated_employee_client.get(download_url(task_file))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Accel-Redirect'] == f'/protected-media/{task_file.file.name}'
+        assert response.content == b''
+
+    def test_unrelated_employee_gets_not_found(
+        self, authenticated_employee_client, task_file, other_employee
+    ):
+        task_file.task.assigned_to = other_employee
+        task_file.task.assigned_by = other_employee
+        task_file.task.save()
+        task_file.uploaded_by = other_employee
+        task_file.save()
+
+        response = authenticated_employee_client.get(download_url(task_file))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_manager_downloads_any_file(
+        self, authenticated_manager_client, task_file
+    ):
+        response = authenticated_manager_client.get(download_url(task_file))
+        assert read(response) == CONTENT
@@ -1,5 +1,3 @@
-import random
-
 import pytest
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -34,7 +32,6 @@ class TestFunctionalAPI:
             first_name="Manager",
             last_name="User",
             company=self.company,
-            employee_code=f"{random.randint(0, 999):03}",
 
         )
 
@@ -43,7 +40,6 @@ class TestFunctionalAPI:
             first_name="Employee",
             last_name="User",
             company=self.company,
-            employee_code=f"{random.randint(0, 999):03}",
         )
 
         self.department = Department.objects.create(
@@ -115,7 +111,6 @@ class TestFunctionalAPI:
             first_name="Other",
             last_name="User",
             company=self.company,
-            employee_code=f"{random.randint(0, 999):03}",
         )
 
         task = Task.objects.create(
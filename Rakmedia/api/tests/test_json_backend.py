@@ -0,0 +1,121 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from api.models import Employee, Task
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+
+PAYLOAD = {
+    'salary': decimal.Decimal('1234.50'),
+    'hire_date': datetime.date(2024, 2, 29),
+    'created_at': datetime.datetime(
+        2024, 2, 29, 13, 45, 1, 123456, tzinfo=datetime.UTC
+    ),
+    'naive': datetime.datetime(2024, 2, 29, 13, 45),
+    'local': timezone.localtime(
+        datetime.datetime(2024, 2, 29, 13, 45, tzinfo=datetime.UTC)
+    ),
+    'time': datetime.time(9, 30, 15),
+    'duration': datetime.timedelta(hours=1, seconds=2),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Manager'),
+    'text': 'Ünïcode, quotes " and separators \u2028\u2029',
+    'numbers': [1, -2, 3.5, 0.1, None, True, False],
+    'nested': ReturnDict({'files': ReturnList([{'id': 1}], serializer=None)},
+                         serializer=None),
+    1: 'integer key',
+}
+
+
+class TestORJSONRenderer:
+
+    def test_same_bytes_as_drf(self):
+        assert ORJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_integers_past_64_bits_are_left_to_drf(self):
+        data = {'big': 2 ** 70}
+
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_float_differences(self):
+        # Documented in api/renderers.py.
+        assert ORJSONRenderer().render([1e16, 1e-07]) == b'[1e16,1e-7]'
+        assert ORJSONRenderer().render([float('nan')]) == b'[null]'
+
+    def test_none_renders_empty(self):
+        assert ORJSONRenderer().render(None) == b''
+
+    def test_indent_is_left_to_drf(self):
+        rendered = ORJSONRenderer().render(
+            PAYLOAD, accepted_media_type='application/json; indent=2'
+        )
+
+        assert rendered == JSONRenderer().render(
+            PAYLOAD, accepted_media_type='application/json; indent=2'
+        )
+
+
+class TestORJSONParser:
+
+    def parse(self, parser, body, **context):
+        return parser.parse(io.BytesIO(body), parser_context=context)
+
+    def test_same_result_as_drf(self):
+        body = JSONRenderer().render({
+            'title': 'Ünïcode', 'due_date': '2030-01-31', 'salary': 1234.5, 'ids': [1],
+        })
+
+        assert self.parse(ORJSONParser(), body) == self.parse(JSONParser(), body)
+
+    def test_invalid_json_is_a_parse_error(self):
+        with pytest.raises(ParseError):
+            self.parse(ORJSONParser(), b'{"title": ')
+
+    def test_other_charsets_use_drf_parser(self):
+        body = '{"title": "Ünïcode"}'.encode('latin-1')
+
+        assert self.parse(ORJSONParser(), body, encoding='latin-1') == {
+            'title': 'Ünïcode'
+        }
+
+
+@pytest.mark.django_db
+class TestJSONBackendInViews:
+
+    def test_api_uses_the_configured_renderer(self, authenticated_employee_client):
+        response = authenticated_employee_client.get('/api/employees/me/')
+
+        assert isinstance(response.accepted_renderer, ORJSONRenderer)
+        assert response.content == JSONRenderer().render(response.data)
+
+    def test_json_bodies_are_parsed(
+        self, authenticated_manager_client, employee, manager_employee
+    ):
+        response = authenticated_manager_client.post(
+            '/api/manager-tasks/',
+            {'title': 'Ünïcode', 'assigned_to': employee.id, 'due_date': '2030-01-31'},
+            format='json',
+        )
+
+        assert response.status_code == 201
+        task = Task.objects.get(title='Ünïcode')
+        assert task.assigned_to == employee
+        assert task.assigned_by == manager_employee
+
+    def test_cached_responses_render_the_same(self, authenticated_employee_client):
+        first = authenticated_employee_client.get('/api/employees/me/')
+        Employee.objects.update(first_name='Changed')  # Skips the invalidation.
+
+        second = authenticated_employee_client.get('/api/employees/me/')
+
+        assert second.content == first.content
@@ -0,0 +1,186 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.models import Department, Task
+from api.services import dashboard
+from api.utils import cache_signals, metrics
+
+URL = reverse('api_manager_dashboard')
+
+
+@pytest.fixture
+def tasks(manager_employee, employee, other_employee):
+    today = timezone.localdate()
+    Task.objects.create(
+        title='Late', assigned_to=employee, assigned_by=manager_employee,
+        due_date=today - datetime.timedelta(days=1),
+    )
+    Task.objects.create(
+        title='Done', assigned_to=employee, assigned_by=manager_employee,
+        due_date=today - datetime.timedelta(days=1), completed=True,
+    )
+    Task.objects.create(
+        title='Upcoming', assigned_to=other_employee, assigned_by=manager_employee,
+        due_date=today + datetime.timedelta(days=1),
+    )
+    # Assigned by someone else, not on the manager's dashboard.
+    Task.objects.create(
+        title='Elsewhere', assigned_to=employee, assigned_by=other_employee
+    )
+
+
+@pytest.fixture
+def precise_invalidation_only(monkeypatch, commit_pending):
+    # Turns off the cache_response invalidation: only the dashboard versions are used.
+    monkeypatch.setattr(
+        cache_signals, 'invalidate_cache_by_prefix', lambda prefix: None
+    )
+    commit_pending()  # The fixtures' changes.
+
+
+def app_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT') and '"silk_' not in query['sql']
+    ]
+
+
+def members_by_name(response):
+    return {
+        member['first_name']: member for member in response.data['team']['results']
+    }
+
+
+@pytest.mark.django_db
+class TestManagerDashboard:
+
+    def test_returns_profile_team_and_task_counts(
+        self, authenticated_manager_client, manager_employee, tasks
+    ):
+        response = authenticated_manager_client.get(URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['profile']['id'] == manager_employee.id
+        assert response.data['team']['count'] == 2
+        members = members_by_name(response)
+        # Member counters cover all their tasks, also ones assigned by someone else.
+        assert members['Employee']['task_stats'] == {
+            'open': 2, 'completed': 1, 'overdue': 1, 'files': 0,
+        }
+        assert members['Other']['task_stats'] == {
+            'open': 1, 'completed': 0, 'overdue': 0, 'files': 0,
+        }
+        assert response.data['task_totals'] == {
+            'open': 2, 'completed': 1, 'overdue': 1,
+        }
+
+    def test_team_counts_are_read_not_counted(
+        self, authenticated_manager_client, tasks
+    ):
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_manager_client.get(URL)
+
+        sql = app_queries(queries)
+        # Only the manager's totals still aggregate the tasks table.
+        [totals] = [query for query in sql if 'FROM "api_task"' in query]
+        assert 'GROUP BY' not in totals
+        assert any('"api_employeetaskstats"' in query for query in sql)
+
+    def test_team_is_paginated(
+        self, authenticated_manager_client, employee, other_employee
+    ):
+        response = authenticated_manager_client.get(URL, {'page_size': 1, 'page': 2})
+
+        assert response.data['team']['count'] == 2
+        assert len(response.data['team']['results']) == 1
+        assert response.data['team']['next'] is None
+        assert response.data['team']['results'][0]['task_stats'] == {
+            'open': 0, 'completed': 0, 'overdue': 0, 'files': 0,
+        }
+
+    def test_regular_employees_are_forbidden(self, authenticated_employee_client):
+        response = authenticated_employee_client.get(URL)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_cached_response_skips_the_database(
+        self, authenticated_manager_client, tasks
+    ):
+        lookups = metrics.CACHE_REQUESTS.values
+        hits = lookups.get((dashboard.CACHE_PREFIX, 'hit'), 0)
+        misses = lookups.get((dashboard.CACHE_PREFIX, 'miss'), 0)
+        first = authenticated_manager_client.get(URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = authenticated_manager_client.get(URL)
+
+        assert second.data == first.data
+        assert lookups[(dashboard.CACHE_PREFIX, 'miss')] == misses + 1
+        assert lookups[(dashboard.CACHE_PREFIX, 'hit')] == hits + 1
+        # Only the JWT user lookup is left (Silk, enabled in dev, adds its own queries).
+        assert len(app_queries(queries)) == 1
+
+
+@pytest.mark.django_db
+class TestManagerDashboardInvalidation:
+
+    @pytest.fixture
+    def other_manager(self, manager_employee, company):
+        # Same position as manager_employee, but in another department.
+        other = Department.objects.create(name='Sales', company=company)
+        manager = type(manager_employee).objects.create(
+            first_name='Sales', last_name='Manager', company=company,
+            employee_code=1, position=manager_employee.position,
+        )
+        manager.department.set([other])
+        return manager
+
+    def keys(self, *employees):
+        return [dashboard.cache_key(e.user_id, URL) for e in employees]
+
+    def test_new_task_only_expires_the_assigning_manager(
+        self, manager_employee, other_manager, employee, precise_invalidation_only,
+        django_capture_on_commit_callbacks,
+    ):
+        before = self.keys(manager_employee, other_manager)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Task.objects.create(
+                title='New', assigned_to=employee, assigned_by=manager_employee
+            )
+
+        after = self.keys(manager_employee, other_manager)
+        assert after[0] != before[0]
+        assert after[1] == before[1]
+
+    def test_moving_an_employee_expires_old_and_new_managers(
+        self, manager_employee, other_manager, employee, precise_invalidation_only,
+        django_capture_on_commit_callbacks,
+    ):
+        before = self.keys(manager_employee, other_manager, employee)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            employee.department.set(other_manager.department.all())
+
+        after = self.keys(manager_employee, other_manager, employee)
+        assert all(a != b for a, b in zip(after, before, strict=True))
+
+    def test_expired_dashboard_is_rebuilt(
+        self, authenticated_manager_client, manager_employee, employee,
+        precise_invalidation_only, django_capture_on_commit_callbacks,
+    ):
+        authenticated_manager_client.get(URL)
+        with django_capture_on_commit_callbacks(execute=True):
+            Task.objects.create(
+                title='New', assigned_to=employee, assigned_by=manager_employee
+            )
+
+        response = authenticated_manager_client.get(URL)
+
+        assert response.data['task_totals']['open'] == 1
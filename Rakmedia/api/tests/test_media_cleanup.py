@@ -0,0 +1,119 @@
+import io
+import os
+import time
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Employee, Task, TaskFile
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def legacy_file(media, employee, manager_employee):
+    task = Task.objects.create(
+        title='Old', assigned_to=employee, assigned_by=manager_employee
+    )
+    return TaskFile.objects.create(
+        task=task, uploaded_by=employee, file=ContentFile(b'old', name='old.txt')
+    )
+
+
+def age(path, seconds=7200):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+@pytest.mark.django_db
+class TestDeferredDeletion:
+
+    def test_file_is_deleted_after_commit(
+        self, authenticated_employee_client, legacy_file, sync_outbox,
+        django_capture_on_commit_callbacks,
+    ):
+        path = legacy_file.file.path
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = authenticated_employee_client.delete(
+                reverse('task-file-delete', args=[legacy_file.task_id, legacy_file.id])
+            )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert os.path.exists(path)
+
+        for callback in callbacks:
+            callback()
+        assert not os.path.exists(path)
+
+    def test_rolled_back_delete_keeps_the_file(self, legacy_file, sync_outbox):
+        path = legacy_file.file.path
+
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                legacy_file.delete()
+                raise RuntimeError
+
+        assert os.path.exists(path)
+
+    def test_cascading_deletes_clean_up_storage(
+        self, legacy_file, employee, media, sync_outbox,
+        django_capture_on_commit_callbacks,
+    ):
+        employee.profile_picture.save('me.png', ContentFile(b'me'), save=False)
+        # update() skips post_save, so no rendition job joins the outbox batch.
+        Employee.objects.filter(pk=employee.pk).update(
+            profile_picture=employee.profile_picture.name
+        )
+        picture = employee.profile_picture.path
+
+        with django_capture_on_commit_callbacks(execute=True):
+            legacy_file.task.delete()
+            employee.delete()
+
+        assert not os.path.exists(legacy_file.file.path)
+        assert not os.path.exists(picture)
+
+
+@pytest.mark.django_db
+class TestSweepOrphanedFiles:
+
+    @pytest.fixture
+    def orphans(self, media, legacy_file):
+        orphan_dir = media / 'task_files'
+        old_orphan = orphan_dir / 'orphan.txt'
+        new_orphan = orphan_dir / 'just-uploaded.txt'
+        old_orphan.write_bytes(b'x' * 10)
+        new_orphan.write_bytes(b'y')
+        age(old_orphan)
+        age(legacy_file.file.path)
+        return old_orphan, new_orphan
+
+    def test_dry_run_reports_without_deleting(self, orphans, legacy_file):
+        old_orphan, _ = orphans
+        out = io.StringIO()
+
+        call_command('sweep_orphaned_files', '--dry-run', stdout=out)
+
+        assert 'task_files/orphan.txt' in out.getvalue()
+        assert 'would delete 1 orphaned file(s) (10\xa0bytes)' in out.getvalue()
+        assert old_orphan.exists()
+
+    def test_deletes_only_old_unreferenced_files(self, orphans, legacy_file):
+        old_orphan, new_orphan = orphans
+        out = io.StringIO()
+
+        call_command('sweep_orphaned_files', '--batch-size', '1', stdout=out)
+
+        assert 'Deleted 1 orphaned file(s)' in out.getvalue()
+        assert 'out of 2 scanned' in out.getvalue()
+        assert not old_orphan.exists()
+        assert new_orphan.exists()
+        assert os.path.exists(legacy_file.file.path)
@@ -0,0 +1,158 @@
+import re
+
+import pytest
+from django.core.cache import cache, caches
+from django.test import Client
+from django.urls import reverse
+from django_q.tasks import async_task
+
+from api.utils import metrics
+
+METRICS_URL = '/api/metrics/'
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(settings):
+    settings.METRICS_TOKEN = 'scrape-token'
+    caches[settings.METRICS_CACHE].clear()
+    for metric in metrics.registry.metrics:
+        metric.values.clear()
+    metrics.registry.slot = None
+    metrics.registry.pushed_at = None
+
+
+def scrape():
+    response = Client().get(METRICS_URL, HTTP_AUTHORIZATION='Bearer scrape-token')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    return response.content.decode()
+
+
+def sample(text, name, **labels):
+    """The value of the `name` sample with (at least) these labels, or None."""
+    for line in text.splitlines():
+        match = re.fullmatch(r'(\w+)(?:\{(.*)\})? (\S+)', line)
+        if not match or match[1] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match[2] or ''))
+        if labels.items() <= found.items():
+            return float(match[3])
+    return None
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_latency_and_sql(self, authenticated_employee_client):
+        authenticated_employee_client.get(reverse('employee-tasks'))
+
+        text = scrape()
+        request = {'view': 'employee-tasks', 'method': 'GET'}
+        assert sample(text, 'http_request_duration_seconds_count', **request) == 1
+        assert sample(
+            text, 'http_request_duration_seconds_bucket', le='+Inf', **request
+        ) == 1
+        assert sample(text, 'http_responses_total', status='2xx', **request) == 1
+        assert sample(
+            text, 'http_request_db_queries_count', view='employee-tasks'
+        ) == 1
+        assert sample(text, 'http_request_db_queries_sum', view='employee-tasks') > 0
+        assert sample(
+            text, 'http_request_db_duration_seconds_sum', view='employee-tasks'
+        ) > 0
+
+    def test_cache_hits_and_misses_per_prefix(self, authenticated_employee_client):
+        authenticated_employee_client.get(reverse('employee-tasks'))
+        authenticated_employee_client.get(reverse('employee-tasks'))
+        authenticated_employee_client.get(reverse('employee-tasks') + '?page=2')
+
+        text = scrape()
+        hits = sample(
+            text, 'api_cache_requests_total', prefix='task_list', result='hit'
+        )
+        misses = sample(
+            text, 'api_cache_requests_total', prefix='task_list', result='miss'
+        )
+        assert (hits, misses) == (1, 2)
+
+    def test_enqueued_tasks(self, db):
+        async_task('api.tasks.flush_welcome_emails')
+        async_task('api.tasks.flush_welcome_emails')
+
+        text = scrape()
+        assert sample(
+            text, 'django_q_tasks_enqueued_total', func='api.tasks.flush_welcome_emails'
+        ) == 2
+
+    def test_label_sets_are_bounded(self, db, settings):
+        settings.METRICS_MAX_SERIES = 2
+        for prefix in ('a', 'b', 'c', 'd', 'a'):
+            metrics.record_cache_lookup(prefix, hit=True)
+
+        text = scrape()
+        assert sample(text, 'api_cache_requests_total', prefix='a') == 2
+        assert sample(text, 'api_cache_requests_total', prefix='b') == 1
+        assert sample(text, 'api_cache_requests_total', prefix=metrics.OTHER) == 2
+
+    def test_values_of_other_processes_are_served_per_worker(self, db, settings):
+        metrics.record_cache_lookup('task_list', hit=True)
+        # Another worker's values, as pushed to its slot.
+        caches[settings.METRICS_CACHE].set(
+            metrics.SLOT_KEY.format(metrics.PROCESS_SLOTS - 1),
+            ('other', {'api_cache_requests_total': {('task_list', 'hit'): 4}}),
+        )
+
+        text = scrape()
+        hits = {'prefix': 'task_list', 'result': 'hit'}
+        assert sample(text, 'api_cache_requests_total', worker='0', **hits) == 1
+        last = str(metrics.PROCESS_SLOTS - 1)
+        assert sample(text, 'api_cache_requests_total', worker=last, **hits) == 4
+
+    def test_an_expired_worker_does_not_lower_the_others(self, db, settings):
+        slots = caches[settings.METRICS_CACHE]
+        metrics.record_cache_lookup('task_list', hit=True)
+        other = metrics.SLOT_KEY.format(metrics.PROCESS_SLOTS - 1)
+        slots.set(other, ('other', {'api_cache_requests_total': {('x', 'hit'): 4}}))
+        assert len(metrics.registry.collect()['api_cache_requests_total']) == 2
+
+        slots.delete(other)
+
+        assert metrics.registry.collect()['api_cache_requests_total'] == {
+            ('0', 'task_list', 'hit'): 1
+        }
+
+    def test_values_survive_clearing_the_default_cache(self, db):
+        metrics.record_cache_lookup('task_list', hit=True)
+        metrics.registry.push(force=True)
+
+        cache.clear()
+
+        assert metrics.registry.collect()['api_cache_requests_total'] == {
+            ('0', 'task_list', 'hit'): 1
+        }
+
+    def test_expired_slots_are_claimed_again(self, settings):
+        slots = caches[settings.METRICS_CACHE]
+        metrics.registry.push(force=True)
+        assert metrics.registry.slot == 0
+
+        slots.delete(metrics.SLOT_KEY.format(0))
+        metrics.registry.push(force=True)
+        assert metrics.registry.slot == 0
+        assert slots.get(metrics.SLOT_KEY.format(0))[0] == metrics.registry.process_id
+
+        # The slot expired, and another process claimed it before this one pushed.
+        slots.delete(metrics.SLOT_KEY.format(0))
+        slots.add(metrics.SLOT_KEY.format(0), ('other', {}))
+        metrics.registry.push(force=True)
+
+        assert metrics.registry.slot == 1
+        assert slots.get(metrics.SLOT_KEY.format(0)) == ('other', {})
+
+    def test_scrapes_need_the_token(self, client, settings):
+        assert client.get(METRICS_URL).status_code == 403
+        wrong = client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong')
+        assert wrong.status_code == 403
+
+        settings.METRICS_TOKEN = ''
+        assert client.get(METRICS_URL).status_code == 200  # From INTERNAL_IPS.
@@ -0,0 +1,58 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+
+from api.models import Employee
+from api.signals import create_user_for_employee
+
+
+def create_onboarded_employee(company, code=500):
+    employee = Employee.objects.create(
+        first_name='New',
+        last_name='Hire',
+        email='new.hire@example.com',
+        company=company,
+        employee_code=code,
+    )
+    create_user_for_employee(sender=Employee, instance=employee, created=True)
+    employee.refresh_from_db()
+    return employee
+
+
+@pytest.mark.django_db
+class TestOnboardingMode:
+
+    def test_reset_link_mode_creates_unusable_password(self, company, settings):
+        settings.EMPLOYEE_ONBOARDING_MODE = 'reset_link'
+        employee = create_onboarded_employee(company)
+
+        assert employee.user.username == 'new.hire'
+        assert not employee.user.has_usable_password()
+
+    def test_reset_token_stays_valid_for_unusable_password(self, company, settings):
+        settings.EMPLOYEE_ONBOARDING_MODE = 'reset_link'
+        user = create_onboarded_employee(company).user
+
+        token = default_token_generator.make_token(user)
+        assert default_token_generator.check_token(user, token)
+
+        user.set_password('a-new-password')
+        user.save()
+        assert not default_token_generator.check_token(user, token)
+
+    def test_password_mode_keeps_hashed_password(self, company, settings):
+        settings.EMPLOYEE_ONBOARDING_MODE = 'password'
+        employee = create_onboarded_employee(company)
+
+        assert employee.user.has_usable_password()
+
+
+@pytest.mark.django_db
+def test_benchmark_employee_create_rolls_back(company):
+    out = StringIO()
+    call_command('benchmark_employee_create', count=2, stdout=out)
+
+    assert 'reset_link' in out.getvalue()
+    assert not Employee.objects.exists()
@@ -0,0 +1,140 @@
+import pytest
+from django.db import transaction
+from django_q.models import Schedule
+
+from api.models import Employee, PendingWelcomeEmail
+from api.utils import cache_signals, outbox
+
+
+@pytest.fixture
+def invalidations(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cache_signals, 'invalidate_cache_by_prefix', calls.append)
+    return calls
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        outbox, 'async_task', lambda func, *args, **kwargs: calls.append((func, args))
+    )
+    return calls
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_nothing_runs_before_commit(self, invalidations, employee):
+        employee.save()
+        assert invalidations == []
+
+    def test_repeated_saves_produce_one_invalidation(
+        self, django_capture_on_commit_callbacks, invalidations, employee
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            employee.first_name = 'Renamed'
+            employee.save()
+            employee.save()
+
+        # Along with the fixtures' changes, made in the same (test) transaction.
+        assert invalidations.count('Employee') == 1
+
+    def test_rolled_back_savepoint_discards_side_effects(
+        self, django_capture_on_commit_callbacks, invalidations, employee
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError), transaction.atomic():
+                employee.save()
+                raise RuntimeError('rollback')
+
+        assert invalidations == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            employee.save()
+
+        assert invalidations.count('Employee') == 1
+
+    def test_savepoint_rolled_back_after_the_batch_was_started(
+        self, django_capture_on_commit_callbacks, enqueued
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            outbox.enqueue_task('api.tasks.flush_welcome_emails')
+            with pytest.raises(RuntimeError), transaction.atomic():
+                outbox.enqueue_task('api.tasks.sweep_stale_uploads')
+                outbox.on_commit_once('rolled back', lambda: enqueued.append('cb'))
+                raise RuntimeError('rollback')
+            with transaction.atomic():
+                outbox.enqueue_task('api.tasks.refresh_overdue_task_counts')
+
+        assert enqueued == [(
+            'api.utils.outbox.run_task_batch',
+            ([
+                ('api.tasks.flush_welcome_emails', (), {}),
+                ('api.tasks.refresh_overdue_task_counts', (), {}),
+            ],),
+        )]
+
+    def test_capture_after_earlier_writes_of_the_transaction(
+        self, django_capture_on_commit_callbacks, enqueued
+    ):
+        outbox.enqueue_task('api.tasks.sweep_stale_uploads')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            outbox.enqueue_task('api.tasks.flush_welcome_emails')
+
+        # The whole transaction's batch, as its commit would flush it.
+        assert enqueued == [(
+            'api.utils.outbox.run_task_batch',
+            ([
+                ('api.tasks.sweep_stale_uploads', (), {}),
+                ('api.tasks.flush_welcome_emails', (), {}),
+            ],),
+        )]
+
+    def test_tasks_are_coalesced_and_flushed_as_one_batch(
+        self, django_capture_on_commit_callbacks, enqueued
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            outbox.enqueue_task('api.tasks.flush_welcome_emails')
+            outbox.enqueue_task('api.tasks.flush_welcome_emails')
+            outbox.enqueue_task(
+                'api.tasks.send_welcome_with_reset_link',
+                'jane', 'jane@example.com', 'url',
+            )
+
+        assert enqueued == [(
+            'api.utils.outbox.run_task_batch',
+            ([
+                ('api.tasks.flush_welcome_emails', (), {}),
+                (
+                    'api.tasks.send_welcome_with_reset_link',
+                    ('jane', 'jane@example.com', 'url'),
+                    {},
+                ),
+            ],),
+        )]
+
+    def test_runs_immediately_outside_transaction(self, enqueued, monkeypatch):
+        monkeypatch.setattr(
+            transaction.get_connection(), 'in_atomic_block', False
+        )
+        outbox.enqueue_task('api.tasks.flush_welcome_emails')
+
+        assert enqueued == [('api.tasks.flush_welcome_emails', ())]
+
+
+@pytest.mark.django_db
+def test_welcome_email_is_queued_in_transaction(
+    company, django_capture_on_commit_callbacks
+):
+    flushes = Schedule.objects.filter(func='api.tasks.flush_welcome_emails')
+    with django_capture_on_commit_callbacks(execute=True):
+        Employee.objects.create(
+            first_name='New', last_name='Hire', email='new.hire@example.com',
+            company=company, employee_code=321,
+        )
+        assert PendingWelcomeEmail.objects.filter(email='new.hire@example.com').exists()
+        assert not flushes.exists()
+
+    assert flushes.count() == 1
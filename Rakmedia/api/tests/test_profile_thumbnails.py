@@ -0,0 +1,119 @@
+import io
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+
+from api.models import Employee
+from api.services.thumbnails import generate_renditions
+from api.utils import outbox
+
+
+def make_image(size=(800, 600), fmt='PNG', mode='RGBA'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255)[:len(mode)]).save(buffer, fmt)
+    return SimpleUploadedFile(f'me.{fmt.lower()}', buffer.getvalue())
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def upload_picture(client):
+    return client.patch(
+        reverse('employee-profile'),
+        {'profile_picture': make_image()},
+        format='multipart',
+    )
+
+
+@pytest.mark.django_db
+class TestProfilePictureRenditions:
+
+    def test_upload_enqueues_rendition_job_after_commit(
+        self, authenticated_employee_client, media, employee,
+        django_capture_on_commit_callbacks, monkeypatch,
+    ):
+        enqueued = []
+        monkeypatch.setattr(
+            outbox, 'async_task',
+            lambda func, *args, **kwargs: enqueued.append((func, args, kwargs)),
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = upload_picture(authenticated_employee_client)
+
+        assert response.status_code == 200
+        (func, args, _), = enqueued
+        assert func == 'api.tasks.generate_profile_picture_renditions'
+        assert args == (employee.pk,)
+
+    def test_serializer_falls_back_to_original_until_ready(
+        self, authenticated_employee_client, media, employee
+    ):
+        response = upload_picture(authenticated_employee_client)
+
+        original = response.data['profile_picture']
+        renditions = response.data['profile_picture_renditions']
+        assert set(renditions) == {'64', '128', '512'}
+        assert renditions['64'] == {'webp': original, 'jpeg': original}
+
+    def test_job_generates_every_size_and_format(
+        self, authenticated_employee_client, media, employee
+    ):
+        upload_picture(authenticated_employee_client)
+
+        assert generate_renditions(employee.pk) is True
+
+        employee.refresh_from_db()
+        for size, formats in employee.profile_picture_renditions['sizes'].items():
+            for fmt, name in formats.items():
+                with default_storage.open(name) as stored:
+                    image = Image.open(stored)
+                    assert image.size == (int(size), int(size))
+                    assert image.format == fmt.upper()
+
+        response = authenticated_employee_client.get(reverse('employee-profile'))
+        url = response.data['profile_picture_renditions']['128']['webp']
+        assert url.endswith('-128.webp')
+
+        # Already up to date, nothing to do.
+        assert generate_renditions(employee.pk) is False
+
+    def test_new_picture_replaces_old_renditions(
+        self, authenticated_employee_client, media, employee
+    ):
+        upload_picture(authenticated_employee_client)
+        generate_renditions(employee.pk)
+        employee.refresh_from_db()
+        old = employee.profile_picture_renditions['sizes']['64']['jpeg']
+
+        upload_picture(authenticated_employee_client)
+        generate_renditions(employee.pk)
+
+        employee.refresh_from_db()
+        assert employee.profile_picture_renditions['source'] == (
+            employee.profile_picture.name
+        )
+        assert not default_storage.exists(old)
+
+
+@pytest.mark.django_db
+def test_backfill_command_renders_missing_renditions(media, employee, other_employee):
+    for person in (employee, other_employee):
+        person.profile_picture = make_image(fmt='JPEG', mode='RGB')
+        person.save()
+
+    out = io.StringIO()
+    call_command('backfill_profile_thumbnails', '--workers', '0', stdout=out)
+
+    assert 'for 2 of 2 employee(s)' in out.getvalue()
+    assert all(
+        person.profile_picture_renditions.get('sizes')
+        for person in Employee.objects.filter(pk__in=[employee.pk, other_employee.pk])
+    )
@@ -0,0 +1,139 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.models import Company, JobRole
+from api.serializers import EmployeeDetailSerializer
+from api.services import reference_data
+
+
+def app_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT') and '"silk_' not in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestReferenceDataRegistry:
+
+    def test_loads_once_per_process(self, employee):
+        registry = reference_data.registry()
+
+        with CaptureQueriesContext(connection) as queries:
+            assert reference_data.registry() is registry
+
+        assert app_queries(queries) == []
+        position = registry.position(employee.position_id)
+        assert (position.job_role, position.employee_type) == ('Developer', 'employee')
+
+    def test_changes_reload_the_registry(self, employee, settings, commit_pending):
+        def job_role():
+            return reference_data.registry().position(employee.position_id).job_role
+
+        role = JobRole.objects.get(pk=employee.position.job_role_id)
+        assert job_role() == 'Developer'
+
+        role.name = 'Engineer'
+        role.save()
+        assert job_role() == 'Engineer'
+        commit_pending()
+        assert job_role() == 'Engineer'
+
+        # A change made by another process, which bumped the shared version.
+        JobRole.objects.filter(pk=role.pk).update(name='Architect')
+        assert job_role() == 'Engineer'
+        cache.set(reference_data.VERSION_KEY, 'bumped elsewhere', None)
+        assert job_role() == 'Engineer'  # Until the next check of the version.
+        settings.PROCESS_CACHE_CHECK_INTERVAL = 0
+        assert job_role() == 'Architect'
+
+    def test_rolled_back_changes_are_not_kept(self, employee, commit_pending):
+        commit_pending()
+        role = JobRole.objects.get(pk=employee.position.job_role_id)
+        registry = reference_data.registry()
+
+        with pytest.raises(RuntimeError), transaction.atomic():
+            role.name = 'Rolled back'
+            role.save()
+            seen = reference_data.registry()
+            assert seen.position(employee.position_id).job_role == 'Rolled back'
+            with CaptureQueriesContext(connection) as queries:
+                assert reference_data.registry() is seen  # Loaded once.
+            assert app_queries(queries) == []
+            raise RuntimeError
+
+        assert reference_data.registry() is registry
+        assert registry.position(employee.position_id).job_role == 'Developer'
+
+    def test_version_is_checked_once_per_interval(
+        self, employee, monkeypatch, commit_pending
+    ):
+        commit_pending()
+        checked = []
+        get_or_set = cache.get_or_set
+
+        def counting_get_or_set(key, *args, **kwargs):
+            checked.append(key)
+            return get_or_set(key, *args, **kwargs)
+
+        monkeypatch.setattr(cache, 'get_or_set', counting_get_or_set)
+        data = EmployeeDetailSerializer([employee] * 10, many=True).data
+
+        # Once per process cache (reference data, role rules), not per field or row.
+        assert len(data) == 10
+        assert sorted(checked) == sorted(set(checked))
+        assert reference_data.VERSION_KEY in checked
+
+    def test_default_company_is_the_first_one(self, company):
+        Company.objects.create(name='Second Company')
+
+        assert reference_data.registry().default_company_id == company.pk
+
+    def test_pinned_registry_stays_inside_the_block(self, db):
+        async def pinned():
+            async with reference_data.pin() as registry:
+                assert reference_data.registry() is registry
+            return registry
+
+        registry = async_to_sync(pinned)()
+
+        assert reference_data._registry.pinned.get() is None
+        assert registry is reference_data.registry()
+
+
+@pytest.mark.django_db
+class TestRegistryConsumers:
+
+    def test_manager_checks_need_no_position_joins(
+        self, authenticated_manager_client, authenticated_employee_client
+    ):
+        reference_data.registry()
+        url = reverse('api_my_dashboard_redirect')
+
+        with CaptureQueriesContext(connection) as queries:
+            manager = authenticated_manager_client.get(url)
+            employee = authenticated_employee_client.get(url)
+
+        assert manager.data == {'redirect_to': '/manager-dashboard/'}
+        assert employee.data == {'redirect_to': '/dashboard/'}
+        assert not any('"api_employeetype"' in sql for sql in app_queries(queries))
+
+    def test_position_names_come_from_the_registry(self, employee, other_employee):
+        other_employee.position = None
+        reference_data.registry()
+
+        with CaptureQueriesContext(connection) as queries:
+            data = EmployeeDetailSerializer(employee).data
+            without_position = EmployeeDetailSerializer(other_employee).data
+
+        assert (data['job_role'], data['employee_type']) == ('Developer', 'employee')
+        assert data['role'] == 'employee'
+        assert not any('"api_jobrole"' in sql for sql in app_queries(queries))
+        # Like a 'position.job_role.name' source through a missing position.
+        assert 'job_role' not in without_position
+        assert 'employee_type' not in without_position
+        assert without_position['role'] == 'employee'
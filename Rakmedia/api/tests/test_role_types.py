@@ -0,0 +1,178 @@
+import importlib
+import io
+
+import pytest
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import (Employee, EmployeePosition, EmployeeType, JobRole,
+                        RoleTypeRule)
+from api.services import role_types
+
+
+def app_queries(queries):
+    return [
+        query for query in queries.captured_queries
+        if query['sql'].startswith('SELECT') and '"silk_' not in query['sql']
+    ]
+
+
+@pytest.fixture
+def types(db):
+    return {
+        name: EmployeeType.objects.create(name=name)
+        for name in ('Officer', 'Manager', 'White Collar', 'Blue Collar')
+    }
+
+
+@pytest.fixture
+def ceo(company, types):
+    role = JobRole.objects.create(name='CEO', company=company)
+    RoleTypeRule.objects.create(job_role=role, employee_type=types['Officer'])
+    return role
+
+
+def position(role, employee_type):
+    return EmployeePosition.objects.get_or_create(
+        job_role=role, employee_type=employee_type
+    )[0]
+
+
+def new_employee(company, position, code):
+    return Employee(
+        first_name='New', last_name=f'Hire {code}', company=company,
+        employee_code=code, position=position,
+    )
+
+
+@pytest.mark.django_db
+class TestRoleTypeMatrix:
+
+    def test_cased_role_names_are_validated(self, company, types, ceo):
+        # 'CEO' never matched the lowercased role name of the old hard-coded map.
+        employee = new_employee(company, position(ceo, types['Blue Collar']), 1)
+        with pytest.raises(ValidationError, match='CEO cannot be assigned to Blue'):
+            employee.clean()
+
+        new_employee(company, position(ceo, types['Officer']), 2).clean()
+
+    def test_roles_without_rules_accept_any_type(self, company, types):
+        role = JobRole.objects.create(name='Intern', company=company)
+
+        new_employee(company, position(role, types['Blue Collar']), 1).clean()
+        new_employee(company, None, 2).clean()
+
+    def test_clean_runs_no_queries_once_loaded(self, company, types, ceo):
+        employee = new_employee(company, position(ceo, types['Officer']), 1)
+        employee.clean()
+
+        with CaptureQueriesContext(connection) as queries:
+            employee.clean()
+
+        assert app_queries(queries) == []
+
+    def test_rule_changes_invalidate_the_matrix(self, company, types, ceo):
+        employee = new_employee(company, position(ceo, types['Manager']), 1)
+        with pytest.raises(ValidationError):
+            employee.clean()
+
+        rule = RoleTypeRule.objects.create(job_role=ceo, employee_type=types['Manager'])
+        employee.clean()
+
+        rule.delete()
+        with pytest.raises(ValidationError):
+            employee.clean()
+
+    def test_other_processes_reload_on_version_change(
+        self, company, types, ceo, settings, commit_pending
+    ):
+        employee = new_employee(company, position(ceo, types['Manager']), 1)
+        commit_pending()
+        with pytest.raises(ValidationError):
+            employee.clean()
+
+        # Another process adds a rule and bumps the shared version.
+        RoleTypeRule.objects.bulk_create(
+            [RoleTypeRule(job_role=ceo, employee_type=types['Manager'])]
+        )
+        with pytest.raises(ValidationError):
+            employee.clean()
+        cache.set(role_types.VERSION_KEY, 'bumped elsewhere', None)
+        settings.PROCESS_CACHE_CHECK_INTERVAL = 0  # The next check of the version.
+
+        employee.clean()
+
+    def test_positions_reject_disallowed_combinations(self, ceo, types):
+        with pytest.raises(ValidationError, match='CEO cannot be assigned to Manager'):
+            EmployeePosition(job_role=ceo, employee_type=types['Manager']).clean()
+
+    def test_bulk_validation_is_one_pass(self, company, types, ceo):
+        valid = position(ceo, types['Officer'])
+        invalid = position(ceo, types['White Collar'])
+        employees = [
+            new_employee(company, invalid if code % 10 == 0 else valid, code)
+            for code in range(1, 2001)
+        ]
+        role_types.invalidate()
+
+        with CaptureQueriesContext(connection) as queries:
+            failures = role_types.invalid_employees(employees)
+
+        # The rules, the positions and the messages' names.
+        assert len(app_queries(queries)) <= 3
+        assert len(failures) == 200
+        assert failures[0] == (
+            employees[9],
+            'Invalid role-type combination: CEO cannot be assigned to White Collar.',
+        )
+
+    def test_bulk_validation_accepts_rows(self, company, types, ceo):
+        invalid = position(ceo, types['Blue Collar'])
+
+        rows = [{'position_id': invalid.pk}, {'position_id': None}]
+
+        failures = role_types.invalid_employees(rows)
+
+        assert [row for row, _ in failures] == [{'position_id': invalid.pk}]
+
+
+@pytest.mark.django_db
+class TestLoadRoleTypeRules:
+
+    def test_loads_defaults_by_name_and_is_idempotent(self, company, types):
+        ceo = JobRole.objects.create(name='CEO', company=company)
+        developer = JobRole.objects.create(name='Backend Developer', company=company)
+        bad = Employee.objects.create(
+            first_name='Wrong', last_name='Type', company=company, employee_code=1,
+            position=position(developer, types['Blue Collar']),
+        )
+
+        out = io.StringIO()
+        call_command('load_role_type_rules', stdout=out)
+
+        assert set(RoleTypeRule.objects.values_list('job_role', 'employee_type')) == {
+            (ceo.pk, types['Officer'].pk), (developer.pk, types['White Collar'].pk),
+        }
+        assert f'{bad} (id {bad.pk})' in out.getvalue()
+        with pytest.raises(ValidationError):
+            bad.clean()
+
+        call_command('load_role_type_rules', stdout=io.StringIO())
+        assert RoleTypeRule.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_migration_loads_the_default_rules(company, types):
+    migration = importlib.import_module('api.migrations.0016_roletyperule')
+    cleaner = JobRole.objects.create(name='Cleaner', company=company)
+
+    migration.load_default_rules(apps, None)
+
+    assert set(RoleTypeRule.objects.values_list('job_role', 'employee_type')) == {
+        (cleaner.pk, types['Blue Collar'].pk),
+    }
+    assert not role_types.is_allowed(cleaner.pk, types['White Collar'].pk)
@@ -0,0 +1,79 @@
+import re
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Company
+from api.utils import server_timing
+
+
+@pytest.fixture(autouse=True)
+def server_timing_enabled(settings):
+    # Before the client fixtures, whose first request loads the middleware.
+    settings.SERVER_TIMING_ENABLED = True
+    settings.SERVER_TIMING_SAMPLE_RATE = 0
+
+
+def parse(header):
+    """{name: (duration, description)} of a Server-Timing header."""
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return metrics
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+
+    def test_staff_users_get_the_breakdown(
+        self, authenticated_employee_client, employee
+    ):
+        employee.user.is_staff = True
+        employee.user.save()
+
+        response = authenticated_employee_client.get(reverse('employee-tasks'))
+
+        metrics = parse(response['Server-Timing'])
+        assert list(metrics) == ['db', 'cache', 'serialize', 'render', 'total']
+        assert re.fullmatch(r'\d+ queries', metrics['db'][1])
+        assert int(metrics['db'][1].split()[0]) > 0
+        assert all(duration >= 0 for duration, _ in metrics.values())
+        parts = sum(
+            duration for name, (duration, _) in metrics.items() if name != 'total'
+        )
+        assert parts <= metrics['total'][0] + 0.1  # Rounding of each part.
+
+    def test_other_users_only_when_sampled(
+        self, authenticated_employee_client, settings
+    ):
+        url = reverse('employee-tasks')
+        assert 'Server-Timing' not in authenticated_employee_client.get(url)
+
+        settings.SERVER_TIMING_SAMPLE_RATE = 1
+        assert 'Server-Timing' in authenticated_employee_client.get(url)
+
+    def test_left_out_unless_enabled(self, admin_user, settings):
+        settings.SERVER_TIMING_ENABLED = False
+        client = APIClient()
+        client.force_authenticate(admin_user)
+
+        response = client.get(reverse('employee-tasks'))
+
+        assert 'Server-Timing' not in response
+
+    def test_queries_inside_a_section_count_as_db_time(self):
+        with server_timing.timing(server_timing.Timings()) as timings:
+            with connection.execute_wrapper(timings):
+                with timings.section('serialize'), timings.section('serialize'):
+                    Company.objects.count()
+
+        assert timings.db_queries == 1
+        # Time is counted once: db, or the section's own time.
+        assert timings.accounted == pytest.approx(
+            timings.db + timings.durations['serialize']
+        )
+        assert server_timing._current.get() is None
@@ -0,0 +1,117 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from silk.models import Request, SQLQuery
+
+from api.middleware import SilkSamplingMiddleware
+from api.models import Company
+
+
+def view(request):
+    # One query, to see whether Silk recorded the request's SQL.
+    Company.objects.count()
+    return HttpResponse('ok')
+
+
+async def async_view(request):
+    await sync_to_async(Company.objects.count)()
+    return HttpResponse('ok')
+
+
+@pytest.fixture
+def silk_settings(settings):
+    settings.SILK_ENABLED = True
+    settings.SILK_SAMPLE_RATE = 0
+    settings.SILK_INCLUDE_PATHS = ['/api/']
+    settings.SILK_EXCLUDE_PATHS = ['/api/schema/']
+    settings.SILK_PROFILE_TOKEN = 'secret'
+    return settings
+
+
+def get(path, user=None, **headers):
+    request = RequestFactory().get(path, headers=headers)
+    request.user = user or AnonymousUser()
+    return request
+
+
+@pytest.mark.django_db
+class TestSilkSampling:
+
+    def test_left_out_when_disabled(self, settings):
+        settings.SILK_ENABLED = False
+
+        with pytest.raises(MiddlewareNotUsed):
+            SilkSamplingMiddleware(view)
+
+    def test_sample_rate(self, silk_settings):
+        middleware = SilkSamplingMiddleware(view)
+
+        middleware(get('/api/employees/'))
+        assert Request.objects.count() == 0
+
+        silk_settings.SILK_SAMPLE_RATE = 1
+        middleware(get('/api/employees/'))
+        assert Request.objects.get().path == '/api/employees/'
+        assert SQLQuery.objects.filter(query__contains='"api_company"').count() == 1
+
+    def test_include_and_exclude_paths(self, silk_settings):
+        silk_settings.SILK_SAMPLE_RATE = 1
+        middleware = SilkSamplingMiddleware(view)
+
+        middleware(get('/admin/'))
+        middleware(get('/api/schema/', **{'X-Silk-Profile': 'secret'}))
+
+        assert Request.objects.count() == 0
+
+    def test_header_opt_in(self, silk_settings, employee, admin_user):
+        middleware = SilkSamplingMiddleware(view)
+
+        middleware(get('/admin/', **{'X-Silk-Profile': 'secret'}))
+        middleware(get('/api/tasks/', **{'X-Silk-Profile': 'wrong'}))
+        middleware(get('/api/tasks/', employee.user, **{'X-Silk-Profile': '1'}))
+        middleware(get('/api/employees/', admin_user, **{'X-Silk-Profile': '1'}))
+
+        assert sorted(Request.objects.values_list('path', flat=True)) == [
+            '/admin/', '/api/employees/'
+        ]
+
+    def test_sql_outside_recorded_requests_is_not_recorded(self, silk_settings):
+        middleware = SilkSamplingMiddleware(view)
+        middleware(get('/api/employees/', **{'X-Silk-Profile': 'secret'}))
+
+        middleware(get('/api/employees/'))
+        Company.objects.count()
+
+        assert SQLQuery.objects.filter(query__contains='"api_company"').count() == 1
+
+    def test_header_opt_in_with_a_jwt(self, silk_settings, employee, admin_user):
+        middleware = SilkSamplingMiddleware(view)
+
+        def profile(path, token):
+            headers = {'X-Silk-Profile': '1', 'Authorization': f'Bearer {token}'}
+            middleware(get(path, **headers))
+
+        profile('/api/tasks/', AccessToken.for_user(employee.user))
+        profile('/api/employees/', AccessToken.for_user(admin_user))
+        profile('/api/', 'not-a-token')
+
+        paths = Request.objects.values_list('path', flat=True)
+        assert list(paths) == ['/api/employees/']
+
+    def test_async_requests(self, silk_settings):
+        middleware = SilkSamplingMiddleware(async_view)
+        assert iscoroutinefunction(middleware)
+
+        async_to_sync(middleware)(get('/api/employees/'))
+        assert Request.objects.count() == 0
+
+        response = async_to_sync(middleware)(
+            get('/api/employees/', **{'X-Silk-Profile': 'secret'})
+        )
+        assert response.content == b'ok'
+        assert Request.objects.get().path == '/api/employees/'
+        assert SQLQuery.objects.filter(query__contains='"api_company"').count() == 1
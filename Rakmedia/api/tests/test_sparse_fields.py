@@ -0,0 +1,157 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.models import Task, TaskFile
+from api.services import reference_data
+
+
+def app_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT') and '"silk_' not in query['sql']
+    ]
+
+
+def rows(response):
+    # Paginated or not depending on the settings module's REST_FRAMEWORK.
+    data = response.data
+    return data['results'] if isinstance(data, dict) else data
+
+
+def get(client, url, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response, app_queries(queries)
+
+
+@pytest.fixture
+def tasks(employee, manager_employee, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    for title in ('A', 'B', 'C'):
+        task = Task.objects.create(
+            title=title, assigned_to=employee, assigned_by=manager_employee
+        )
+        TaskFile.objects.create(
+            task=task, uploaded_by=manager_employee,
+            file=ContentFile(b'x', name=f'{title}.txt'),
+        )
+
+
+@pytest.mark.django_db
+class TestSparseEmployeeFields:
+
+    URL = '/api/employees/me/'
+
+    def test_fields_limits_payload_joins_and_columns(
+        self, authenticated_employee_client
+    ):
+        full, full_sql = get(authenticated_employee_client, self.URL)
+        sparse, sparse_sql = get(
+            authenticated_employee_client, self.URL, fields='id,first_name'
+        )
+
+        assert set(sparse.data) == {'id', 'first_name'}
+        assert sparse.data['first_name'] == full.data['first_name']
+        # No department prefetch, and the employee is read without joins.
+        assert len(sparse_sql) < len(full_sql)
+        [employee_sql] = [sql for sql in sparse_sql if 'FROM "api_employee"' in sql]
+        assert 'JOIN' not in employee_sql.split('WHERE')[0]
+        assert '"api_employee"."salary"' not in employee_sql
+        assert not any('"api_department"' in sql for sql in sparse_sql)
+
+    def test_omit_drops_fields(self, authenticated_employee_client):
+        # Position names come from the registry, loaded once per process.
+        reference_data.registry()
+        response, sql = get(
+            authenticated_employee_client, self.URL, omit='department,role,job_role'
+        )
+
+        assert 'department' not in response.data
+        assert 'role' not in response.data
+        assert response.data['employee_type'] == 'employee'
+        assert not any('"api_department"' in query for query in sql)
+        assert not any('"api_jobrole"' in query for query in sql)
+
+    def test_unknown_fields_are_rejected(self, authenticated_employee_client):
+        response = authenticated_employee_client.get(self.URL, {'fields': 'password'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_writes_ignore_sparse_fields(self, authenticated_employee_client):
+        response = authenticated_employee_client.patch(
+            f'{self.URL}?fields=id', {'first_name': 'Renamed'}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['first_name'] == 'Renamed'
+        assert 'last_name' in response.data
+
+    def test_department_employees_list(
+        self, authenticated_manager_client, employee, other_employee
+    ):
+        response, sql = get(
+            authenticated_manager_client, '/api/department-employees/',
+            fields='id,first_name',
+        )
+
+        assert [set(row) for row in rows(response)] == [
+            {'id', 'first_name'}, {'id', 'first_name'},
+        ]
+        [employees_sql] = [query for query in sql if 'SELECT DISTINCT' in query]
+        assert '"api_user"' not in employees_sql
+
+
+@pytest.mark.django_db
+class TestSparseTaskFields:
+
+    URL = '/api/tasks/'
+
+    def test_full_payload_has_constant_queries(
+        self, authenticated_employee_client, tasks
+    ):
+        response, sql = get(authenticated_employee_client, self.URL)
+
+        results = rows(response)
+        assert len(results) == 3
+        assert results[0]['assigned_by_name'] == 'manager'
+        assert results[0]['files'][0]['uploaded_by_name'] == 'Manager User'
+        # Tasks (usernames joined) and files (uploader joined), whatever the row count.
+        assert len([
+            query for query in sql if '"api_task' in query and 'COUNT(' not in query
+        ]) == 2
+
+    def test_fields_skip_joins_and_prefetches(
+        self, authenticated_employee_client, tasks
+    ):
+        _, full_sql = get(authenticated_employee_client, self.URL)
+        response, sql = get(authenticated_employee_client, self.URL, fields='id,title')
+
+        assert [set(row) for row in rows(response)] == [{'id', 'title'}] * 3
+        assert len(sql) < len(full_sql)
+        assert not any('"api_taskfile"' in query for query in sql)
+        [tasks_sql] = [
+            query for query in sql
+            if 'FROM "api_task"' in query and 'COUNT(' not in query
+        ]
+        assert 'JOIN' not in tasks_sql
+        assert '"api_task"."description"' not in tasks_sql
+
+    def test_task_files_omit(self, authenticated_manager_client, tasks):
+        task = Task.objects.first()
+
+        response, sql = get(
+            authenticated_manager_client, f'/api/tasks/{task.id}/files/',
+            omit='uploaded_by_name,description',
+        )
+
+        [row] = rows(response)
+        assert set(row) == {'id', 'file', 'original_name', 'uploaded_at'}
+        [files_sql] = [
+            query for query in sql
+            if 'FROM "api_taskfile"' in query and 'COUNT(' not in query
+        ]
+        assert 'JOIN' not in files_sql
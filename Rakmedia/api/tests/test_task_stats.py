@@ -0,0 +1,171 @@
+import datetime
+import importlib
+import io
+
+import pytest
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import pre_save
+from django.utils import timezone
+
+from api.models import EmployeeTaskStats, Task, TaskFile
+from api.services import task_stats
+
+YESTERDAY = timezone.localdate() - datetime.timedelta(days=1)
+TOMORROW = timezone.localdate() + datetime.timedelta(days=1)
+
+
+def counters(employee):
+    stats = EmployeeTaskStats.objects.get(employee=employee)
+    return {name: getattr(stats, name) for name in task_stats.STAT_FIELDS}
+
+
+def expected(open_count=0, completed_count=0, overdue_count=0, files_count=0):
+    return {
+        'open_count': open_count,
+        'completed_count': completed_count,
+        'overdue_count': overdue_count,
+        'files_count': files_count,
+    }
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.mark.django_db
+class TestIncrementalCounters:
+
+    def test_new_employees_get_a_counter_row(self, employee):
+        assert counters(employee) == expected()
+
+    def test_create_and_complete(self, employee, manager_employee):
+        task = Task.objects.create(
+            title='T', assigned_to=employee, assigned_by=manager_employee,
+            due_date=YESTERDAY,
+        )
+        assert counters(employee) == expected(open_count=1, overdue_count=1)
+
+        task.completed = True
+        task.save()
+        assert counters(employee) == expected(completed_count=1)
+
+    def test_saving_without_changes_keeps_the_counters(self, employee):
+        task = Task.objects.create(title='T', assigned_to=employee)
+        task.title = 'Renamed'
+        task.save()
+
+        assert counters(employee) == expected(open_count=1)
+
+    def test_due_date_changes_move_overdue(self, employee):
+        task = Task.objects.create(title='T', assigned_to=employee, due_date=TOMORROW)
+        task.due_date = YESTERDAY.isoformat()
+        task.save()
+
+        assert counters(employee) == expected(open_count=1, overdue_count=1)
+
+    def test_reassigning_moves_the_task_and_its_files(
+        self, employee, other_employee, media
+    ):
+        task = Task.objects.create(title='T', assigned_to=employee, due_date=YESTERDAY)
+        TaskFile.objects.create(
+            task=task, uploaded_by=employee, file=ContentFile(b'x', name='x.txt')
+        )
+        assert counters(employee)['files_count'] == 1
+
+        task.assigned_to = other_employee
+        task.save()
+
+        assert counters(employee) == expected()
+        assert counters(other_employee) == expected(
+            open_count=1, overdue_count=1, files_count=1
+        )
+
+    def test_deleting_a_task_removes_it_and_its_files(self, employee, media):
+        task = Task.objects.create(title='T', assigned_to=employee)
+        TaskFile.objects.create(
+            task=task, uploaded_by=employee, file=ContentFile(b'x', name='x.txt')
+        )
+
+        task.delete()
+
+        assert counters(employee) == expected()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_task_saves_lock_in_a_transaction(employee):
+    task = Task.objects.create(title='T', assigned_to=employee)
+    in_transaction = []
+
+    def receiver(sender, instance, **kwargs):
+        in_transaction.append(connection.in_atomic_block)
+
+    pre_save.connect(receiver, sender=Task)
+    try:
+        task.completed = True
+        task.save()
+    finally:
+        pre_save.disconnect(receiver, sender=Task)
+
+    assert in_transaction == [True]
+    assert counters(employee) == expected(completed_count=1)
+
+
+@pytest.mark.django_db
+class TestOverdueRefresh:
+
+    def test_refresh_counts_tasks_that_became_overdue(self, employee):
+        Task.objects.create(title='T', assigned_to=employee, due_date=TOMORROW)
+        # Skips signals, like the passing of a day would.
+        Task.objects.update(due_date=YESTERDAY)
+
+        task_stats.refresh_overdue_counts()
+
+        assert counters(employee) == expected(open_count=1, overdue_count=1)
+
+
+@pytest.mark.django_db
+class TestReconcileTaskStats:
+
+    @pytest.fixture
+    def drifted(self, employee, other_employee):
+        Task.objects.create(title='T', assigned_to=employee)
+        Task.objects.update(completed=True)
+        EmployeeTaskStats.objects.filter(employee=other_employee).delete()
+
+    def test_dry_run_reports_drift(self, drifted, employee, other_employee):
+        out = io.StringIO()
+
+        call_command('reconcile_task_stats', '--dry-run', stdout=out)
+
+        assert (
+            f'Employee {employee.id}: completed_count 0 -> 1, open_count 1 -> 0'
+            in out.getvalue()
+        )
+        assert f'Employee {other_employee.id}:' in out.getvalue()
+        assert '[dry run] found 2 drifted' in out.getvalue()
+        assert counters(employee) == expected(open_count=1)
+
+    def test_fixes_drift_and_missing_rows(self, drifted, employee, other_employee):
+        call_command('reconcile_task_stats', stdout=io.StringIO())
+
+        assert counters(employee) == expected(completed_count=1)
+        assert counters(other_employee) == expected()
+        assert task_stats.reconcile(dry_run=True) == []
+
+    def test_migration_backfills_the_existing_employees(
+        self, drifted, employee, other_employee
+    ):
+        migration = importlib.import_module('api.migrations.0014_employeetaskstats')
+        Task.objects.create(title='Late', assigned_to=employee, due_date=YESTERDAY)
+        EmployeeTaskStats.objects.all().delete()
+
+        migration.backfill_task_stats(apps, None)
+
+        assert counters(employee) == expected(
+            open_count=1, completed_count=1, overdue_count=1
+        )
+        assert counters(other_employee) == expected()
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import connection
+from django.utils import timezone
+from django_q.models import Schedule
+
+from api.models import PendingWelcomeEmail
+from api.tasks import (WELCOME_EMAIL_FLUSH_SCHEDULED_KEY, flush_welcome_emails,
+                       queue_welcome_email)
+
+REJECTED_ADDRESS = 'rejected@example.com'
+
+
+# Counts opened connections and refuses one recipient, like an SMTP server would.
+class RejectingEmailBackend(LocmemEmailBackend):
+    opened = 0
+
+    def open(self):
+        RejectingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if REJECTED_ADDRESS in message.to:
+                raise SMTPRecipientsRefused({REJECTED_ADDRESS: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+# Records what a flush holds while the SMTP server is being talked to.
+class SpyingEmailBackend(LocmemEmailBackend):
+    seen = []
+
+    def send_messages(self, messages):
+        SpyingEmailBackend.seen.append((
+            connection.in_atomic_block,
+            PendingWelcomeEmail.objects.filter(claimed_at__isnull=False).count(),
+        ))
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def email_settings(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.WELCOME_EMAIL_BATCH_SIZE = 10
+    settings.WELCOME_EMAIL_MAX_ATTEMPTS = 2
+    return settings
+
+
+@pytest.mark.django_db
+class TestBatchedWelcomeEmails:
+
+    def test_queue_stores_email_without_sending(self, email_settings):
+        queue_welcome_email('jane', 'jane@example.com', 'http://localhost:3000/reset')
+
+        assert PendingWelcomeEmail.objects.count() == 1
+        assert mail.outbox == []
+
+    def test_flush_sends_all_pending_and_clears_them(self, email_settings):
+        for i in range(3):
+            queue_welcome_email(
+                f'user{i}', f'user{i}@example.com', f'http://localhost:3000/reset/{i}'
+            )
+
+        assert flush_welcome_emails() == (3, 0)
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'user0@example.com', 'user1@example.com', 'user2@example.com',
+        ]
+        assert 'http://localhost:3000/reset/0' in mail.outbox[0].body
+        assert not PendingWelcomeEmail.objects.exists()
+
+    def test_flush_uses_one_connection_per_batch_and_keeps_failures(
+        self, email_settings
+    ):
+        email_settings.EMAIL_BACKEND = f'{__name__}.RejectingEmailBackend'
+        RejectingEmailBackend.opened = 0
+
+        queue_welcome_email('ok', 'ok@example.com', 'http://localhost:3000/reset/ok')
+        queue_welcome_email('bad', REJECTED_ADDRESS, 'http://localhost:3000/reset/bad')
+
+        assert flush_welcome_emails() == (1, 1)
+        assert RejectingEmailBackend.opened == 1
+        assert [message.to for message in mail.outbox] == [['ok@example.com']]
+
+        failed = PendingWelcomeEmail.objects.get()
+        assert failed.email == REJECTED_ADDRESS
+        assert failed.attempts == 1
+        assert 'No such user' in failed.last_error
+
+    def test_failed_emails_stop_retrying_after_max_attempts(self, email_settings):
+        email_settings.EMAIL_BACKEND = f'{__name__}.RejectingEmailBackend'
+        queue_welcome_email('bad', REJECTED_ADDRESS, 'http://localhost:3000/reset/bad')
+
+        flush_welcome_emails()
+        flush_welcome_emails()
+
+        assert flush_welcome_emails() == (0, 0)
+        assert PendingWelcomeEmail.objects.get().attempts == 2
+
+    def test_rows_claimed_by_another_flush_are_skipped_until_stale(
+        self, email_settings
+    ):
+        queue_welcome_email('jane', 'jane@example.com', 'http://localhost:3000/reset')
+        PendingWelcomeEmail.objects.update(claimed_at=timezone.now())
+
+        assert flush_welcome_emails() == (0, 0)
+
+        PendingWelcomeEmail.objects.update(
+            claimed_at=timezone.now() - timedelta(
+                seconds=email_settings.WELCOME_EMAIL_CLAIM_TIMEOUT + 1
+            )
+        )
+        assert flush_welcome_emails() == (1, 0)
+
+    def test_failures_are_retried_even_within_the_batch_window(self, email_settings):
+        email_settings.EMAIL_BACKEND = f'{__name__}.RejectingEmailBackend'
+        queue_welcome_email('bad', REJECTED_ADDRESS, 'http://localhost:3000/reset/bad')
+        # Set when the flush now running was scheduled.
+        cache.add(WELCOME_EMAIL_FLUSH_SCHEDULED_KEY, True, 60)
+
+        assert flush_welcome_emails() == (0, 1)
+
+        assert Schedule.objects.filter(func='api.tasks.flush_welcome_emails').exists()
+        assert PendingWelcomeEmail.objects.get().claimed_at is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_emails_are_sent_outside_of_a_transaction(email_settings):
+    email_settings.EMAIL_BACKEND = f'{__name__}.SpyingEmailBackend'
+    SpyingEmailBackend.seen = []
+    queue_welcome_email('jane', 'jane@example.com', 'http://localhost:3000/reset')
+
+    assert flush_welcome_emails() == (1, 0)
+
+    assert SpyingEmailBackend.seen == [(False, 1)]
+    assert not PendingWelcomeEmail.objects.exists()
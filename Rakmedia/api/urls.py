@@ -1,6 +1,13 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+
+# Picks the native async view when ASYNC_READ_VIEWS is on (ASGI deployments).
+def read_view(async_view, sync_view):
+    return async_view if settings.ASYNC_READ_VIEWS else sync_view
+
 
 urlpatterns = [
     # This is for fetching all company's departments
@@ -10,6 +17,9 @@ urlpatterns = [
         name='department-list',
     ),
 
+    # Headcount and payroll per department, employee type and job role (precomputed, read only).
+    path('departments/summary/', views.DepartmentSummaryAPIView.as_view(), name='department-summary'),
+
     # This is for fetching the details of a specific department using the primary key (department_id).
     path(
         'departments/<int:pk>', 
@@ -20,33 +30,55 @@ urlpatterns = [
     # Fetching or creating employees.
     path('employees/', views.EmployeeListCreateAPIView.as_view()),
     
+    # Salary revisions and reorganisations for many employees in one request (admins only).
+    path('employees/bulk/', views.EmployeeBulkUpdateAPIView.as_view(), name='employee-bulk-update'),
+
     # Fetching a specific employee data with primary key (employee_id).
     path('employees/<int:pk>', views.EmployeeDetailsAPIView.as_view()),
 
     # This is for fetching an employee profile instance with all its data.
-    path('employees/me/', views.EmployeeProfileAPIView.as_view(), name='employee-profile'),
+    path('employees/me/', read_view(async_views.employee_profile, views.EmployeeProfileAPIView.as_view()), name='employee-profile'),
 
     # Fetching all employee positions there are in the company.
     path('employees/positions/', views.EmployeePositionAPIView.as_view()),
 
     # Fetching all employees under specific department, this is for the ManagerDashboard.jsx
-    path('department-employees/', views.DepartmentEmployeeListView.as_view(), name='api_department_employees'),
+    path('department-employees/', read_view(async_views.department_employees, views.DepartmentEmployeeListView.as_view()), name='api_department_employees'),
 
     # This is for handling task operations by the manager himself.
-    path('manager-tasks/', views.ManagerTaskListCreateView.as_view(), name='api_manager_tasks'),
+    path('manager-tasks/', read_view(async_views.manager_tasks, views.ManagerTaskListCreateView.as_view()), name='api_manager_tasks'),
 
     path(
         'tasks/', 
-        views.TaskListCreateAPIView.as_view(), 
+        read_view(async_views.employee_tasks, views.TaskListCreateAPIView.as_view()), 
         name='employee-tasks',
     ),
     path('tasks/<int:pk>/', views.TaskDetailAPIView.as_view(), name='employee-task-detail'),
 
+    # Profile, team page and task counts for ManagerDashboard.jsx in a single request.
+    path('manager-dashboard/', views.ManagerDashboardAPIView.as_view(), name='api_manager_dashboard'),
+
+    # Several GET requests in one round trip (see api/utils/batch.py).
+    path('batch/', views.BatchAPIView.as_view(), name='api_batch'),
+
+    # Prometheus metrics, in the text exposition format (see api/utils/metrics.py).
+    path('metrics/', views.prometheus_metrics, name='api_metrics'),
+
     # This dynamically switches between Dashboard.jsx and ManagerDashboard.jsx
-    path('my-dashboard', views.my_dashboard_redirect, name='api_my_dashboard_redirect'),
+    path('my-dashboard', read_view(async_views.my_dashboard_redirect, views.my_dashboard_redirect), name='api_my_dashboard_redirect'),
 
     # These are for handling file operations.
     path("tasks/<int:task_id>/files/", views.TaskFileListView.as_view(), name="task-files"),
     path("tasks/<int:task_id>/upload-file/", views.TaskFileUploadView.as_view(), name="task-file-upload"),
     path("tasks/<int:task_id>/files/<int:file_id>/", views.TaskFileDeleteView.as_view(), name="task-file-delete"),
+    path("tasks/<int:task_id>/files/<int:file_id>/download/", views.TaskFileDownloadView.as_view(), name="task-file-download"),
+
+    # Chunked, resumable uploads for large task files (start -> PUT chunks -> complete).
+    path("tasks/<int:task_id>/uploads/", views.TaskFileUploadStartView.as_view(), name="task-file-upload-start"),
+    path("tasks/<int:task_id>/uploads/<uuid:upload_id>/", views.TaskFileUploadChunkView.as_view(), name="task-file-upload-chunk"),
+    path("tasks/<int:task_id>/uploads/<uuid:upload_id>/complete/", views.TaskFileUploadCompleteView.as_view(), name="task-file-upload-complete"),
+
+    # Streaming CSV / NDJSON exports (e.g. exports/employees.csv, exports/tasks.ndjson)
+    path('exports/employees.<str:export_format>', views.EmployeeExportView.as_view(), name='employee-export'),
+    path('exports/tasks.<str:export_format>', views.TaskExportView.as_view(), name='task-export'),
 ]
\ No newline at end of file
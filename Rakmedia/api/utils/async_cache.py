@@ -0,0 +1,62 @@
+import asyncio
+import weakref
+
+from django.core.cache import caches
+
+from . import server_timing
+
+# Async access to the default cache for the async views.
+#
+# Django's cache a*() methods run the sync client in a worker thread. With django-redis,
+# reads and writes here go through a redis.asyncio client on the event loop instead.
+# Keys and values use django-redis' own key format and serializer, so entries are shared
+# with the sync views (cache_response) and cleared by the same invalidation.
+# Other backends (e.g. LocMemCache in tests) fall back to Django's a*() methods.
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def _uses_django_redis(cache):
+    try:
+        from django_redis.cache import RedisCache
+    except ImportError:
+        return False
+    return isinstance(cache, RedisCache)
+
+
+def _redis_client(cache):
+    # redis.asyncio connections belong to the event loop that opened them.
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        from redis.asyncio import Redis
+
+        location = cache._server
+        if isinstance(location, (list, tuple)):
+            location = location[0]
+        client = Redis.from_url(location.split(',')[0])
+        _clients[loop] = client
+    return client
+
+
+async def aget(key, default=None):
+    cache = caches['default']
+    if not _uses_django_redis(cache):
+        return await cache.aget(key, default)
+
+    with server_timing.section('cache'):
+        value = await _redis_client(cache).get(cache.client.make_key(key))
+    if value is None:
+        return default
+    return cache.client.decode(value)
+
+
+async def aset(key, value, timeout):
+    cache = caches['default']
+    if not _uses_django_redis(cache):
+        return await cache.aset(key, value, timeout)
+
+    with server_timing.section('cache'):
+        await _redis_client(cache).set(
+            cache.client.make_key(key), cache.client.encode(value), ex=timeout
+        )
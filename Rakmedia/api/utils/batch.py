@@ -0,0 +1,120 @@
+import logging
+from urllib.parse import urlsplit
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/'
+
+
+class BatchError(Exception):
+    """A sub-request that cannot be run, reported in its own entry."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def normalize_path(entry):
+    """'tasks/?page=2' or {'path': '/api/tasks/?page=2'} -> '/api/tasks/?page=2'."""
+    path = entry.get('path') if isinstance(entry, dict) else entry
+    if not isinstance(path, str) or not path:
+        raise BatchError(400, 'Each request must be a path string or {"path": ...}.')
+
+    parts = urlsplit(path)
+    if parts.scheme or parts.netloc:
+        raise BatchError(400, 'Only relative paths are allowed.')
+    if not path.startswith('/'):
+        path = API_PREFIX + path
+    if not path.startswith(API_PREFIX):
+        raise BatchError(400, f'Only {API_PREFIX} paths are allowed.')
+    return path
+
+
+def build_subrequest(request, path):
+    """
+    A GET HttpRequest for `path` that carries the outer request's user and token
+    (and employee once loaded), so none of them are looked up again.
+    """
+    path_info, _, query_string = path.partition('?')
+
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path_info
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if not key.startswith(('CONTENT_', 'wsgi.', 'HTTP_CONTENT_'))
+    }
+    sub.META.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path_info,
+        'QUERY_STRING': query_string,
+    })
+    sub.GET = QueryDict(query_string)
+    sub.COOKIES = request.COOKIES
+
+    # Picked up by DRF's Request (ForcedAuthentication) and get_request_employee().
+    sub.user = request.user
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    http_request = getattr(request, '_request', request)
+    if hasattr(http_request, '_employee'):
+        sub._employee = http_request._employee
+    return sub
+
+
+def run_subrequest(sub, path):
+    """Runs one GET through the URLconf and returns its {path, status, body} entry."""
+    try:
+        try:
+            match = resolve(sub.path_info)
+        except Resolver404 as exc:
+            raise BatchError(404, 'Not found.') from exc
+        if sub.path_info.startswith(reverse('api_batch')):
+            raise BatchError(400, 'Batch requests cannot be nested.')
+
+        # Native async views (ASYNC_READ_VIEWS) keep their sync DRF view for this.
+        view = getattr(match.func, 'sync_view', match.func)
+        response = view(sub, *match.args, **match.kwargs)
+    except BatchError as exc:
+        return {'path': path, 'status': exc.status, 'body': {'detail': exc.detail}}
+    except Exception:
+        logger.exception('Batch sub-request to %s failed', path)
+        return {'path': path, 'status': 500, 'body': {'detail': 'Server error.'}}
+
+    if not hasattr(response, 'data'):
+        # File downloads and streaming exports have no JSON body to embed.
+        return {
+            'path': path,
+            'status': 400,
+            'body': {'detail': 'This endpoint cannot be batched.'},
+        }
+    return {'path': path, 'status': response.status_code, 'body': response.data}
+
+
+def run_batch(request, entries):
+    """
+    Runs `entries` (relative GET paths) in-process against the URLconf, one after
+    the other. Every sub-request goes through its own view, so permissions,
+    filters, pagination and cache_response apply as if it was called directly.
+    The employee is looked up by the first sub-request that needs it (cache hits
+    don't) and handed on to the following ones.
+    """
+    results = []
+    for entry in entries:
+        try:
+            path = normalize_path(entry)
+        except BatchError as exc:
+            results.append(
+                {'path': entry, 'status': exc.status, 'body': {'detail': exc.detail}}
+            )
+            continue
+
+        sub = build_subrequest(request, path)
+        results.append(run_subrequest(sub, path))
+        if hasattr(sub, '_employee'):
+            request._request._employee = sub._employee
+    return results
@@ -1,9 +1,32 @@
 import json
+import time
 from functools import wraps
 
 from django.core.cache import cache
 from rest_framework.response import Response
 
+from . import metrics
+
+# Every cache_response prefix has a version, part of its keys: invalidate_responses()
+# bumps the version of the given prefixes, so their old entries are never read again
+# (and expire), while the rest of the shared cache is left alone. A response computed
+# before an invalidation is stored under the old version, and can't be served stale.
+VERSION_KEY = 'cache_response:version:{}'
+
+
+def response_cache_key(prefix, version, user_id, path):
+    return f"{prefix}:{version}:{user_id}:{path}"
+
+
+def prefix_version(prefix):
+    return cache.get_or_set(VERSION_KEY.format(prefix), time.time_ns, None)
+
+
+def invalidate_responses(prefixes):
+    """Expires every cached response of these cache_response prefixes."""
+    version = time.time_ns()
+    cache.set_many({VERSION_KEY.format(prefix): version for prefix in prefixes}, None)
+
 
 # Decorator to cache DRF responses safely for both class-based and function-based views.
 # Works with:
@@ -33,18 +56,18 @@ def cache_response(prefix: str, timeout: int = 60):
                 raise TypeError("cache_response: could not detect request object")
 
             user_id = getattr(request.user, "id", "anon")
-            cache_key = f"{prefix}:{user_id}:{request.get_full_path()}"
+            cache_key = response_cache_key(
+                prefix, prefix_version(prefix), user_id, request.get_full_path()
+            )
 
             cached_data = cache.get(cache_key)
+            metrics.record_cache_lookup(prefix, hit=bool(cached_data))
             if cached_data:
-                print(f"[CACHE HIT] {cache_key}")
                 return Response(
                     data=json.loads(cached_data["data"]),
                     status=cached_data["status"]
                 )
 
-            print(f"[CACHE MISS] {cache_key}")
-
             # Execute the actual view
             response = view_func(*args, **kwargs)
 
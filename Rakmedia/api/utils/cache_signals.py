@@ -1,7 +1,37 @@
-from django.core.cache import cache
-from django.db.models.signals import m2m_changed, post_delete, post_save
+import logging
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
 from django.dispatch import receiver
 
+from api.models import (Department, Employee, EmployeePosition, EmployeeType,
+                        JobRole, Task, TaskFile, User)
+from api.services import dashboard
+
+from .cache_decorator import invalidate_responses
+from .outbox import on_commit_once
+
+logger = logging.getLogger(__name__)
+
+# The cache_response prefixes (api/views.py) of the responses showing each model's data.
+EMPLOYEE_RESPONSES = (
+    'employee_list', 'employee_details', 'employee_profile', 'department_employees',
+)
+TASK_RESPONSES = ('task_list', 'task_details', 'manager_tasks')
+TASK_FILE_RESPONSES = ('task_file',)
+
+CACHE_PREFIXES = {
+    'Employee': EMPLOYEE_RESPONSES + TASK_RESPONSES + TASK_FILE_RESPONSES,
+    'Department': EMPLOYEE_RESPONSES + ('manager_tasks',),
+    'Task': TASK_RESPONSES + TASK_FILE_RESPONSES,
+    # Tasks list their files.
+    'TaskFile': TASK_RESPONSES + TASK_FILE_RESPONSES,
+    'TaskFileUpload': TASK_RESPONSES + TASK_FILE_RESPONSES,
+    'TaskFileDelete': TASK_RESPONSES + TASK_FILE_RESPONSES,
+    # Usernames and emails show up next to employees, tasks and files.
+    'User': EMPLOYEE_RESPONSES + TASK_RESPONSES + TASK_FILE_RESPONSES,
+}
+
 # You can list all the model names whose changes should trigger cache invalidation.
 CACHE_MODELS = [
     'Employee',
@@ -13,14 +43,21 @@ CACHE_MODELS = [
 
 
 # Helper function
-# Deletes all cache entries that start with the given prefix.
+# Expires the cached responses showing data of the given kind (a key of CACHE_PREFIXES).
+# Only cache_response entries go: versions, dedupe keys etc. stay in the shared cache.
 def invalidate_cache_by_prefix(prefix: str):
-    # NOTE: Django’s default cache doesn’t support key prefix iteration,
-    # so we store keys manually or use Redis with KEYS pattern matching if supported.
-    # For now, we clear the entire cache to ensure consistency.
-    # You can narrow this down later if you use Redis or similar backend.
-    cache.clear()
-    print(f"[Cache] Cleared due to change in {prefix}")
+    invalidate_responses(CACHE_PREFIXES[prefix])
+    logger.debug('Cached responses expired due to a change in %s', prefix)
+
+
+# Defers the invalidation until the surrounding transaction commits.
+# Repeated changes of the same kind in one transaction (e.g. saving an Employee twice)
+# trigger a single invalidation, and a rolled back transaction invalidates nothing.
+def schedule_cache_invalidation(prefix: str):
+    on_commit_once(
+        ('invalidate_cache', prefix),
+        lambda: invalidate_cache_by_prefix(prefix),
+    )
 
 
 # This is invalidates cache when a TaskFile is uploaded.
@@ -28,10 +65,10 @@ def invalidate_cache_by_prefix(prefix: str):
 def auto_invalidate_on_save(sender, instance, **kwargs):
     model_name = sender.__name__
     if model_name in CACHE_MODELS:
-        invalidate_cache_by_prefix(model_name)
+        schedule_cache_invalidation(model_name)
 
     if model_name == "TaskFile":
-        invalidate_cache_by_prefix("TaskFileUpload")
+        schedule_cache_invalidation("TaskFileUpload")
 
 
 # This invalidates cache when a task file is deleted.
@@ -39,10 +76,10 @@ def auto_invalidate_on_save(sender, instance, **kwargs):
 def auto_invalidate_on_delete(sender, instance, **kwargs):
     model_name = sender.__name__
     if model_name in CACHE_MODELS:
-        invalidate_cache_by_prefix(model_name)
+        schedule_cache_invalidation(model_name)
 
     if model_name == "TaskFile":
-        invalidate_cache_by_prefix("TaskFileDelete")
+        schedule_cache_invalidation("TaskFileDelete")
 
 
 # Invalidates cache when a many-to-many change is made.
@@ -50,4 +87,116 @@ def auto_invalidate_on_delete(sender, instance, **kwargs):
 def auto_invalidate_on_m2m_change(sender, instance, **kwargs):
     model_name = instance.__class__.__name__
     if model_name in CACHE_MODELS:
-        invalidate_cache_by_prefix(model_name)
+        schedule_cache_invalidation(model_name)
+
+
+# --- Manager dashboard (api/services/dashboard.py) ---
+# Instead of clearing everything, these only expire the dashboards a change shows up on:
+# the manager who assigned a task, the managers whose team an employee belongs to,
+# and the employee's own dashboard (profile).
+
+def schedule_dashboard_invalidation(user_ids):
+    for user_id in user_ids:
+        if user_id:
+            on_commit_once(
+                ('invalidate_manager_dashboard', user_id),
+                lambda user_id=user_id: dashboard.bump_versions([user_id]),
+            )
+
+
+# A task shows up in its assigning manager's totals and in the assignee's counters,
+# which are listed on their managers' dashboards (before and after a reassignment).
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_dashboard_for_task(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    assignees = {instance.assigned_to_id, previous and previous[0]} - {None}
+
+    user_ids = dashboard.team_manager_user_ids(assignees)
+    if instance.assigned_by_id:
+        manager = Employee.objects.filter(id=instance.assigned_by_id)
+        user_ids |= set(manager.values_list('user_id', flat=True))
+    schedule_dashboard_invalidation(user_ids)
+
+
+def invalidate_dashboard_for_task_file(task_id):
+    assignee = Task.objects.filter(pk=task_id).values_list('assigned_to_id', flat=True)
+    schedule_dashboard_invalidation(dashboard.team_manager_user_ids(assignee))
+
+
+@receiver(post_save, sender=TaskFile)
+def invalidate_dashboard_for_new_task_file(sender, instance, created, **kwargs):
+    if created:
+        invalidate_dashboard_for_task_file(instance.task_id)
+
+
+@receiver(post_delete, sender=TaskFile)
+def invalidate_dashboard_for_deleted_task_file(sender, instance, **kwargs):
+    invalidate_dashboard_for_task_file(instance.task_id)
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_dashboard_for_employee(sender, instance, created, **kwargs):
+    # A new employee has no departments yet, they are added through m2m_changed below.
+    if not created:
+        schedule_dashboard_invalidation(dashboard.affected_user_ids(instance))
+
+
+# Departments are still linked in pre_delete, not anymore in post_delete.
+@receiver(pre_delete, sender=Employee)
+def invalidate_dashboard_for_deleted_employee(sender, instance, **kwargs):
+    schedule_dashboard_invalidation(dashboard.affected_user_ids(instance))
+
+
+# Before a change the old departments' managers are expired, after it the new ones'.
+DEPARTMENT_CHANGES = ('pre_add', 'post_add', 'pre_remove', 'post_remove', 'pre_clear')
+
+
+@receiver(m2m_changed, sender=Employee.department.through)
+def invalidate_dashboard_for_departments(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in DEPARTMENT_CHANGES:
+        return
+    if reverse:
+        # department.employees.add(...): `instance` is the Department, `pk_set` the
+        # employees (None for clear()).
+        if pk_set:
+            employees = Employee.objects.filter(pk__in=pk_set)
+        else:
+            employees = instance.employees.all()
+        user_ids = set(employees.values_list('user_id', flat=True))
+        user_ids |= dashboard.manager_user_ids(
+            instance.company_id, department=instance
+        )
+    else:
+        user_ids = dashboard.affected_user_ids(instance)
+    schedule_dashboard_invalidation(user_ids)
+
+
+@receiver(post_save, sender=User)
+def invalidate_dashboard_for_user(sender, instance, created, **kwargs):
+    employee = None if created else Employee.objects.filter(user=instance).first()
+    if employee:
+        schedule_dashboard_invalidation(dashboard.affected_user_ids(employee))
+
+
+@receiver(post_save, sender=Department)
+@receiver(pre_delete, sender=Department)
+def invalidate_dashboard_for_department(sender, instance, **kwargs):
+    schedule_dashboard_invalidation(
+        dashboard.manager_user_ids(instance.company_id, department=instance)
+    )
+
+
+# Positions and types decide who is a manager, rare enough to expire every dashboard.
+@receiver(post_save, sender=EmployeePosition)
+@receiver(post_delete, sender=EmployeePosition)
+@receiver(post_save, sender=EmployeeType)
+@receiver(post_delete, sender=EmployeeType)
+@receiver(post_save, sender=JobRole)
+@receiver(post_delete, sender=JobRole)
+def invalidate_all_dashboards(sender, instance, **kwargs):
+    on_commit_once(
+        ('invalidate_manager_dashboard', 'all'), dashboard.bump_global_version
+    )
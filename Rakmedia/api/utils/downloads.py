@@ -0,0 +1,120 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (content_disposition_header, http_date,
+                               parse_http_date_safe)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+# Serves a stored file for an already authorized request.
+#
+# With FILE_DOWNLOAD_ACCEL set, Django only answers with headers and the front proxy
+# sends the bytes, so large files never tie up a Python worker:
+# - 'nginx'    -> X-Accel-Redirect to FILE_DOWNLOAD_ACCEL_PREFIX + file name
+# - 'sendfile' -> X-Sendfile with the absolute path (Apache mod_xsendfile, lighttpd...)
+# Without a proxy, Django streams the file itself with Range / conditional GET support.
+#
+# `etag` and `last_modified` (a datetime) should be cheap to compute,
+# they are checked before the file is touched.
+def serve_file(request, field_file, *, filename, etag, last_modified):
+    last_modified_ts = int(last_modified.timestamp())
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified_ts
+    )
+    if not_modified is not None:
+        return not_modified
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accel = getattr(settings, 'FILE_DOWNLOAD_ACCEL', None)
+
+    if accel:
+        response = HttpResponse(content_type=content_type)
+        if accel == 'nginx':
+            prefix = settings.FILE_DOWNLOAD_ACCEL_PREFIX
+            response['X-Accel-Redirect'] = prefix + quote(field_file.name)
+        else:
+            response['X-Sendfile'] = field_file.path
+    else:
+        response = _stream_file(
+            request, field_file, content_type, etag, last_modified_ts
+        )
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified_ts)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _stream_file(request, field_file, content_type, etag, last_modified_ts):
+    size = field_file.size
+    byte_range = _requested_range(request, size, etag, last_modified_ts)
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    field_file.open('rb')
+    if byte_range is None:
+        return FileResponse(field_file, content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        _read_range(field_file, start, end),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return response
+
+
+# Returns (start, end) for a single satisfiable byte range, 'unsatisfiable', or None
+# when the whole file should be sent (no Range, multiple ranges, or a stale If-Range).
+def _requested_range(request, size, etag, last_modified_ts):
+    header = request.META.get('HTTP_RANGE', '').strip()
+    match = RANGE_RE.match(header)
+    if not match:
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if if_range and if_range != etag:
+        if parse_http_date_safe(if_range) != last_modified_ts:
+            return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        # Suffix range: the last N bytes.
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        return None
+
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _read_range(field_file, start, end):
+    try:
+        field_file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = field_file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        field_file.close()
@@ -0,0 +1,288 @@
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+
+# In-process metrics (counters and histograms), served in the Prometheus text format
+# by the metrics view (/api/metrics/).
+#
+# Recording only touches a dict in this process. Every METRICS_PUSH_INTERVAL seconds
+# (checked when a request ends or a task is enqueued) the process copies its values
+# into one of the PROCESS_SLOTS slots of the shared cache, and a scrape serves every
+# slot: any gunicorn worker (or qcluster process) can answer for all of them. The
+# slots live in their own cache (METRICS_CACHE), which clearing the response cache
+# doesn't empty.
+#
+# Each slot is served as its own series (a `worker` label, the slot number) rather than
+# added up: when a worker is recycled or its slot expires, only that series restarts
+# from zero, which Prometheus handles as a counter reset. Sum them in the queries, Ex:
+#   sum without (worker) (rate(http_responses_total[5m]))
+#
+# Label values come from code (URL names, cache prefixes, task functions), and each
+# metric keeps at most METRICS_MAX_SERIES label sets: later ones are counted under
+# OTHER, so a bug or a crawler can't grow the metrics without bounds.
+#
+# Example:
+#   CACHE_REQUESTS.inc('employee_list', 'hit')
+
+OTHER = '__other__'
+PROCESS_SLOTS = 64
+SLOT_KEY = 'metrics:process:{}'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        if labels in self.values or len(self.values) < settings.METRICS_MAX_SERIES:
+            return labels
+        return (OTHER,) * len(self.labels)
+
+    def snapshot(self):
+        with self.lock:
+            return {labels: self.copy(value) for labels, value in self.values.items()}
+
+    @property
+    def label_names(self):
+        return ('worker', *self.labels)
+
+    @staticmethod
+    def copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            key = self.key(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self, values):
+        for labels, value in values.items():
+            yield self.name, self.label_names, labels, value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        # Values are kept as [count per bucket (the last one for +Inf), sum].
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            key = self.key(labels)
+            value_counts = self.values.get(key)
+            if value_counts is None:
+                value_counts = self.values[key] = [[0] * (len(self.buckets) + 1), 0]
+            value_counts[0][index] += 1
+            value_counts[1] += value
+
+    @staticmethod
+    def copy(value):
+        return [list(value[0]), value[1]]
+
+    def samples(self, values):
+        bucket_labels = (*self.label_names, 'le')
+        for labels, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts, strict=True):
+                cumulative += count
+                yield f'{self.name}_bucket', bucket_labels, (*labels, bound), cumulative
+            yield f'{self.name}_sum', self.label_names, labels, total
+            yield f'{self.name}_count', self.label_names, labels, cumulative
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+        self.process_id = uuid.uuid4().hex
+        self.slot = None
+        self.pushed_at = None
+
+    def counter(self, name, documentation, labels):
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels, buckets):
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def push(self, force=False):
+        """Copies this process' values to its slot in the shared cache (throttled)."""
+        now = time.monotonic()
+        if not force and self.pushed_at is not None and (
+            now - self.pushed_at < settings.METRICS_PUSH_INTERVAL
+        ):
+            return
+        self.pushed_at = now
+
+        cache = caches[settings.METRICS_CACHE]
+        value = (self.process_id, self.snapshot())
+        timeout = settings.METRICS_PROCESS_TIMEOUT
+        if self.slot is not None:
+            key = SLOT_KEY.format(self.slot)
+            current = cache.get(key)
+            if current is not None and current[0] == self.process_id:
+                cache.set(key, value, timeout)
+                return
+            # The slot expired while this process was idle: claimed again like a free
+            # one, unless another process took it since.
+            if current is None and cache.add(key, value, timeout):
+                return
+
+        # cache.add() only succeeds on a free slot, so two processes never share one.
+        for slot in range(PROCESS_SLOTS):
+            if cache.add(SLOT_KEY.format(slot), value, timeout):
+                self.slot = slot
+                return
+        self.slot = None
+
+    def collect(self):
+        """
+        The values of every process with a slot, per metric: {(worker, *labels): value}.
+        A process without a free slot isn't served until it gets one.
+        """
+        self.push(force=True)
+        keys = {SLOT_KEY.format(slot): str(slot) for slot in range(PROCESS_SLOTS)}
+        slots = caches[settings.METRICS_CACHE].get_many(list(keys))
+
+        totals = {metric.name: {} for metric in self.metrics}
+        for key, worker in keys.items():
+            if key not in slots:
+                continue
+            _process_id, snapshot = slots[key]
+            for name, values in snapshot.items():
+                if name in totals:
+                    for labels, value in values.items():
+                        totals[name][(worker, *labels)] = value
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        totals = self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, label_names, labels, value in metric.samples(
+                totals[metric.name]
+            ):
+                lines.append(f'{name}{format_labels(label_names, labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    labels = ','.join(
+        f'{name}="{escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return '{' + labels + '}'
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds',
+    'Time spent handling the request, by URL name and method.',
+    ('view', 'method'),
+    LATENCY_BUCKETS,
+)
+RESPONSES = registry.counter(
+    'http_responses_total',
+    'Responses, by URL name, method and status class.',
+    ('view', 'method', 'status'),
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    'http_request_db_queries',
+    'SQL queries run while handling the request, by URL name.',
+    ('view',),
+    QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = registry.histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in SQL queries while handling the request, by URL name.',
+    ('view',),
+    LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = registry.counter(
+    'api_cache_requests_total',
+    'Cached response lookups, by cache_response prefix and result (hit or miss).',
+    ('prefix', 'result'),
+)
+TASKS_ENQUEUED = registry.counter(
+    'django_q_tasks_enqueued_total',
+    'Tasks sent to the django-q broker, by function.',
+    ('func',),
+)
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class QueryTimer:
+    """A connection.execute_wrapper() counting the queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def record_request(request, response, duration, queries):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else '<unmatched>'
+    method = request.method if request.method in METHODS else 'other'
+
+    REQUEST_LATENCY.observe(duration, view, method)
+    RESPONSES.inc(view, method, f'{response.status_code // 100}xx')
+    REQUEST_DB_QUERIES.observe(queries.count, view)
+    REQUEST_DB_TIME.observe(queries.duration, view)
+    registry.push()
+
+
+def record_cache_lookup(prefix, hit):
+    CACHE_REQUESTS.inc(prefix, 'hit' if hit else 'miss')
+
+
+def record_enqueued_task(func):
+    if not isinstance(func, str):
+        func = f'{func.__module__}.{func.__qualname__}'
+    TASKS_ENQUEUED.inc(func)
+    registry.push()
@@ -0,0 +1,151 @@
+import logging
+import weakref
+
+from asgiref.local import Local
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.module_loading import import_string
+from django_q.tasks import async_task
+
+logger = logging.getLogger(__name__)
+
+
+# Transactional outbox for side effects (cache invalidation, background tasks...).
+#
+# Side effects are recorded while the transaction is open and flushed once on commit:
+# - on_commit_once(key, callback) runs a local callback,
+#   duplicates with the same key are coalesced.
+# - enqueue_task(func, *args) enqueues a django-q task. All tasks recorded in one
+#   transaction reach the broker as a single batch, so the ORM broker never writes
+#   inside the request transaction.
+# If the transaction is rolled back, nothing recorded in it is ever run, and neither is
+# what was recorded in a rolled back savepoint (atomic() block) of a transaction that
+# commits.
+#
+# Works the same from signals, views and management commands. Outside of a transaction
+# (autocommit) the side effect runs immediately, exactly like transaction.on_commit().
+#
+# Example:
+#   on_commit_once(('invalidate_dashboards', 'all'), dashboard.bump_global_version)
+#   enqueue_task('api.tasks.flush_welcome_emails')
+
+
+# Same scoping as Django's database connections: one batch per thread / async context.
+_batches = Local()
+
+
+class _Entry:
+    """A recorded side effect, registered on its own with transaction.on_commit()."""
+
+    __slots__ = ('batch', 'kind', 'key', 'value', '__weakref__')
+
+    def __init__(self, batch, kind, key, value):
+        self.batch = batch
+        self.kind = kind
+        self.key = key
+        self.value = value
+
+    def __call__(self):
+        self.batch.flush()
+
+
+class _OutboxBatch:
+    """
+    The side effects recorded in one transaction. Each entry is its own on_commit()
+    callback, so Django drops the entries of a rolled back savepoint (or transaction)
+    and nothing has to look into the connection's pending callbacks. The batch only
+    keeps weak references: a dropped entry is gone from it too, and the first entry
+    run after commit flushes the ones left.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.entries = []
+        self.live = 0
+        self.flushed = False
+
+    def record(self, kind, key, value):
+        entry = _Entry(self, kind, key, value)
+        self.entries.append(weakref.ref(entry, self.dropped))
+        self.live += 1
+        transaction.on_commit(entry, using=self.using)
+        return entry
+
+    def dropped(self, _ref):
+        self.live -= 1
+
+    def flush(self):
+        if self.flushed:
+            return
+        self.flushed = True
+        if getattr(_batches, self.using, None) is self:
+            delattr(_batches, self.using)
+
+        callbacks, tasks = {}, {}
+        for ref in self.entries:
+            entry = ref()
+            if entry is not None:
+                pending = callbacks if entry.kind == 'callback' else tasks
+                pending.setdefault(entry.key, entry.value)
+
+        for key, callback in callbacks.items():
+            try:
+                callback()
+            except Exception:
+                logger.exception('Outbox callback %r failed', key)
+
+        tasks = list(tasks.values())
+        if len(tasks) == 1:
+            func, args, kwargs = tasks[0]
+            async_task(func, *args, **kwargs)
+        elif tasks:
+            async_task('api.utils.outbox.run_task_batch', tasks)
+
+
+def _get_batch(using):
+    batch = getattr(_batches, using, None)
+    # Flushed, or every entry was rolled back with its transaction or savepoint.
+    if batch is None or batch.flushed or not batch.live:
+        batch = _OutboxBatch(using)
+        setattr(_batches, using, batch)
+    return batch
+
+
+def on_commit_once(key, callback, using=DEFAULT_DB_ALIAS):
+    """
+    Runs `callback` once after the current transaction commits.
+    Callbacks recorded with the same key in one transaction are coalesced into one call.
+    Returns the recorded entry, which lives until it runs or is rolled back (a weak
+    reference tells whether it's still pending), or None when run immediately.
+    """
+    if not transaction.get_connection(using).in_atomic_block:
+        callback()
+        return None
+
+    return _get_batch(using).record('callback', key, callback)
+
+
+def enqueue_task(func, *args, key=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Enqueues a django-q task once the current transaction commits.
+    Identical tasks (same func and arguments, or same `key`) are coalesced into one.
+    """
+    if not transaction.get_connection(using).in_atomic_block:
+        async_task(func, *args, **kwargs)
+        return
+
+    if key is None:
+        key = (func, repr(args), repr(sorted(kwargs.items())))
+
+    _get_batch(using).record('task', key, (func, args, kwargs))
+
+
+def run_task_batch(tasks):
+    """
+    django-q entry point for a flushed batch, runs each (func, args, kwargs) in order.
+    A failing task is logged and doesn't prevent the others from running.
+    """
+    for func, args, kwargs in tasks:
+        try:
+            import_string(func)(*args, **kwargs)
+        except Exception:
+            logger.exception('Outbox task %s failed', func)
@@ -0,0 +1,95 @@
+import time
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from asgiref.local import Local
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .outbox import on_commit_once
+
+
+class ProcessCache:
+    """
+    A value built from the database once per process (worker), and built again after
+    any process called invalidate(): the shared cache holds a version key, compared
+    with the version the value was built at. The comparison costs a cache round trip,
+    so it's made at most every PROCESS_CACHE_CHECK_INTERVAL seconds; invalidate()
+    drops this process' value at once.
+
+    Inside a transaction that called invalidate_on_commit(), get() returns a value
+    loaded for that transaction only (it sees the uncommitted changes), the shared one
+    is left alone: dropped after a commit, still valid after a rollback.
+
+    Async views run inside `async with pin()`, so the value is never loaded from the
+    event loop.
+    """
+
+    instances = []
+
+    def __init__(self, version_key, load):
+        self.version_key = version_key
+        self.load = load
+        self.version = None
+        self.value = None
+        self.checked_at = None
+        # Same scoping as the database connections: one open transaction per thread.
+        self.pending = Local()
+        self.pinned = ContextVar(f'process_cache:{version_key}', default=None)
+        ProcessCache.instances.append(self)
+
+    def get(self):
+        pinned = self.pinned.get()
+        if pinned is not None:
+            return pinned
+
+        pending = getattr(self.pending, 'invalidation', None)
+        if pending is not None:
+            if pending() is not None:
+                value = getattr(self.pending, 'value', None)
+                if value is None:
+                    value = self.pending.value = self.load()
+                return value
+            # The invalidation was rolled back with its transaction (or savepoint).
+            self.pending.invalidation = self.pending.value = None
+
+        now = time.monotonic()
+        if self.value is not None and self.checked_at is not None and (
+            now - self.checked_at < settings.PROCESS_CACHE_CHECK_INTERVAL
+        ):
+            return self.value
+
+        version = cache.get_or_set(self.version_key, time.time_ns, None)
+        self.checked_at = now
+        if self.value is None or self.version != version:
+            # The version is read before loading, a change made meanwhile loads again.
+            self.value, self.version = self.load(), version
+        return self.value
+
+    @asynccontextmanager
+    async def pin(self):
+        """Loads the value off the event loop, and keeps it inside the block."""
+        value = await sync_to_async(self.get)()
+        token = self.pinned.set(value)
+        try:
+            yield value
+        finally:
+            self.pinned.reset(token)
+
+    def invalidate(self):
+        """Makes every process build the value again on its next get()."""
+        self.pending.invalidation = self.pending.value = None
+        self.value = None
+        cache.set(self.version_key, time.time_ns(), None)
+
+    def invalidate_on_commit(self):
+        # Until the commit, only this transaction sees its changes: it gets values of
+        # its own, for as long as the recorded invalidation is pending.
+        invalidation = on_commit_once(
+            ('invalidate_process_cache', self.version_key), self.invalidate
+        )
+        if invalidation is not None:
+            self.pending.invalidation = weakref.ref(invalidation)
+            self.pending.value = None
@@ -1,6 +1,30 @@
 from rest_framework.exceptions import NotAuthenticated
+
 from api.models import Employee
 
+# Loaded with the employee, most views read the user. Positions (role checks, names)
+# come from the reference data registry, by position_id.
+EMPLOYEE_RELATED = ('user',)
+
+
+def get_request_employee(request):
+    """
+    Returns the Employee of request.user (or None), loaded once per request.
+    The result is kept on the underlying HttpRequest, so views, permissions and
+    the sub-requests of /api/batch/ (which are handed a preloaded one) share it.
+    """
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, '_employee'):
+        user = request.user
+        http_request._employee = None
+        if user.is_authenticated:
+            http_request._employee = (
+                Employee.objects.filter(user=user)
+                .select_related(*EMPLOYEE_RELATED)
+                .first()
+            )
+    return http_request._employee
+
 
 def get_authenticated_employee(request, *, required=True):
     """
@@ -13,8 +37,8 @@ def get_authenticated_employee(request, *, required=True):
             raise NotAuthenticated()
         return None
     
-    employee = Employee.objects.filter(user=user).first()
+    employee = get_request_employee(request)
     if required and not employee:
         raise NotAuthenticated("Employee profile not found")
     
-    return employee
\ No newline at end of file
+    return employee
@@ -0,0 +1,143 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Where a request's time went, for the Server-Timing header (ServerTimingMiddleware in
+# api/middleware.py, which DevTools shows in the request's Timing tab):
+#
+#   db         SQL queries (count and time), from a connection.execute_wrapper()
+#   cache      the cache backends' methods
+#   serialize  serializer .data, and the values serializers (api/fast_serializers.py)
+#   render     DRF's response rendering, and render_json() of the async views
+#   total      the whole middleware chain below the middleware
+#
+# Each part is counted once: the queries run by a lazy queryset being serialized are
+# db time, not serialize time. Outside of a timed request the timed() wrappers cost a
+# ContextVar lookup, and they are only installed on Django's and DRF's classes when
+# SERVER_TIMING_ENABLED.
+
+SECTIONS = ('cache', 'serialize', 'render')
+CACHE_METHODS = (
+    'add', 'get', 'set', 'touch', 'delete', 'get_many', 'get_or_set', 'has_key',
+    'incr', 'decr', 'set_many', 'delete_many', 'clear',
+)
+
+_current = ContextVar('server_timing', default=None)
+
+
+class Timings:
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db = 0.0
+        self.durations = dict.fromkeys(SECTIONS, 0.0)
+        self.running = set()
+        # Time counted as db or as a section, left out of the enclosing sections.
+        self.accounted = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db += duration
+            self.db_queries += 1
+            self.accounted += duration
+
+    @contextmanager
+    def section(self, name):
+        # A section inside itself (get_or_set() calling get(), nested serializers)
+        # is timed once, by the outermost call.
+        if name in self.running:
+            yield
+            return
+
+        self.running.add(name)
+        start, accounted = time.perf_counter(), self.accounted
+        try:
+            yield
+        finally:
+            self.running.discard(name)
+            duration = time.perf_counter() - start - (self.accounted - accounted)
+            self.durations[name] += duration
+            self.accounted += duration
+
+    def header(self, total):
+        """The Server-Timing header value, durations in milliseconds."""
+        metrics = [f'db;dur={self.db * 1000:.2f};desc="{self.db_queries} queries"']
+        metrics += [
+            f'{name};dur={duration * 1000:.2f}'
+            for name, duration in self.durations.items()
+        ]
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timing(timings):
+    """Times the block's sections and queries into `timings`."""
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def section(name):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    with timings.section(name):
+        yield
+
+
+def timed(name):
+    """Decorator, times each call of the function as the `name` section."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            with timings.section(name):
+                return func(*args, **kwargs)
+
+        wrapper.server_timed = True
+        return wrapper
+
+    return decorator
+
+
+def install():
+    """Times the configured cache backends, DRF's serializers and rendering (once)."""
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        for method in CACHE_METHODS:
+            time_method(backend, method, 'cache')
+
+    for serializer in (
+        serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer
+    ):
+        time_property(serializer, 'data', 'serialize')
+    time_property(Response, 'rendered_content', 'render')
+
+
+def time_method(cls, name, section_name):
+    method = getattr(cls, name)
+    if not getattr(method, 'server_timed', False):
+        setattr(cls, name, timed(section_name)(method))
+
+
+def time_property(cls, name, section_name):
+    prop = vars(cls)[name]
+    if not getattr(prop.fget, 'server_timed', False):
+        setattr(cls, name, property(timed(section_name)(prop.fget)))
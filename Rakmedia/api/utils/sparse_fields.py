@@ -0,0 +1,106 @@
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+# Sparse fieldsets: GET ?fields=id,first_name keeps only those fields of a serializer,
+# ?omit=department drops them. The query shrinks along with the payload, the joins,
+# prefetches and columns are derived from what the kept fields read.
+#
+# Serializers using it list the model paths each field reads in Meta.field_sources
+# (ORM lookup syntax, 'position__job_role__name'). Fields missing from it read the
+# model field of the same name.
+
+
+def split(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def requested_fields(request, available):
+    """The names of `available` kept by the request's ?fields= and ?omit=."""
+    if request is None or request.method not in SAFE_METHODS:
+        return list(available)
+
+    fields = split(request.query_params.get('fields'))
+    omit = split(request.query_params.get('omit'))
+    unknown = (fields | omit) - set(available)
+    if unknown:
+        raise ValidationError({
+            'fields': f'Unknown field(s): {", ".join(sorted(unknown))}.'
+        })
+    return [
+        name for name in available
+        if (not fields or name in fields) and name not in omit
+    ]
+
+
+def field_paths(serializer_class, names=None, prefix=''):
+    """The model paths read by `names` (default: every field) of a serializer."""
+    sources = getattr(serializer_class.Meta, 'field_sources', {})
+    names = serializer_class.Meta.fields if names is None else names
+    return [
+        prefix + path
+        for name in names
+        for path in sources.get(name, (name,))
+    ]
+
+
+def plan(model, paths):
+    """
+    Splits model paths into the .only() columns, the select_related() chains and
+    the to-many relations to prefetch (with the paths read on the related model).
+    """
+    only, select, prefetch = set(), set(), {}
+    for path in paths:
+        current = model
+        parts = path.split('__')
+        for i, part in enumerate(parts):
+            field = current._meta.get_field(part)
+            name = '__'.join(parts[:i + 1])
+            if field.many_to_many or field.one_to_many:
+                rest = '__'.join(parts[i + 1:]) or 'pk'
+                prefetch.setdefault(name, (field, set()))[1].add(rest)
+                break
+            if field.is_relation and i < len(parts) - 1:
+                # The FK column must stay loaded to be traversed.
+                only.add(name)
+                select.add(name)
+                current = field.related_model
+                continue
+            only.add(name)
+    return only, select, prefetch
+
+
+def restrict(queryset, paths):
+    """`queryset` loading only what `paths` read, the related rows included."""
+    only, select, prefetch = plan(queryset.model, paths)
+    lookups = []
+    for name, (field, sub_paths) in prefetch.items():
+        related = field.related_model._default_manager.all()
+        if field.one_to_many:
+            # Reverse FK prefetches match the rows on their FK to the parent.
+            sub_paths = sub_paths | {field.field.name}
+        lookups.append(Prefetch(name, queryset=restrict(related, sub_paths)))
+
+    queryset = queryset.select_related(*select) if select else queryset
+    return queryset.prefetch_related(*lookups).only(*(only or {'pk'}))
+
+
+def sparse_queryset(queryset, serializer_class, request):
+    """`queryset` reduced to the fields the request keeps of `serializer_class`."""
+    names = requested_fields(request, serializer_class.Meta.fields)
+    return restrict(queryset, field_paths(serializer_class, names))
+
+
+class SparseFieldsMixin:
+    """Drops the fields left out by ?fields= / ?omit= (top-level serializer only)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nested serializers are declared without a context, so they keep every field.
+        request = self.context.get('request')
+        if request is None or not hasattr(request, 'query_params'):
+            return
+        kept = set(requested_fields(request, self.Meta.fields))
+        for name in list(self.fields):
+            if name not in kept:
+                self.fields.pop(name)
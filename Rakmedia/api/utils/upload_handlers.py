@@ -0,0 +1,46 @@
+import hashlib
+
+from django.core.files.uploadhandler import (MemoryFileUploadHandler,
+                                             TemporaryFileUploadHandler)
+
+
+# Computes the SHA-256 of each uploaded file while its chunks are received,
+# so the content can be deduplicated without reading the file a second time.
+# The digest ends up on the uploaded file as `file.sha256`.
+class HashingUploadHandlerMixin:
+    def new_file(self, *args, **kwargs):
+        # Set before super(): the memory handler raises StopFutureHandlers
+        # when it takes the file.
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.sha256 = self.sha256.hexdigest()
+        return uploaded_file
+
+
+class HashingMemoryFileUploadHandler(
+    HashingUploadHandlerMixin, MemoryFileUploadHandler
+):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadHandlerMixin, TemporaryFileUploadHandler
+):
+    pass
+
+
+# Same order as Django's default FILE_UPLOAD_HANDLERS:
+# small files in memory, big ones on disk.
+def hashing_upload_handlers(request):
+    return [
+        HashingMemoryFileUploadHandler(request),
+        HashingTemporaryFileUploadHandler(request),
+    ]
@@ -1,12 +1,19 @@
+import json
 from typing import cast
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, AnonymousUser
+from django.core.cache import cache
+from django.db.models import Exists, Q
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404
+from django.utils.crypto import constant_time_compare
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.exceptions import (NotAuthenticated, NotFound,
+                                       PermissionDenied, ValidationError)
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import (AllowAny, BasePermission, IsAdminUser,
@@ -14,22 +21,55 @@ from rest_framework.permissions import (AllowAny, BasePermission, IsAdminUser,
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api import exports
+from api.fast_serializers import (EmployeeListValuesSerializer,
+                                  TaskFileValuesSerializer,
+                                  TaskValuesSerializer)
 from api.filters import EmployeeFilter  # TaskFilter, TaskFileFilter
-from api.models import (Company, Department, Employee, EmployeePosition, Task,
-                        TaskFile)
+from api.models import (Company, Department, Employee, EmployeePosition,
+                        EmployeeSummary, Task, TaskFile, TaskFileUpload)
 from api.serializers import (CompanySerializer, DepartmentSerializer,
+                             EmployeeBulkUpdateSerializer,
                              EmployeeDetailSerializer, EmployeeGetSerializer,
                              EmployeePositionSerializer,
-                             EmployeePostSerializer, TaskFileSerializer,
+                             EmployeePostSerializer, EmployeeSummarySerializer,
+                             TaskFileSerializer, TaskFileUploadSerializer,
                              TaskSerializer)
 
+from .services import dashboard, employee_bulk, reference_data, uploads
+from .services.blobs import create_task_file
+from .services.employee import get_department_employees, is_manager_or_officer
+from .utils import metrics
+from .utils.batch import run_batch
 from .utils.cache_decorator import cache_response
+from .utils.downloads import serve_file
+from .utils.request import get_request_employee
+from .utils.sparse_fields import sparse_queryset
+from .utils.upload_handlers import hashing_upload_handlers
 
 # Create your views here.
 
 
 
 
+# Serves GET lists through `values_serializer_class` (api/fast_serializers.py) while FAST_LIST_SERIALIZERS
+# is on: the same JSON as the serializer, built from .values() rows instead of model instances.
+class ValuesListMixin:
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None or not settings.FAST_LIST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class(request)
+        queryset = serializer.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
+
+
+
 class CompanyAPIView(generics.RetrieveAPIView):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
@@ -39,12 +79,9 @@ class IsManager(BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        
-        employee = getattr(request.user, "employee_profile", None)
-        if not employee or not employee.position or not employee.position.employee_type:
-            return False
-        
-        return employee.position.employee_type.name.lower() in ["manager", "officer"]
+
+        # The employee type comes from the reference data registry, not from a join.
+        return is_manager_or_officer(get_request_employee(request))
     
 
 class DepartmentListAPIView(generics.ListCreateAPIView):
@@ -68,6 +105,35 @@ class DepartmentListAPIView(generics.ListCreateAPIView):
         serializer.save(company=employee.company)
 
 
+# Headcount, total and average salary per department, employee type and job role of a company,
+# read from the precomputed EmployeeSummary rows in a single query.
+# Staff see their own company, superusers can pick one with ?company=<id>.
+class DepartmentSummaryAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    SECTIONS = {
+        EmployeeSummary.DEPARTMENT: 'departments',
+        EmployeeSummary.EMPLOYEE_TYPE: 'employee_types',
+        EmployeeSummary.JOB_ROLE: 'job_roles',
+    }
+
+    def get(self, request):
+        summaries = EmployeeSummary.objects.order_by('dimension', 'name', 'key_id')
+        company_id = request.query_params.get('company')
+        if company_id and request.user.is_superuser:
+            if not company_id.isdigit():
+                raise ValidationError({'company': 'A company id is expected.'})
+            summaries = summaries.filter(company_id=company_id)
+        else:
+            summaries = summaries.filter(company__employees__user=request.user)
+
+        data = {section: [] for section in self.SECTIONS.values()}
+        for summary in summaries:
+            data[self.SECTIONS[summary.dimension]].append(EmployeeSummarySerializer(summary).data)
+        return Response(data)
+
+
+
 class DepartmentDetailAPIView(generics.ListCreateAPIView):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
@@ -83,7 +149,8 @@ class EmployeePositionAPIView(generics.ListAPIView):
 # This utilizes the EmployeeGetSerializer and the EmployeePostSerializer 
 # depending on the request type and permissions.
 @method_decorator(cache_response('employee_list', timeout=900), name='get')
-class EmployeeListCreateAPIView(generics.ListCreateAPIView):
+class EmployeeListCreateAPIView(ValuesListMixin, generics.ListCreateAPIView):
+    values_serializer_class = EmployeeListValuesSerializer
     filterset_class = EmployeeFilter
     filter_backends = [
         DjangoFilterBackend,
@@ -120,13 +187,12 @@ class EmployeeListCreateAPIView(generics.ListCreateAPIView):
                     'position__employee_type',
                 ).prefetch_related('department')
             )
-        #return Employee.objects.only('id', 'employee_code', 'first_name', 'last_name')
+        return sparse_queryset(Employee.objects.all(), EmployeeGetSerializer, self.request)
             
     
     # This is for automatically assigning the first Company in the DB when a new employee is added.
     def perform_create(self, serializer):
-        default_company = Company.objects.first()
-        serializer.save(company=default_company)
+        serializer.save(company_id=reference_data.registry().default_company_id)
 
 
 
@@ -136,6 +202,12 @@ class EmployeeDetailsAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Employee.objects.select_related('user', 'position__job_role', 'position__employee_type').prefetch_related('department')
     serializer_class = EmployeeDetailSerializer
 
+    def get_queryset(self):
+        # Reads load only what the requested fields need, writes get the full instance.
+        if self.request.method == 'GET':
+            return sparse_queryset(Employee.objects.all(), self.serializer_class, self.request)
+        return super().get_queryset()
+
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
             # Allow the employee to update their own data
@@ -153,15 +225,30 @@ class EmployeeDetailsAPIView(generics.RetrieveUpdateDestroyAPIView):
             if not user.is_authenticated:
                 raise NotAuthenticated()
             
-            return Employee.objects.select_related(
-                'user',
-                'position__job_role',
-                'position__employee_type',
-            ).prefetch_related('department').get(user=user)
+            return self.get_queryset().get(user=user)
         return super().get_object()
 
 
 
+# Salary revisions and reorganisations for many employees at once (admins only).
+# Takes per-employee `updates`, or a `filter` with `changes` such as {"salary": "+5%"},
+# see EmployeeBulkUpdateSerializer. Everything is applied in one transaction.
+class EmployeeBulkUpdateAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def patch(self, request):
+        serializer = EmployeeBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'updates' in data:
+            updated = employee_bulk.update_employees(data['updates'])
+        else:
+            updated = employee_bulk.update_matching(data['filter'], data['changes'])
+        return Response({'updated': updated})
+
+
+
 # Returns currently logged in employee's profile.
 @method_decorator(cache_response('employee_profile', timeout=900), name='get')
 class EmployeeProfileAPIView(APIView):
@@ -169,7 +256,12 @@ class EmployeeProfileAPIView(APIView):
     
     def get(self, request):
     
-        employee = Employee.objects.filter(user=request.user).select_related('position__job_role', 'position__employee_type').first()
+        if 'fields' in request.query_params or 'omit' in request.query_params:
+            employee = sparse_queryset(
+                Employee.objects.filter(user=request.user), EmployeeDetailSerializer, request
+            ).first()
+        else:
+            employee = get_request_employee(request)
         if not employee:
             return Response({'detail': 'Employee profile is not found.'}, status=404)
         serializer = EmployeeDetailSerializer(employee, context={'request': request})
@@ -188,23 +280,23 @@ class EmployeeProfileAPIView(APIView):
 
 # This utilizes the TaskSerializer.
 @method_decorator(cache_response('task_list', timeout=900), name='get')
-class TaskListCreateAPIView(generics.ListCreateAPIView):
+class TaskListCreateAPIView(ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = TaskSerializer
+    values_serializer_class = TaskValuesSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             raise NotAuthenticated()
-        employee = Employee.objects.filter(user=user).first()
-
         if user.is_superuser or user.is_staff:
-            return Task.objects.select_related('assigned_to', 'assigned_by').prefetch_related('files')
+            return sparse_queryset(Task.objects.all(), TaskSerializer, self.request)
 
+        employee = get_request_employee(self.request)
         if not employee:
             return Task.objects.none()
 
-        return Task.objects.filter(assigned_to=employee).select_related('assigned_to', 'assigned_by').prefetch_related('files')
+        return sparse_queryset(Task.objects.filter(assigned_to=employee), TaskSerializer, self.request)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -222,6 +314,11 @@ class TaskDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        if self.request.method == 'GET':
+            return sparse_queryset(Task.objects.all(), TaskSerializer, self.request)
+        return super().get_queryset()
+
     def perform_destroy(self, instance):
         user = cast(AbstractUser, self.request.user)
         employee = user.employee_profile
@@ -232,8 +329,9 @@ class TaskDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
 
 # Get employees under each manager's authority
 @method_decorator(cache_response('department_employees', timeout=900), name='get')
-class DepartmentEmployeeListView(generics.ListAPIView):
+class DepartmentEmployeeListView(ValuesListMixin, generics.ListAPIView):
     serializer_class = EmployeeGetSerializer
+    values_serializer_class = EmployeeListValuesSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = EmployeeFilter
     filter_backends = [
@@ -249,34 +347,18 @@ class DepartmentEmployeeListView(generics.ListAPIView):
         user = self.request.user
         if not user.is_authenticated:
             raise NotAuthenticated()
-        employee = Employee.objects.filter(user=user).select_related('company', 'position__employee_type').prefetch_related('department').first()
-
-        if not employee:
-            return Employee.objects.none()
-        
-        employee_type = (
-            employee.position.employee_type.name.lower()
-            if employee.position and employee.position.employee_type
-            else None
-        )
+        employee = get_request_employee(self.request)
 
-        # Check if the current logged in user is a manager or an officer. Regular employees returns None.
-        if employee_type not in ['manager', 'officer']:
-            return Employee.objects.none()
-        
-        # Get employees from same company and departments
-        departments = employee.department.all()
-        return Employee.objects.filter(
-            company=employee.company,
-            department__in=departments
-        ).exclude(id=employee.id).distinct()
+        # Managers and officers get the employees from the same company and departments, regular employees get nothing.
+        return sparse_queryset(get_department_employees(employee), EmployeeGetSerializer, self.request)
     
 
 
 # This is for fetching tasks assigned by managers, and creating them.
 @method_decorator(cache_response('manager_tasks', timeout=900), name='get')
-class ManagerTaskListCreateView(generics.ListCreateAPIView):
+class ManagerTaskListCreateView(ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = TaskSerializer
+    values_serializer_class = TaskValuesSerializer
     permission_classes = [IsAuthenticated]
     #filterset_class = TaskFilter
     filter_backends = [
@@ -289,10 +371,10 @@ class ManagerTaskListCreateView(generics.ListCreateAPIView):
         user = self.request.user
         if not user.is_authenticated:
             raise NotAuthenticated()
-        employee = Employee.objects.filter(user=user).first()
+        employee = get_request_employee(self.request)
         if not employee:
             return Task.objects.none()
-        return Task.objects.filter(assigned_by=employee).select_related('assigned_to', 'assigned_by').prefetch_related('files')
+        return sparse_queryset(Task.objects.filter(assigned_by=employee), TaskSerializer, self.request)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -307,20 +389,98 @@ class ManagerTaskListCreateView(generics.ListCreateAPIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_dashboard_redirect(request):
-    employee = Employee.objects.filter(user=request.user).select_related(
-        "position__employee_type"
-    ).first()
+    employee = get_request_employee(request)
 
-    if not employee or not employee.position or not employee.position.employee_type:
-        return Response({'redirect_to': '/dashboard/'})  # fallback
-
-    employee_type = employee.position.employee_type.name.lower()
-    redirect_url = '/manager-dashboard/' if employee_type in ['manager', 'officer'] else '/dashboard/'
+    redirect_url = '/manager-dashboard/' if is_manager_or_officer(employee) else '/dashboard/'
 
     return Response({'redirect_to': redirect_url})
 
 
 
+# Prometheus scrape endpoint (api/utils/metrics.py), a plain Django view so scrapes skip DRF.
+# Needs "Authorization: Bearer <METRICS_TOKEN>", or a request from INTERNAL_IPS when no token is set.
+def prometheus_metrics(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+
+    if settings.METRICS_TOKEN:
+        allowed = constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+        )
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+
+class ManagerDashboardPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# Everything ManagerDashboard.jsx needs in one request: the manager's profile, a page of their team
+# with each member's task counters, and totals for the tasks the manager assigned.
+# Cached per manager, and invalidated only when something on that manager's dashboard changes
+# (see api/services/dashboard.py and the receivers in api/utils/cache_signals.py).
+class ManagerDashboardAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        cache_key = dashboard.cache_key(request.user.id, request.get_full_path())
+        cached_data = cache.get(cache_key)
+        metrics.record_cache_lookup(dashboard.CACHE_PREFIX, hit=bool(cached_data))
+        if cached_data:
+            return Response(json.loads(cached_data['data']))
+
+        manager = get_request_employee(request)
+        if not is_manager_or_officer(manager):
+            raise PermissionDenied("Only managers and officers have a manager dashboard.")
+
+        paginator = ManagerDashboardPagination()
+        # Per-member counts are the EmployeeTaskStats counters, joined in the team query.
+        team = paginator.paginate_queryset(
+            get_department_employees(manager).select_related('user', 'task_stats').order_by('employee_code', 'id'),
+            request,
+            view=self,
+        )
+
+        members = EmployeeGetSerializer(team, many=True, context={'request': request}).data
+        for member, employee in zip(members, team, strict=True):
+            member['task_stats'] = dashboard.member_stats(employee)
+
+        data = {
+            'profile': EmployeeDetailSerializer(manager, context={'request': request}).data,
+            'team': paginator.get_paginated_response(members).data,
+            'task_totals': dashboard.assigned_task_totals(manager),
+        }
+        cache.set(cache_key, {'data': json.dumps(data), 'status': 200}, dashboard.CACHE_TIMEOUT)
+        return Response(data)
+
+
+# Runs several GET requests (e.g. profile, tasks and department employees on page load) in one
+# round trip. Each sub-request goes through its own view, permissions and cache, with the
+# user and employee resolved once for all of them.
+class BatchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        entries = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(entries, list) or not entries:
+            raise ValidationError({'requests': 'Expected a non-empty list of paths.'})
+        if len(entries) > settings.API_BATCH_MAX_REQUESTS:
+            raise ValidationError({
+                'requests': f'At most {settings.API_BATCH_MAX_REQUESTS} requests per batch.'
+            })
+
+        return Response({'responses': run_batch(request, entries)})
+
+
 # This is for handling upload of task files.
 class TaskFileUploadView(generics.CreateAPIView):
     queryset = TaskFile.objects.all()
@@ -328,6 +488,11 @@ class TaskFileUploadView(generics.CreateAPIView):
     parser_classes = [MultiPartParser]
     permission_classes = [IsAuthenticated]
 
+    # The SHA-256 of the file is computed while it's received, so identical content is stored only once.
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = hashing_upload_handlers(request)
+        return super().initialize_request(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         user = self.request.user
         if not user.is_authenticated:
@@ -335,14 +500,95 @@ class TaskFileUploadView(generics.CreateAPIView):
         employee = Employee.objects.filter(user=user).first()
         task_id = self.kwargs.get('task_id')
         task = get_object_or_404(Task, pk=task_id)
-        serializer.save(uploaded_by=employee, task=task)
+        serializer.instance = create_task_file(
+            task=task,
+            uploaded_by=employee,
+            file=serializer.validated_data['file'],
+            description=serializer.validated_data.get('description'),
+        )
+
+
+
+# Chunked, resumable task file uploads:
+#   POST tasks/<task_id>/uploads/                     -> start an upload ({filename, size, description})
+#   PUT  tasks/<task_id>/uploads/<id>/                -> send a chunk (raw body + Content-Range: bytes start-end/total)
+#   GET  tasks/<task_id>/uploads/<id>/                -> progress ({offset, size}), to know where to resume
+#   POST tasks/<task_id>/uploads/<id>/complete/       -> create the TaskFile once every byte has arrived
+class TaskFileUploadStartView(generics.CreateAPIView):
+    serializer_class = TaskFileUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        employee = Employee.objects.filter(user=self.request.user).first()
+        task = get_object_or_404(Task, pk=self.kwargs.get('task_id'))
+        serializer.instance = uploads.start_upload(
+            task=task,
+            uploaded_by=employee,
+            filename=serializer.validated_data['filename'],
+            size=serializer.validated_data['size'],
+            description=serializer.validated_data.get('description'),
+        )
+
+
+# Only the employee who started an upload (or staff) can send chunks to it, check it, or finish it.
+class TaskFileUploadMixin:
+    def get_upload(self, request, task_id, upload_id):
+        queryset = TaskFileUpload.objects.filter(pk=upload_id, task_id=task_id)
+        if not (request.user.is_superuser or request.user.is_staff):
+            queryset = queryset.filter(uploaded_by__user=request.user)
+        return get_object_or_404(queryset)
+
+
+class TaskFileUploadChunkView(TaskFileUploadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, task_id, upload_id):
+        upload = self.get_upload(request, task_id, upload_id)
+        return Response(TaskFileUploadSerializer(upload).data)
+
+    def put(self, request, task_id, upload_id):
+        upload = self.get_upload(request, task_id, upload_id)
+
+        content_range = uploads.parse_content_range(request.headers.get('Content-Range'))
+        if content_range is None:
+            return Response({'detail': 'A "Content-Range: bytes <start>-<end>/<total>" header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        start, end, total = content_range
+        if (total is not None and total != upload.size) or end >= upload.size:
+            return Response({'detail': 'Chunk does not fit the declared file size.'}, status=status.HTTP_400_BAD_REQUEST)
+        if end - start + 1 > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            return Response({'detail': f'Chunks cannot exceed {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes.'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # The body is read straight from the request stream, never loaded into memory as a whole.
+        try:
+            upload = uploads.append_chunk(upload.id, request.stream, start, end - start + 1)
+        except uploads.UploadOffsetMismatch as exc:
+            return Response({'detail': str(exc), 'offset': exc.offset}, status=status.HTTP_409_CONFLICT)
+
+        return Response(TaskFileUploadSerializer(upload).data)
+
+
+class TaskFileUploadCompleteView(TaskFileUploadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, task_id, upload_id):
+        upload = self.get_upload(request, task_id, upload_id)
+        try:
+            task_file = uploads.finish_upload(upload.id)
+        except uploads.IncompleteUpload as exc:
+            return Response({'detail': str(exc), 'offset': upload.offset}, status=status.HTTP_409_CONFLICT)
+        except TaskFileUpload.DoesNotExist:
+            raise Http404 from None  # Finished by a concurrent request.
+
+        return Response(TaskFileSerializer(task_file, context={'request': request}).data, status=status.HTTP_201_CREATED)
 
 
 
 # This is for fetching files related to each task.
 @method_decorator(cache_response('task_file', timeout=900), name='get')
-class TaskFileListView(generics.ListAPIView):
+class TaskFileListView(ValuesListMixin, generics.ListAPIView):
     serializer_class = TaskFileSerializer
+    values_serializer_class = TaskFileValuesSerializer
     permission_classes = [IsAuthenticated]
 
     # Having a filter for task files isn't quite necessary since we're already displaying each task with its task files in the frontend UI
@@ -356,7 +602,9 @@ class TaskFileListView(generics.ListAPIView):
 
     def get_queryset(self):
         task_id = self.kwargs.get('task_id')
-        return TaskFile.objects.filter(task_id=task_id).order_by('-uploaded_at')
+        return sparse_queryset(
+            TaskFile.objects.filter(task_id=task_id).order_by('-uploaded_at'), TaskFileSerializer, self.request
+        )
     
 
 
@@ -375,17 +623,90 @@ class TaskFileDeleteView(APIView):
         if not employee:
             return Response({'detail': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        is_manager = (
-            employee.position and employee.position.employee_type and
-            employee.position.employee_type.name.lower() in ['manager', 'officer']
-        )
+        is_manager = is_manager_or_officer(employee)
 
         # Some authentication-based error handling 
         if task_file.uploaded_by != employee and not is_manager:
             return Response({'detail': 'You do not have permission to delete this file.'}, status=status.HTTP_403_FORBIDDEN)
         
-        task_file.file.delete(save=False) # delete the file from storage
+        # The stored bytes are removed in the background after commit (TaskFile post_delete signal),
+        # for deduplicated files only once the last reference is gone.
         task_file.delete()
         return Response ({'detail': 'File deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
     
-# Note to self: Consider merging all task file operations into one view.
\ No newline at end of file
+# Note to self: Consider merging all task file operations into one view.
+
+
+
+# Downloads a task file for the people involved with the task:
+# its assignee, its assigner, the uploader, managers/officers and staff.
+# The permission check is a single query, then the bytes are handed to the front proxy
+# (X-Accel-Redirect / X-Sendfile) or streamed with Range and conditional request support.
+class TaskFileDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, task_id, file_id):
+        user = request.user
+        queryset = TaskFile.objects.filter(pk=file_id, task_id=task_id).only('id', 'file', 'original_name', 'uploaded_at')
+
+        if not (user.is_superuser or user.is_staff):
+            is_manager = Employee.objects.filter(user=user).filter(
+                Q(position__employee_type__name__iexact='manager') | Q(position__employee_type__name__iexact='officer')
+            )
+            queryset = queryset.filter(
+                Q(task__assigned_to__user=user)
+                | Q(task__assigned_by__user=user)
+                | Q(uploaded_by__user=user)
+                | Exists(is_manager)
+            )
+
+        task_file = queryset.first()
+        if task_file is None:
+            raise NotFound('File not found.')
+
+        # Task files never change once uploaded, so the id and upload time make a stable validator.
+        return serve_file(
+            request,
+            task_file.file,
+            filename=task_file.display_name,
+            etag=f'"taskfile-{task_file.id}-{int(task_file.uploaded_at.timestamp())}"',
+            last_modified=task_file.uploaded_at,
+        )
+
+
+
+# Streams the employee directory as CSV or NDJSON (/api/exports/employees.csv).
+# Accepts the same filters as the employee list (EmployeeFilter) and follows the same visibility rules:
+# staff export everyone, managers/officers export their departments, regular employees get an empty file.
+class EmployeeExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_format):
+        if export_format not in exports.EXPORT_FORMATS:
+            raise NotFound(f'Unsupported export format: {export_format}')
+
+        employee = Employee.objects.filter(user=request.user).select_related('position__employee_type').first()
+        queryset = exports.employee_export_queryset(
+            exports.employees_visible_to(request.user, employee),
+            filters=request.query_params,
+        )
+        return exports.streaming_export_response(
+            export_format, exports.EMPLOYEE_EXPORT_COLUMNS, exports.employee_rows(queryset), 'employees'
+        )
+
+
+
+# Streams the task history as CSV or NDJSON (/api/exports/tasks.ndjson).
+# Staff export every task, everybody else exports the tasks assigned to them or by them.
+class TaskExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_format):
+        if export_format not in exports.EXPORT_FORMATS:
+            raise NotFound(f'Unsupported export format: {export_format}')
+
+        employee = Employee.objects.filter(user=request.user).first()
+        queryset = exports.task_export_queryset(exports.tasks_visible_to(request.user, employee))
+        return exports.streaming_export_response(
+            export_format, exports.TASK_EXPORT_COLUMNS, exports.task_rows(queryset), 'tasks'
+        )